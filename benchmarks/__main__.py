@@ -0,0 +1,56 @@
+"""Run every benchmark, printing one JSON object per measurement.
+
+Each line carries the package version and Python version so results from different releases can be
+collected into one file and compared to catch regressions:
+
+    $ python -m benchmarks --output results.jsonl
+"""
+import argparse
+import json
+import platform
+import sys
+
+from benchmarks import bench_api, bench_models
+
+
+def package_version():
+    try:
+        from importlib import metadata
+    except ImportError:
+        # Python 3.7
+        import pkg_resources
+
+        try:
+            return pkg_resources.get_distribution('pygists').version
+        except pkg_resources.DistributionNotFound:
+            return None
+
+    try:
+        return metadata.version('pygists')
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser('python -m benchmarks', description='Run every benchmark')
+    parser.add_argument('--quick', default=False, action='store_true', help='Run smaller workloads')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of latency per API request')
+    parser.add_argument(
+        '--output', '-o', type=argparse.FileType('a'), default=sys.stdout,
+        help='Append results to this file instead of printing them'
+    )
+    args = parser.parse_args(argv)
+
+    scale = 10 if args.quick else 1
+    results = bench_models.run(10000 // scale) + bench_api.run(
+        500 // scale, latency=args.latency, creates=10 // scale + 1, file_size=(1 << 20) // scale
+    )
+    meta = {'version': package_version(), 'python': platform.python_version()}
+    for result in results:
+        args.output.write(json.dumps(dict(result, **meta)) + '\n')
+    if args.output is not sys.stdout:
+        args.output.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Benchmarks of the client against a local fake of the GitHub Gists API.
+
+Measures listing, buffered and streamed page decoding, bulk get over REST and GraphQL and creating
+gists with large files over real HTTP connections to tests.fake_github.FakeGitHub, with a
+configurable per-request latency standing in for the network. Prints one JSON object per measurement.
+
+    $ python -m benchmarks.bench_api --gists 500 --latency 0.02
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pygists.pygists import Pygists
+from pygists.ratelimit import RateLimiter
+from tests.fake_github import FakeGitHub
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summary(name, seconds, count, latencies=(), **extra):
+    result = {
+        'benchmark': f'api.{name}',
+        'count': count,
+        'seconds': seconds,
+        'per_second': count / seconds if seconds > 0 else 0.0,
+    }
+    if latencies:
+        result.update({
+            'latency_mean': statistics.mean(latencies),
+            'latency_p50': percentile(latencies, 0.5),
+            'latency_p95': percentile(latencies, 0.95),
+            'latency_max': max(latencies),
+        })
+    result.update(extra)
+    return result
+
+
+def timed(func, latencies):
+    """Wrap func to record the duration of every call into latencies"""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return wrapper
+
+
+def client(server, workers, transport='rest'):
+    return Pygists(
+        server.username, 'token', max_workers=workers, base_url=server.url,
+        rate_limiter=RateLimiter(sleep=lambda _: None), transport=transport
+    )
+
+
+def bench_list(server, workers):
+    pygists = client(server, workers)
+    start = time.perf_counter()
+    gists = list(pygists.iter_user_gists())
+    seconds = time.perf_counter() - start
+    return summary('list', seconds, len(gists), workers=workers, requests=pygists.rate_limit.requests)
+
+
+def bench_list_decode(server, stream):
+    """Time to the first gist and peak memory of listing one page at a time, discarding every gist"""
+    pygists = client(server, 1)
+    count = 0
+    first_seconds = None
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        for _ in pygists.iter_user_gists(stream=stream):
+            if first_seconds is None:
+                first_seconds = time.perf_counter() - start
+            count += 1
+        seconds = time.perf_counter() - start
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    name = 'list_streamed' if stream else 'list_buffered'
+    return summary(name, seconds, count, first_seconds=first_seconds, peak_bytes=peak_bytes)
+
+
+def bench_get(server, ids, workers, transport='rest'):
+    pygists = client(server, workers, transport)
+    latencies = []
+    pygists.get_gist = timed(pygists.get_gist, latencies)
+    sent = len(server.requests)
+    start = time.perf_counter()
+    results = pygists.get_gists(ids)
+    seconds = time.perf_counter() - start
+    requests = len(server.requests) - sent
+    errors = sum(result.error is not None for result in results)
+    name = 'get' if transport == 'rest' else f'get_{transport}'
+    return summary(
+        name, seconds, len(ids), latencies, workers=workers, errors=errors, requests=requests,
+        requests_per_gist=requests / len(ids) if ids else 0.0,
+    )
+
+
+def bench_create(server, count, file_size, workers):
+    pygists = client(server, workers)
+    latencies = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'large.txt')
+        with open(path, 'w') as f:
+            f.write('x' * file_size)
+
+        create = timed(pygists.create_gist_from_files, latencies)
+        start = time.perf_counter()
+        for _ in range(count):
+            create(path, description='Large file')
+        seconds = time.perf_counter() - start
+
+    return summary(
+        'create', seconds, count, latencies, file_size=file_size,
+        bytes_per_second=count * file_size / seconds if seconds > 0 else 0.0,
+    )
+
+
+def run(gists=500, latency=0.0, workers=8, creates=10, file_size=1 << 20):
+    with FakeGitHub(latency=latency, rate_limit=1 << 30) as server:
+        ids = server.populate(gists, files_per_gist=3)
+        return [
+            dict(bench_list(server, workers), latency=latency),
+            dict(bench_list_decode(server, stream=False), latency=latency),
+            dict(bench_list_decode(server, stream=True), latency=latency),
+            dict(bench_get(server, ids, workers), latency=latency),
+            dict(bench_get(server, ids, workers, transport='graphql'), latency=latency),
+            dict(bench_create(server, creates, file_size, workers), latency=latency),
+        ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser('Benchmark the client against a local fake GitHub API')
+    parser.add_argument('--gists', type=int, default=500, help='Number of gists to list and get')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of latency per request')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent requests')
+    parser.add_argument('--creates', type=int, default=10, help='Number of gists to create')
+    parser.add_argument('--file-size', type=int, default=1 << 20, help='Bytes per created file')
+    args = parser.parse_args(argv)
+
+    for result in run(args.gists, args.latency, args.workers, args.creates, args.file_size):
+        print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
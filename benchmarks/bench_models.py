@@ -0,0 +1,99 @@
+"""Micro-benchmark of building Gist models from a listing response.
+
+Compares Gist.from_response against the previous construction path, which ran strptime, rebuilt
+every file dict and created one GistOwner per gist. Prints one JSON object per measurement.
+
+    $ python -m benchmarks.bench_models --gists 10000
+"""
+from collections import namedtuple
+import argparse
+import datetime as dt
+import json
+import sys
+import time
+import tracemalloc
+
+from pygists.models.gist import Gist
+from tests.utils import gist_data
+
+LegacyFile = namedtuple(
+    'LegacyFile', ('filename', 'type', 'language', 'raw_url', 'size', 'truncated', 'content'),
+    defaults=(None, None)
+)
+LegacyOwner = namedtuple('LegacyOwner', tuple(gist_data()['owner']))
+
+
+class LegacyGist:
+    __slots__ = Gist.__slots__
+    _transformations = {
+        'created_at': lambda _: dt.datetime.strptime(_, '%Y-%m-%dT%H:%M:%SZ'),
+        'updated_at': lambda _: dt.datetime.strptime(_, '%Y-%m-%dT%H:%M:%SZ'),
+        'files': lambda files: [LegacyFile(**_) for _ in files],
+        'owner': lambda _: LegacyOwner(**_),
+    }
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, self._transformations.get(key, lambda _: _)(value))
+
+    @classmethod
+    def from_response(cls, resp):
+        resp = dict(resp)
+        resp['script_url'] = 'https://gist.github.com/{user}/{gist_id}.js'.format(
+            user=resp['owner']['login'], gist_id=resp['id']
+        )
+        resp['files'] = [{k: v for k, v in file.items()} for file in resp['files'].values()]
+        resp.pop('history', None)
+        resp.pop('forks', None)
+        return cls(**resp)
+
+
+def listing(count, files_per_gist=3):
+    return [
+        gist_data(f'{i:032x}', files={f'file_{j}.py': 'pass' for j in range(files_per_gist)})
+        for i in range(count)
+    ]
+
+
+def measure(name, parse, responses, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        [parse(resp) for resp in responses]
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    gists = [parse(resp) for resp in responses]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del gists
+
+    return {
+        'benchmark': f'models.{name}',
+        'gists': len(responses),
+        'seconds': best,
+        'gists_per_second': len(responses) / best,
+        'bytes_per_gist': size / len(responses),
+    }
+
+
+def run(count=10000, repeat=5):
+    responses = listing(count)
+    return [
+        measure('legacy', LegacyGist.from_response, responses, repeat),
+        measure('from_response', Gist.from_response, responses, repeat),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser('Benchmark Gist model construction')
+    parser.add_argument('--gists', type=int, default=10000, help='Number of gists to parse')
+    parser.add_argument('--repeat', type=int, default=5, help='Keep the best of this many runs')
+    args = parser.parse_args(argv)
+
+    for result in run(args.gists, args.repeat):
+        print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,27 @@
-from .pygists import Pygists
-from .cli import main
+"""CLI tool and client to operate with the GitHub Gists API.
 
+Pygists and main are imported lazily, on first access, to keep the command line startup fast.
+"""
+import importlib
 
 __all__ = [
     'Pygists',
     'main'
 ]
+
+_LAZY_ATTRIBUTES = {
+    'Pygists': 'pygists.pygists',
+    'main': 'pygists.cli',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,155 @@
+"""Asyncio client for the GitHub Gists API.
+
+Requires the optional aiohttp dependency: pip install pygists[async]
+"""
+import base64
+import datetime as dt
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Union
+from urllib.parse import urljoin
+
+import aiohttp
+
+from pygists.models.gist import Gist
+from pygists.payloads import (
+    FilesType, PathType, StreamingPayload, create_params, edit_params, upload_edit_files, upload_files
+)
+from pygists.pygists import BASE_ENDPOINT, MAX_PER_PAGE
+
+DEFAULT_CONNECTIONS = 100
+
+
+async def _stream(payload: Iterable[bytes]) -> AsyncIterator[bytes]:
+    for chunk in payload:
+        yield chunk
+
+
+class AsyncPygists:
+    """Mirror of Pygists' public API running on an asyncio event loop.
+
+    All requests share one pooled aiohttp session holding at most max_connections sockets.
+    Use as an async context manager, or await close() when done, to release the connections.
+    """
+
+    def __init__(
+        self, username: str, token: str, base_url: str = BASE_ENDPOINT,
+        max_connections: int = DEFAULT_CONNECTIONS
+    ) -> None:
+        self.username = username
+        self.token = token
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> 'AsyncPygists':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Set session authorization parameters. Must be accessed from within a running event loop."""
+        if self._session is None:
+            headers = {
+                'Accept': 'application/vnd.github.v3+json',
+                'User-Agent': self.username or 'pygists',
+            }
+            if self.username is not None and self.token is not None:
+                credentials = base64.b64encode(f'{self.username}:{self.token}'.encode()).decode()
+                headers['Authorization'] = f'Basic {credentials}'
+
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                headers=headers,
+                raise_for_status=True,
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def create_gist_from_files(
+        self, *args: PathType, description: str = '', public: bool = True
+    ) -> Gist:
+        """Create gist streaming the content of files from disk"""
+        payload = StreamingPayload(upload_files(*args), {'description': description, 'public': public})
+
+        async with self.session.post(
+            urljoin(self.base_url, 'gists'), data=_stream(payload),
+            headers={'Content-Type': 'application/json'}
+        ) as r:
+            return Gist.from_response(await r.json())
+
+    async def create_gist(
+        self, names: Sequence[str], contents: Sequence[str], description: str, public: bool
+    ) -> Gist:
+        """Create gist with the GitHub API"""
+        params = create_params(names, contents, description, public)
+
+        async with self.session.post(urljoin(self.base_url, 'gists'), json=params) as r:
+            return Gist.from_response(await r.json())
+
+    async def edit_gist_from_files(
+        self, to_add: Sequence[PathType], to_delete: Sequence[PathType], to_modify: Dict[str, PathType],
+        gist_id: str, description: Optional[str] = None,
+    ) -> Gist:
+        """Edit gist streaming the content of added and modified files from disk"""
+        files = upload_edit_files(to_add, to_delete, to_modify)
+        if not files and description is None:
+            raise ValueError('No new description or files to edit gist')
+
+        payload = StreamingPayload(files, {'description': description} if description is not None else None)
+
+        async with self.session.patch(
+            urljoin(self.base_url, f'gists/{gist_id}'), data=_stream(payload),
+            headers={'Content-Type': 'application/json'}
+        ) as r:
+            return Gist.from_response(await r.json())
+
+    async def edit_gist(
+        self, gist_id: str, files: Optional[FilesType] = None, new_description: Optional[str] = None
+    ) -> Gist:
+        """Edit a single gist"""
+        params = edit_params(files, new_description)
+
+        async with self.session.patch(urljoin(self.base_url, f'gists/{gist_id}'), json=params) as r:
+            return Gist.from_response(await r.json())
+
+    async def list_user_gists(
+        self, since: Optional[dt.datetime] = None, per_page: int = MAX_PER_PAGE
+    ) -> List[Gist]:
+        """List all user's public gists"""
+        return [gist async for gist in self.iter_user_gists(since=since, per_page=per_page)]
+
+    async def iter_user_gists(
+        self, since: Optional[dt.datetime] = None, per_page: int = MAX_PER_PAGE
+    ) -> AsyncIterator[Gist]:
+        """Iterate over all user's public gists following the Link header pagination"""
+        params: Optional[Dict[str, Union[str, int]]] = {'per_page': per_page}
+        if since is not None:
+            params['since'] = since.isoformat()  # type: ignore
+
+        url: Optional[str] = urljoin(self.base_url, f'users/{self.username}/gists')
+        while url is not None:
+            async with self.session.get(url, params=params) as r:
+                page = await r.json()
+                next_link = r.links.get('next')
+
+            for gist in page:
+                yield Gist.from_response(gist)
+
+            # The next link already carries every query parameter
+            url = str(next_link['url']) if next_link is not None else None
+            params = None
+
+    async def get_gist(self, gist_id: str) -> Gist:
+        """Get a user's gist"""
+        async with self.session.get(urljoin(self.base_url, f'gists/{gist_id}')) as r:
+            return Gist.from_response(await r.json())
+
+    async def delete_gist(self, gist_id: str) -> None:
+        """Delete a user's gist"""
+        async with self.session.delete(urljoin(self.base_url, f'gists/{gist_id}')):
+            pass
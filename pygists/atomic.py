@@ -0,0 +1,23 @@
+"""
+Atomic file writes: readers see either the previous file or the complete new one
+"""
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+import os
+import tempfile
+
+
+@contextmanager
+def atomic_open(path: os.PathLike, mode: str = 'w') -> Iterator[IO]:
+    """Open a temporary file next to path, moved over path only once the block exits cleanly"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -0,0 +1,104 @@
+"""
+Response caches used to send conditional requests to the GitHub API
+"""
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import threading
+
+from pygists.atomic import atomic_open
+from pygists.settings import DEFAULT_CACHE_DIR
+
+DEFAULT_CACHE_SIZE = 256
+
+CacheEntry = namedtuple('CacheEntry', ('etag', 'last_modified', 'body', 'links'), defaults=(None,))
+
+
+def cache_key(username: str, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Key a GET request by user, endpoint and query parameters"""
+    query = '&'.join(f'{k}={v}' for k, v in sorted((params or {}).items()))
+    return f'{username} {url}?{query}'
+
+
+class BaseCache:
+    """Interface for caches of GitHub API responses. Implementations must be thread safe."""
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryCache(BaseCache):
+    """Least recently used in-memory cache holding at most maxsize responses"""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class FileCache(BaseCache):
+    """On-disk cache storing each response as a JSON file under directory"""
+
+    def __init__(self, directory: os.PathLike = DEFAULT_CACHE_DIR) -> None:
+        self.directory = Path(directory) / 'responses'
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f'{hashlib.sha256(key.encode()).hexdigest()}.json'
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            with open(self._path(key), 'r') as f:
+                return CacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with atomic_open(self._path(key)) as f:
+            json.dump(entry._asdict(), f)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        for path in self.directory.glob('*.json'):
+            path.unlink()
@@ -1,10 +1,25 @@
+"""Command line interface.
+
+Only lightweight modules are imported up front so that --help and argument errors return quickly.
+The client, requests and everything else a subcommand needs are imported once arguments are parsed.
+"""
+from pathlib import Path
 import argparse
 import datetime as dt
 import sys
 import os
 
-from pygists import Pygists
-from pygists import handlers
+from pygists.settings import (
+    DEFAULT_INDEX_PATH, DEFAULT_MAX_POLL_INTERVAL, DEFAULT_POLL_INTERVAL, DEFAULT_SOCKET_PATH,
+    DEFAULT_WORKERS, cache_dir
+)
+
+FORWARDED_SUBCOMMANDS = ('ls', 'get', 'create', 'update', 'delete')
+# Environment variables the arguments default to, sent along with forwarded subcommands
+ENVIRONMENT = (
+    'GITHUB_USER', 'GITHUB_TOKEN', 'PYGISTS_TOKEN_POOL', 'PYGISTS_TRANSPORT', 'PYGISTS_SOCKET',
+    'XDG_CACHE_HOME',
+)
 
 
 def optional_date_type(s):
@@ -14,7 +29,16 @@ def optional_date_type(s):
         return None
 
 
-def create_parser():
+def token_pool_type(s):
+    pairs = [pair.split(':', 1) for pair in s.split(',') if pair.strip()]
+    if any(len(pair) != 2 for pair in pairs):
+        raise argparse.ArgumentTypeError('Expected comma separated USERNAME:TOKEN pairs')
+    return [(username.strip(), token.strip()) for username, token in pairs]
+
+
+def create_parser(environ=None):
+    """Parser of the command line, with defaults read from environ or else the process environment"""
+    environ = os.environ if environ is None else environ
     parser = argparse.ArgumentParser('Create or get GitHub gists.')
     subparsers = parser.add_subparsers(help='List, create, get, update or delete gists', dest='subcommand')
 
@@ -23,19 +47,31 @@ def create_parser():
         '--since', '-s', default=None, type=optional_date_type,
         help='Get gists since this date in ISO 8601 format'
     )
-    add_common_arguments(parse_ls)
+    parse_ls.add_argument(
+        '--stream', action='store_true', default=False,
+        help='Decode every page as it is received, one page at a time, instead of prefetching pages'
+    )
+    add_common_arguments(parse_ls, environ)
 
-    parse_get = subparsers.add_parser('get', help='Get a gist')
+    parse_get = subparsers.add_parser('get', help='Get one or more gists')
+    parse_get.add_argument(
+        'id', nargs='*', default=[], help='One or more gist IDs to get'
+    )
     parse_get.add_argument(
-        'id', help='The gist ID to get'
+        '--from-file', '-f', type=argparse.FileType('r'), default=None,
+        help="Read gist IDs to get from a file, one per line. Use '-' to read from stdin"
     )
-    add_common_arguments(parse_get)
+    add_common_arguments(parse_get, environ)
 
-    parse_delete = subparsers.add_parser('delete', help='Delete a gist')
+    parse_delete = subparsers.add_parser('delete', help='Delete one or more gists')
+    parse_delete.add_argument(
+        'id', nargs='*', default=[], help='One or more gist IDs to delete'
+    )
     parse_delete.add_argument(
-        'id', help='The gist ID to delete'
+        '--from-file', '-f', type=argparse.FileType('r'), default=None,
+        help="Read gist IDs to delete from a file, one per line. Use '-' to read from stdin"
     )
-    add_common_arguments(parse_delete)
+    add_common_arguments(parse_delete, environ)
 
     parse_update = subparsers.add_parser('update', help='Update a gist')
     parse_update.add_argument(
@@ -56,11 +92,19 @@ def create_parser():
     parse_update.add_argument(
         '--description', '-d', required=False, help='The new gist description'
     )
-    add_common_arguments(parse_update)
+    parse_update.add_argument(
+        '--sync-dir', default=None,
+        help='Make the gist hold exactly the files of this directory, uploading only the changed ones'
+    )
+    add_common_arguments(parse_update, environ)
 
     parse_create = subparsers.add_parser('create', help='Create a new gist')
     parse_create.add_argument(
-        'file', nargs='+', help='One or more files to be set to the gist'
+        'file', nargs='*', default=[], help='One or more files to be set to the gist'
+    )
+    parse_create.add_argument(
+        '--batch', '-b', default=None,
+        help='Create many gists from a JSON manifest listing the files, description and visibility of each'
     )
     parse_create.add_argument(
         '--description', '-d', required=False, help='The gist description'
@@ -68,35 +112,230 @@ def create_parser():
     parse_create.add_argument(
         '--private', required=False, help='Make the gist private', default=False
     )
-    add_common_arguments(parse_create)
+    add_common_arguments(parse_create, environ)
+
+    parse_sync = subparsers.add_parser('sync', help='Mirror all gists into a local directory')
+    parse_sync.add_argument(
+        'directory', help='The directory holding the mirror, created if missing'
+    )
+    add_common_arguments(parse_sync, environ)
+
+    parse_search = subparsers.add_parser('search', help='Search gists in a local index')
+    parse_search.add_argument(
+        'query', nargs='?', default=None, help='Words to find in descriptions, file names and contents'
+    )
+    parse_search.add_argument(
+        '--language', '-l', default=None, help='Only gists with a file in this language'
+    )
+    parse_search.add_argument(
+        '--filename', '-f', default=None, help='Only gists with a file name containing this'
+    )
+    parse_search.add_argument(
+        '--limit', '-n', type=int, default=None, help='Maximum number of gists to show'
+    )
+    parse_search.add_argument(
+        '--index', default=DEFAULT_INDEX_PATH, help='Path of the SQLite index'
+    )
+    refresh = parse_search.add_mutually_exclusive_group()
+    refresh.add_argument(
+        '--offline', default=False, action='store_true', help='Search the index without refreshing it'
+    )
+    refresh.add_argument(
+        '--full-refresh', default=False, action='store_true',
+        help='Re-index every gist, dropping the gists deleted from GitHub'
+    )
+    parse_search.add_argument(
+        '--index-content', default=False, action='store_true',
+        help='Also fetch and index the content of updated files'
+    )
+    add_common_arguments(parse_search, environ)
+
+    parse_clone = subparsers.add_parser('clone', help='Clone one or more gists with git')
+    parse_clone.add_argument('id', nargs='*', default=[], help='One or more gist IDs to clone')
+    parse_clone.add_argument(
+        '--from-file', '-f', type=argparse.FileType('r'), default=None,
+        help="Read gist IDs to clone from a file, one per line. Use '-' to read from stdin"
+    )
+    parse_clone.add_argument(
+        '--directory', '-C', default='.', help='Clone every gist into a subdirectory named after its ID here'
+    )
+    parse_clone.add_argument(
+        '--depth', type=int, default=1, help='Number of revisions to fetch. 0 fetches the whole history'
+    )
+    parse_clone.add_argument(
+        '--filter', default=None, dest='filter_spec',
+        help='Partial clone filter, such as blob:none or blob:limit=1m, passed to git'
+    )
+    add_common_arguments(parse_clone, environ)
+
+    parse_history = subparsers.add_parser('history', help='List or archive the revisions of a gist')
+    parse_history.add_argument('id', help='The gist ID')
+    parse_history.add_argument(
+        '--limit', '-n', type=int, default=None, help='Only list this many of the latest revisions'
+    )
+    parse_history.add_argument(
+        '--archive', default=None,
+        help='Store every revision missing from this directory, keeping each distinct file content once'
+    )
+    add_common_arguments(parse_history, environ)
+
+    parse_watch = subparsers.add_parser(
+        'watch', help='Poll gists and print every change as one JSON event per line'
+    )
+    parse_watch.add_argument(
+        '--interval', type=float, default=DEFAULT_POLL_INTERVAL,
+        help='Seconds between polls after a change, doubling with every poll without changes'
+    )
+    parse_watch.add_argument(
+        '--max-interval', type=float, default=DEFAULT_MAX_POLL_INTERVAL,
+        help='Most seconds between polls'
+    )
+    parse_watch.add_argument(
+        '--initial', default=False, action='store_true',
+        help='Report the gists found by the first poll as created'
+    )
+    parse_watch.add_argument(
+        '--text', default=False, action='store_true', help='Print events as lines of text instead of JSON'
+    )
+    add_common_arguments(parse_watch, environ)
+
+    parse_daemon = subparsers.add_parser(
+        'daemon', help='Serve subcommands from a long-lived process keeping connections and caches warm'
+    )
+    parse_daemon.add_argument(
+        '--socket', default=environ.get('PYGISTS_SOCKET', DEFAULT_SOCKET_PATH),
+        help='Path of the Unix socket to listen on'
+    )
 
     return parser
 
 
-def add_common_arguments(parser):
+def add_common_arguments(parser, environ):
     parser.add_argument(
         '--username', '-u', help='GitHub username',
-        required=False, default=os.getenv('GITHUB_USER')
+        required=False, default=environ.get('GITHUB_USER')
     )
     parser.add_argument(
         '--token', '-t', help='GitHub OAuth token',
-        required=False, default=os.getenv('GITHUB_TOKEN')
+        required=False, default=environ.get('GITHUB_TOKEN')
+    )
+    parser.add_argument(
+        '--token-pool', default=environ.get('PYGISTS_TOKEN_POOL'), type=token_pool_type,
+        help='Comma separated USERNAME:TOKEN pairs of other accounts to spread read requests over'
+    )
+    parser.add_argument(
+        '--transport', choices=('rest', 'graphql'), default=environ.get('PYGISTS_TRANSPORT', 'rest'),
+        help='API used to list gists and get many gists, graphql batching them into fewer requests'
+    )
+    parser.add_argument(
+        '--max-workers', '-w', type=int, default=DEFAULT_WORKERS,
+        help='Maximum number of concurrent requests to GitHub'
+    )
+    parser.add_argument(
+        '--socket', default=environ.get('PYGISTS_SOCKET', DEFAULT_SOCKET_PATH),
+        help='Path of the Unix socket of a running pygists daemon'
+    )
+    parser.add_argument(
+        '--no-daemon', default=False, action='store_true',
+        help='Run the subcommand in this process even when a pygists daemon is running'
+    )
+    parser.add_argument(
+        '--cache-dir', default=cache_dir(environ),
+        help='Directory where responses are cached to send conditional requests to GitHub'
     )
     parser.add_argument(
-        '--json', default=False, action='store_true', help='Print gist in JSON format'
+        '--no-cache', default=False, action='store_true', help='Do not cache responses from GitHub'
+    )
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument(
+        '--json', default=False, action='store_true', help='Print gists as a single JSON array'
+    )
+    output.add_argument(
+        '--ndjson', default=False, action='store_true', help='Print gists as one JSON document per line'
     )
     parser.add_argument(
         '--show-content', '-c', default=False, action='store_true', help="Show the gist's content",
     )
+    parser.add_argument(
+        '--profile', default=False, action='store_true',
+        help='Print request timings, transferred bytes, retries and parse times to stderr at exit'
+    )
+    parser.add_argument(
+        '--metrics-file', default=None,
+        help='Write the same metrics to this file in the Prometheus text format'
+    )
     return parser
 
 
 def main():
-    parsed = create_parser().parse_args(sys.argv[1:])
-    pygists = Pygists(parsed.username, parsed.token)
+    argv = sys.argv[1:]
+    parser = create_parser()
+    parsed = parser.parse_args(argv)
+    if parsed.subcommand is None:
+        parser.print_help()
+        return 2
+
+    if parsed.subcommand == 'daemon':
+        from pygists.daemon import Daemon
+
+        return Daemon(parsed.socket).serve_forever()
+
+    # Metrics are collected by the process running the subcommand
+    profiling = parsed.profile or parsed.metrics_file is not None
+    if parsed.subcommand in FORWARDED_SUBCOMMANDS and not parsed.no_daemon and not profiling:
+        from pygists.daemon import forward
+
+        code = forward(argv, parsed.socket)
+        if code is not None:
+            return code
+
+    return run(parsed)
+
+
+def create_client(parsed):
+    """Build the client configured by the parsed arguments"""
+    from pygists.cache import FileCache
+    from pygists.pygists import Pygists
+
+    metrics = None
+    if parsed.profile or parsed.metrics_file is not None:
+        from pygists.metrics import PrometheusSink
+
+        metrics = PrometheusSink(parsed.metrics_file)
 
-    handler = getattr(handlers, parsed.subcommand)
+    return Pygists(
+        parsed.username, parsed.token, max_workers=parsed.max_workers,
+        cache=None if parsed.no_cache else FileCache(parsed.cache_dir),
+        raw_dir=None if parsed.no_cache else Path(parsed.cache_dir) / 'raw',
+        metrics=metrics, token_pool=parsed.token_pool, transport=parsed.transport,
+    )
+
+
+def run(parsed, pygists=None):
+    """Run the subcommand of the parsed arguments, returning its exit code"""
+    from pygists import handlers
+
+    handler = getattr(handlers, parsed.subcommand, None)
     if handler is None:
         sys.exit(f'No handler defined for subcommand \'{parsed.subcommand}\'')
 
-    handler(pygists, parsed)
+    pygists = pygists if pygists is not None else create_client(parsed)
+    try:
+        return handler(pygists, parsed) or 0
+    finally:
+        report_metrics(pygists, parsed)
+
+
+def report_metrics(pygists, parsed):
+    """Print the metrics summary and write the metrics file requested by the arguments"""
+    if not parsed.profile and parsed.metrics_file is None:
+        return
+
+    from pygists.metrics import PrometheusSink
+
+    if not isinstance(pygists.metrics, PrometheusSink):
+        return
+    if parsed.profile:
+        print(pygists.metrics.summary(), end='', file=sys.stderr)
+    if parsed.metrics_file is not None:
+        pygists.metrics.flush()
@@ -0,0 +1,74 @@
+"""
+Gist clones over the git transport
+"""
+from pathlib import Path
+from typing import Dict, List, Optional
+import base64
+import os
+import shutil
+import subprocess
+
+GIST_GIT_URL = 'https://gist.github.com/'
+
+
+def git_env(username: Optional[str] = None, token: Optional[str] = None) -> Dict[str, str]:
+    """Environment for git commands, passing credentials as an HTTP header.
+
+    The header is set through GIT_CONFIG_* variables rather than the command line or the remote URL,
+    so the token neither shows up in the process list nor is saved in the clone's configuration.
+    """
+    env = dict(os.environ, GIT_TERMINAL_PROMPT='0')
+    if username and token:
+        credentials = base64.b64encode(f'{username}:{token}'.encode()).decode()
+        env.update({
+            'GIT_CONFIG_COUNT': '1',
+            'GIT_CONFIG_KEY_0': 'http.extraHeader',
+            'GIT_CONFIG_VALUE_0': f'Authorization: Basic {credentials}',
+        })
+    return env
+
+
+def git(args: List[str], env: Dict[str, str], cwd: Optional[os.PathLike] = None) -> str:
+    """Run a git command, raising RuntimeError with git's message when it fails"""
+    if shutil.which('git') is None:
+        raise RuntimeError('git must be installed to clone gists')
+
+    result = subprocess.run(['git', *args], cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'git {args[0]} failed: {result.stderr.strip()}')
+    return result.stdout
+
+
+def fetch_options(depth: Optional[int], filter_spec: Optional[str]) -> List[str]:
+    options = []
+    if depth is not None:
+        options.append(f'--depth={depth}')
+    if filter_spec is not None:
+        options.append(f'--filter={filter_spec}')
+    return options
+
+
+def clone(
+    url: str, path: os.PathLike, env: Dict[str, str], depth: Optional[int] = 1,
+    filter_spec: Optional[str] = None
+) -> Path:
+    """Clone url into path, or bring an existing clone up to date with the same options.
+
+    With the default depth only the latest revision is fetched. filter_spec, such as blob:none or
+    blob:limit=1m, makes a partial clone whose filtered out blobs are fetched on demand.
+
+    An existing clone is reset to the fetched revision, since shallow histories cannot be merged, so
+    RuntimeError is raised instead when its work tree has modified or untracked files. Local commits
+    are not kept either.
+    """
+    path = Path(path)
+    options = fetch_options(depth, filter_spec)
+    if not (path / '.git').exists():
+        git(['clone', '--quiet', *options, url, str(path)], env)
+        return path
+
+    if git(['status', '--porcelain'], env, cwd=path):
+        raise RuntimeError(f'{path} has local changes, not updating it')
+    git(['fetch', '--quiet', *options, 'origin', 'HEAD'], env, cwd=path)
+    git(['reset', '--quiet', '--hard', 'FETCH_HEAD'], env, cwd=path)
+    return path
@@ -0,0 +1,105 @@
+"""
+Single-flight coalescing of concurrent identical reads
+"""
+from collections import namedtuple
+from typing import Any, Callable, Dict, Hashable, Optional
+import threading
+import time
+
+CoalescingStats = namedtuple('CoalescingStats', ('calls', 'coalesced', 'cached'))
+CoalescingStats.__doc__ = (
+    'Calls made, calls that shared a call already in flight and calls answered by a result '
+    'completed within the window'
+)
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error', 'finished')
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.finished: Optional[float] = None
+
+
+class SingleFlight:
+    """Share one call, and its result, between the callers asking for the same key at the same time.
+
+    The first caller of a key makes the call while later ones wait for its result or exception.
+    Successful results are also handed to callers arriving up to window seconds after the call
+    completed. Results are shared, not copied, so callers must not modify them. Thread safe.
+    """
+
+    def __init__(self, window: float = 0.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.window = window
+        self.clock = clock
+        self.calls = 0
+        self.coalesced = 0
+        self.cached = 0
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._pruned = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> CoalescingStats:
+        with self._lock:
+            return CoalescingStats(self.calls, self.coalesced, self.cached)
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Return func(), or the result of the call of the same key in flight or within the window"""
+        with self._lock:
+            now = self.clock()
+            flight = self._flights.get(key)
+            if flight is not None and flight.finished is not None:
+                if now - flight.finished < self.window:
+                    self.cached += 1
+                    return flight.result
+                flight = None
+            if flight is None:
+                self._prune(now)
+                leader = True
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                # Calls in flight when the results were cleared are not kept either
+                if self._flights.get(key) is flight:
+                    if flight.error is None and self.window > 0:
+                        flight.finished = self.clock()
+                    else:
+                        del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def clear(self) -> None:
+        """Forget every result, so that the next call of every key is made again"""
+        with self._lock:
+            self._flights.clear()
+
+    def _prune(self, now: float) -> None:
+        """Drop the results past their window, at most once per window"""
+        if now - self._pruned < self.window:
+            return
+        self._pruned = now
+        expired = [
+            key for key, flight in self._flights.items()
+            if flight.finished is not None and now - flight.finished >= self.window
+        ]
+        for key in expired:
+            del self._flights[key]
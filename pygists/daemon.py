@@ -0,0 +1,214 @@
+"""
+Long-lived process serving CLI subcommands over a Unix socket.
+
+The daemon keeps one client per set of credentials, so pooled connections, cached responses and
+rate limit state outlive a single invocation. The CLI forwards subcommands to it when it is running
+and falls back to running them in process otherwise.
+
+The protocol is one JSON document per line: the client sends its arguments, working directory, the
+environment variables the arguments default to and, when reading IDs from '-', its standard input.
+The daemon answers with the output as it is written, in chunks of at most CHUNK_SIZE characters,
+followed by the exit code.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+
+ClientFactory = Callable[[Any], Any]
+Send = Callable[[Dict[str, Any]], None]
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _send(sock: socket.socket, message: Dict[str, Any]) -> None:
+    sock.sendall(json.dumps(message).encode() + b'\n')
+
+
+class _Relay(io.TextIOBase):
+    """Text stream sending what is written to it as messages keyed by name.
+
+    Writes are buffered up to buffer_size characters, so a large output is relayed in a few chunks
+    without being held in memory until the subcommand exits.
+    """
+
+    def __init__(self, send: Send, name: str, buffer_size: int = CHUNK_SIZE) -> None:
+        self._send = send
+        self.name = name
+        self.buffer_size = buffer_size
+        self._buffer: List[str] = []
+        self._buffered = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        self._buffer.append(s)
+        self._buffered += len(s)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+        return len(s)
+
+    def flush(self) -> None:
+        if self._buffered:
+            text = ''.join(self._buffer)
+            self._buffer, self._buffered = [], 0
+            self._send({self.name: text})
+
+
+def forward(argv: List[str], path: os.PathLike) -> Optional[int]:
+    """Run a subcommand in the daemon listening on path, relaying its output.
+
+    Returns the exit code of the subcommand, or None when no daemon is listening so the caller can
+    run it in process instead.
+    """
+    if not os.path.exists(path):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(os.fspath(path))
+    except OSError:
+        sock.close()
+        return None
+
+    from pygists.cli import ENVIRONMENT
+
+    streams = {'stdout': sys.stdout, 'stderr': sys.stderr}
+    with sock:
+        stdin = sys.stdin.read() if '-' in argv else None
+        env = {name: os.environ[name] for name in ENVIRONMENT if name in os.environ}
+        _send(sock, {'argv': argv, 'cwd': os.getcwd(), 'env': env, 'stdin': stdin})
+        with sock.makefile('rb') as f:
+            for line in f:
+                message = json.loads(line)
+                if 'code' in message:
+                    return message['code']
+                for name, stream in streams.items():
+                    if name in message:
+                        stream.write(message[name])
+                        stream.flush()
+    raise ConnectionError('Connection closed before the exit code was received')
+
+
+def is_listening(path: os.PathLike) -> bool:
+    """Whether a daemon accepts connections on path, as opposed to a stale socket file"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with sock:
+        try:
+            sock.connect(os.fspath(path))
+        except OSError:
+            return False
+    return True
+
+
+class Daemon:
+    """Serve forwarded subcommands on a Unix socket at path.
+
+    Subcommands run one at a time, since they write to the process-wide standard streams and resolve
+    file paths against the working directory of the client; each still fans out over its client's
+    worker pool. Arguments default to the environment of the client, not the one of the daemon. The
+    socket is only accessible to the user running the daemon.
+    """
+
+    def __init__(self, path: os.PathLike, client_factory: Optional[ClientFactory] = None) -> None:
+        self.path = os.fspath(path)
+        self.client_factory = client_factory
+        self.clients: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[socketserver.UnixStreamServer] = None
+        self._ready = threading.Event()
+
+    def client(self, parsed) -> Any:
+        """The client for the credentials and cache settings of the parsed arguments"""
+        from pygists.cli import create_client
+
+        key = (
+            parsed.username, parsed.token, tuple(parsed.token_pool or ()), parsed.max_workers,
+            str(parsed.cache_dir), parsed.no_cache, parsed.transport,
+        )
+        if key not in self.clients:
+            self.clients[key] = (self.client_factory or create_client)(parsed)
+        return self.clients[key]
+
+    def handle(self, request: Dict[str, Any], send: Send) -> int:
+        """Run the subcommand of a request, sending its output as it is written and returning its exit code"""
+        from pygists.cli import create_parser, run
+
+        stdout, stderr = _Relay(send, 'stdout', CHUNK_SIZE), _Relay(send, 'stderr', buffer_size=0)
+        with self._lock, contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            cwd = os.getcwd()
+            stdin, sys.stdin = sys.stdin, io.StringIO(request.get('stdin') or '')
+            try:
+                os.chdir(request['cwd'])
+                parsed = create_parser(request.get('env') or {}).parse_args(request['argv'])
+                code = run(parsed, self.client(parsed))
+            except SystemExit as e:
+                if e.code is None or isinstance(e.code, int):
+                    code = e.code or 0
+                else:
+                    print(e.code, file=sys.stderr)
+                    code = 1
+            except Exception:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdin = stdin
+                os.chdir(cwd)
+                stdout.flush()
+
+        return code
+
+    def serve_forever(self) -> int:
+        """Listen until interrupted, returning the exit code of the daemon"""
+        if is_listening(self.path):
+            print(f'A pygists daemon is already listening on {self.path}', file=sys.stderr)
+            return 1
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                request = json.loads(self.rfile.readline())
+                try:
+                    code = daemon.handle(request, lambda message: _send(self.request, message))
+                    _send(self.request, {'code': code})
+                except OSError:
+                    # The client went away, such as when its output is piped to head
+                    pass
+
+        umask = os.umask(0o077)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(self.path, Handler)
+        finally:
+            os.umask(umask)
+        self._server.daemon_threads = True
+        self._ready.set()
+
+        try:
+            self._server.serve_forever(poll_interval=0.1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+        return 0
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the daemon is accepting connections"""
+        return self._ready.wait(timeout)
+
+    def shutdown(self) -> None:
+        """Stop serving. Must be called from another thread than serve_forever."""
+        if self._server is not None:
+            self._server.shutdown()
@@ -0,0 +1,123 @@
+"""
+Delta edits uploading only the files of a directory that differ from a gist
+"""
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+import hashlib
+import json
+import os
+import re
+
+from pygists.atomic import atomic_open
+from pygists.models.gist import GistFile
+from pygists.payloads import CHUNK_SIZE, UploadFile, UploadsType
+
+STATE_FILE = '.pygists-sync.json'
+# Raw URLs embed the git blob SHA-1 of the file: .../raw/<sha>/<filename>
+RAW_SHA = re.compile(r'/raw/([0-9a-f]{40})/')
+
+LocalFile = namedtuple('LocalFile', ('path', 'size', 'mtime_ns', 'sha'))
+LocalFile.__doc__ = 'A file of a synced directory with its size, modification time and git blob SHA-1'
+
+
+def blob_sha(path: os.PathLike, size: Optional[int] = None) -> str:
+    """Git blob SHA-1 of a file, the hash GitHub embeds in raw URLs"""
+    size = os.stat(path).st_size if size is None else size
+    digest = hashlib.sha1(f'blob {size}\0'.encode())
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_sha(content: bytes) -> str:
+    return hashlib.sha1(f'blob {len(content)}\0'.encode() + content).hexdigest()
+
+
+def raw_sha(file: GistFile) -> Optional[str]:
+    """Blob SHA-1 of a gist file read from its raw_url, if present"""
+    match = RAW_SHA.search(file.raw_url or '')
+    return match.group(1) if match is not None else None
+
+
+def exact_content(file: GistFile) -> Optional[bytes]:
+    """Bytes of a gist file as given by the API, or None when only its raw file is sure to hold them:
+    when the content is missing or truncated, or does not hash to its raw_url, as for non UTF-8 files"""
+    if file.truncated or file.content is None:
+        return None
+    content = file.content.encode()
+    sha = raw_sha(file)
+    return content if sha is None or content_sha(content) == sha else None
+
+
+def load_state(directory: os.PathLike) -> Dict[str, Any]:
+    try:
+        with open(Path(directory) / STATE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(directory: os.PathLike, gist_id: str, files: Dict[str, LocalFile]) -> None:
+    with atomic_open(Path(directory) / STATE_FILE) as f:
+        json.dump({
+            'gist_id': gist_id,
+            'files': {name: [file.size, file.mtime_ns, file.sha] for name, file in files.items()},
+        }, f, indent=2, sort_keys=True)
+
+
+def scan_directory(directory: os.PathLike, state: Optional[Dict[str, Any]] = None) -> Dict[str, LocalFile]:
+    """Regular files of directory, hidden ones included, except the state file. Files whose size and
+    modification time match the state of the previous sync keep their recorded hash instead of being
+    hashed again."""
+    cached = (state or {}).get('files', {})
+    files = {}
+    for entry in os.scandir(os.fspath(directory)):
+        if entry.name == STATE_FILE or not entry.is_file():
+            continue
+        stat = entry.stat()
+        previous = cached.get(entry.name)
+        if previous is not None and previous[:2] == [stat.st_size, stat.st_mtime_ns]:
+            sha = previous[2]
+        else:
+            sha = blob_sha(entry.path, stat.st_size)
+        files[entry.name] = LocalFile(Path(entry.path), stat.st_size, stat.st_mtime_ns, sha)
+    return files
+
+
+def diff(
+    local: Dict[str, LocalFile], remote: Iterable[GistFile], remote_sha: Callable[[GistFile], str]
+) -> UploadsType:
+    """Files to send in a PATCH so the gist matches local, mapped as in upload_edit_files.
+
+    Files of the same name and size are compared by hash; remote_sha is only called when the sizes
+    match. Files gone from the gist and new local files with the same content are sent as renames,
+    without their content.
+    """
+    remote_files = {file.filename: file for file in remote}
+    changes: UploadsType = {}
+
+    for name, local_file in local.items():
+        existing = remote_files.get(name)
+        if existing is None:
+            continue
+        if existing.size != local_file.size or remote_sha(existing) != local_file.sha:
+            changes[name] = UploadFile(local_file.path)
+
+    added = {name: local_file for name, local_file in local.items() if name not in remote_files}
+    removed = [gone for name, gone in remote_files.items() if name not in local]
+    by_content = {(local_file.size, local_file.sha): name for name, local_file in added.items()}
+    for gone in removed:
+        new_name = None
+        if any(size == gone.size for size, _ in by_content):
+            new_name = by_content.pop((gone.size, remote_sha(gone)), None)
+        if new_name is not None:
+            changes[gone.filename] = UploadFile(None, new_name)
+            del added[new_name]
+        else:
+            changes[gone.filename] = None
+
+    for name, local_file in added.items():
+        changes[name] = UploadFile(local_file.path)
+    return changes
@@ -0,0 +1,134 @@
+"""
+Gist lookups batched into GitHub GraphQL queries, mapped onto the shape of REST responses
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+GRAPHQL_PATH = 'graphql'
+# Gists looked up by one query, each under its own alias
+MAX_BATCH = 50
+# Like REST responses, list up to 300 files per gist
+MAX_FILES = 300
+RAW_BASE_URL = 'https://gist.githubusercontent.com/'
+
+OWNER_FIELDS = '__typename login id avatarUrl url'
+GIST_FIELDS = 'id name description isPublic createdAt updatedAt url comments { totalCount }'
+FILE_FIELDS = 'name encodedName size language { name }'
+CONTENT_FIELDS = 'text isTruncated'
+
+
+class GraphQLError(Exception):
+    """An error reported by a GraphQL response, such as a gist that was NOT_FOUND"""
+
+    def __init__(self, message: str, type: Optional[str] = None) -> None:
+        super().__init__(message)
+        self.type = type
+
+    @classmethod
+    def from_response(cls, error: Dict[str, Any]) -> 'GraphQLError':
+        return cls(error.get('message', 'GraphQL query failed'), error.get('type'))
+
+
+def gist_fragment(content: bool) -> str:
+    """Fields of a gist, with the text of its files only when content is needed"""
+    files = f'{FILE_FIELDS} {CONTENT_FIELDS}' if content else FILE_FIELDS
+    return (
+        f'fragment gist on Gist {{ {GIST_FIELDS} owner {{ {OWNER_FIELDS} }} '
+        f'files(limit: {MAX_FILES}) {{ {files} }} }}'
+    )
+
+
+def alias(index: int) -> str:
+    return f'g{index}'
+
+
+def gists_query(count: int, content: bool) -> str:
+    """Query looking up count gists of a user by name, each under the alias of its index"""
+    variables = ''.join(f', ${alias(i)}: String!' for i in range(count))
+    lookups = ' '.join(f'{alias(i)}: gist(name: ${alias(i)}) {{ ...gist }}' for i in range(count))
+    return (
+        f'query($login: String!{variables}) {{ user(login: $login) {{ {lookups} }} }} '
+        f'{gist_fragment(content)}'
+    )
+
+
+def list_query(content: bool = False) -> str:
+    """Query for a page of a user's public gists, most recently updated first"""
+    return (
+        'query($login: String!, $first: Int!, $after: String) { user(login: $login) { '
+        'gists(first: $first, after: $after, privacy: PUBLIC, orderBy: {field: UPDATED_AT, direction: DESC}) '
+        '{ pageInfo { hasNextPage endCursor } nodes { ...gist } } } } '
+        f'{gist_fragment(content)}'
+    )
+
+
+def user_data(body: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, GraphQLError]]:
+    """The user of a response, with the errors of its fields by alias.
+
+    Raises GraphQLError when the query failed as a whole, such as for an unknown user.
+    """
+    errors = body.get('errors') or []
+    by_field = {}
+    for error in errors:
+        path = error.get('path') or ['']
+        by_field[str(path[1] if len(path) >= 2 else path[0])] = GraphQLError.from_response(error)
+
+    user = (body.get('data') or {}).get('user')
+    if user is None:
+        raise by_field.get('user') or GraphQLError.from_response(errors[0] if errors else {})
+    return user, by_field
+
+
+def to_rest(node: Dict[str, Any], api_url: str, raw_url: str = RAW_BASE_URL) -> Dict[str, Any]:
+    """The gist of a GraphQL node as the GitHub REST API would have returned it.
+
+    GraphQL does not expose the revision files were read at, so their raw_url, under the raw_url
+    base, points to the latest revision and lacks the git blob hash of REST raw URLs. Without the
+    text of the files, neither their content nor truncated are set.
+    """
+    gist_id = node['name']
+    owner = node['owner']
+    login = owner['login']
+    files = {}
+    for file in node.get('files') or ():
+        files[file['name']] = {
+            'filename': file['name'],
+            'type': None,
+            'language': (file.get('language') or {}).get('name'),
+            'raw_url': f'{raw_url}{login}/{gist_id}/raw/{file["encodedName"]}',
+            'size': file['size'],
+            'truncated': file.get('isTruncated'),
+            'content': file.get('text'),
+        }
+
+    api_gist_url = f'{api_url}gists/{gist_id}'
+    return {
+        'url': api_gist_url,
+        'forks_url': f'{api_gist_url}/forks',
+        'commits_url': f'{api_gist_url}/commits',
+        'id': gist_id,
+        'node_id': node['id'],
+        'git_pull_url': f'{node["url"]}.git',
+        'git_push_url': f'{node["url"]}.git',
+        'html_url': node['url'],
+        'files': files,
+        'public': node['isPublic'],
+        'created_at': node['createdAt'],
+        'updated_at': node['updatedAt'],
+        'description': node['description'],
+        'comments': (node.get('comments') or {}).get('totalCount'),
+        'user': None,
+        'comments_url': f'{api_gist_url}/comments',
+        'owner': {
+            'login': login,
+            'node_id': owner['id'],
+            'avatar_url': owner['avatarUrl'],
+            'url': f'{api_url}users/{login}',
+            'html_url': owner['url'],
+            'type': owner['__typename'],
+        },
+        'truncated': False,
+    }
+
+
+def batches(items: List[str], size: int = MAX_BATCH) -> List[List[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
@@ -1,34 +1,122 @@
-"""Subcommand handlers"""
-from pygists import Pygists
+"""Subcommand handlers.
 
+Modules only needed by some subcommands are imported by their handler to keep startup fast.
+"""
+from typing import TYPE_CHECKING
+import itertools
+import sys
 
-def get(pygists: Pygists, args):
-    gist = pygists.get_gist(gist_id=args.id)
-    gist.describe(as_json=args.json, show_content=args.show_content)
+from pygists.render import GistWriter
 
+if TYPE_CHECKING:
+    from pygists.pygists import Pygists
 
-def ls(pygists: Pygists, args):
-    gists = pygists.list_user_gists(since=args.since)
 
-    for gist in gists:
-        gist.describe(as_json=args.json, show_content=args.show_content)
+def read_ids(args):
+    """Gather gist IDs given as arguments and, optionally, one per line from --from-file"""
+    ids = list(args.id)
+    if args.from_file is not None:
+        with args.from_file as f:
+            ids.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    return ids
 
 
-def create(pygists: Pygists, args):
+def progress(action):
+    """Report the progress and throughput of a batch on stderr when it is a terminal"""
+    def report(done, total, elapsed):
+        if total < 2 or not sys.stderr.isatty():
+            return
+        rate = done / elapsed if elapsed > 0 else 0.0
+        end = '\n' if done == total else ''
+        print(f'\r{action} {done}/{total} gists ({rate:.1f}/s)', end=end, file=sys.stderr, flush=True)
+    return report
+
+
+def report_failures(action, results):
+    """Print failed results to stderr, returning the exit code of the batch"""
+    failed = [result for result in results if result.error is not None]
+    for result in failed:
+        print(f'Failed to {action} gist {result.id or ""}: {result.error}', file=sys.stderr)
+    return 1 if failed else 0
+
+
+def writer(args, default='text'):
+    """Render gists to stdout in the output format requested by the arguments, else in default"""
+    fmt = 'ndjson' if args.ndjson else 'json' if args.json else default
+    return GistWriter(sys.stdout, fmt=fmt, show_content=args.show_content)
+
+
+def resolve_content(pygists: 'Pygists', gist):
+    """Fetch the full content of files the API truncated"""
+    gist.files = [
+        file._replace(content=pygists.read_file(file), truncated=False) if file.truncated else file
+        for file in gist.files
+    ]
+    return gist
+
+
+def get(pygists: 'Pygists', args):
+    ids = read_ids(args)
+    if not ids:
+        sys.exit('No gist IDs given to get')
+
+    results = pygists.get_gists(ids, progress=progress('Got'), content=args.show_content)
+    with writer(args) as out:
+        for result in results:
+            if result.error is None:
+                out.write(resolve_content(pygists, result.gist) if args.show_content else result.gist)
+
+    return report_failures('get', results)
+
+
+def ls(pygists: 'Pygists', args):
+    with writer(args) as out:
+        out.write_all(pygists.iter_user_gists(since=args.since, stream=args.stream))
+
+
+def create(pygists: 'Pygists', args):
+    if args.batch is not None:
+        from pygists.payloads import read_manifest
+
+        results = pygists.create_gists(read_manifest(args.batch), progress=progress('Created'))
+        with writer(args) as out:
+            out.write_all(result.gist for result in results if result.error is None)
+        return report_failures('create', results)
+
+    if not args.file:
+        sys.exit('No files given to create a gist')
+
     gist = pygists.create_gist_from_files(
         *args.file, description=args.description, public=not args.private
     )
-    gist.describe(as_json=args.json, show_content=args.show_content)
+    with writer(args) as out:
+        out.write(gist)
+
+
+def delete(pygists: 'Pygists', args):
+    ids = read_ids(args)
+    if not ids:
+        sys.exit('No gist IDs given to delete')
 
+    results = pygists.delete_gists(ids, progress=progress('Deleted'))
+    for result in results:
+        if result.error is None:
+            print(f'Deleted gist: {result.id}')
 
-def delete(pygists: Pygists, args):
-    pygists.delete_gist(args.id)
-    print(f'Deleted gist: {args.id}')
+    return report_failures('delete', results)
 
 
-def update(pygists: Pygists, args):
+def update(pygists: 'Pygists', args):
+    if args.sync_dir is not None:
+        if args.add or args.delete or args.modify:
+            sys.exit('--sync-dir cannot be combined with --add, --delete or --modify')
+        gist = pygists.sync_gist_from_dir(args.id, args.sync_dir, description=args.description)
+        with writer(args) as out:
+            out.write(gist)
+        return
+
     to_modify = {}
-    for arg in args.to_modify:
+    for arg in args.modify:
         old_name, new_file = arg.split('=')
         to_modify[old_name] = new_file
 
@@ -36,4 +124,90 @@ def update(pygists: Pygists, args):
         gist_id=args.id, to_add=args.add, to_delete=args.delete,
         to_modify=to_modify, description=args.description
     )
-    gist.describe(as_json=args.json, show_content=args.show_content)
+    with writer(args) as out:
+        out.write(gist)
+
+
+def sync(pygists: 'Pygists', args):
+    from pygists.mirror import Mirror
+
+    results = Mirror(pygists, args.directory).sync()
+
+    for result in results:
+        if result.error is None:
+            print(f'Synced gist: {result.id}')
+
+    synced = sum(result.error is None for result in results)
+    print(f'Synced {synced} of {len(results)} updated gists into {args.directory}')
+    return report_failures('sync', results)
+
+
+def search(pygists: 'Pygists', args):
+    from pygists.index import GistIndex
+
+    with GistIndex(args.index) as index:
+        if not args.offline:
+            index.refresh(pygists, with_content=args.index_content, full=args.full_refresh)
+
+        with writer(args) as out:
+            out.write_all(index.search(
+                args.query, language=args.language, filename=args.filename, limit=args.limit
+            ))
+
+
+def clone(pygists: 'Pygists', args):
+    ids = read_ids(args)
+    if not ids:
+        sys.exit('No gist IDs given to clone')
+
+    results = pygists.clone_gists(
+        ids, args.directory, depth=args.depth or None, filter_spec=args.filter_spec,
+        progress=progress('Cloned'),
+    )
+    for result in results:
+        if result.error is None:
+            print(f'Cloned gist: {result.id}')
+
+    return report_failures('clone', results)
+
+
+def history(pygists: 'Pygists', args):
+    if args.archive is not None:
+        from pygists.revisions import RevisionStore
+
+        results = RevisionStore(args.archive).archive(pygists, args.id, progress=progress('Archived'))
+        for result in results:
+            if result.error is None:
+                print(f'Archived revision: {result.id}')
+            else:
+                print(f'Failed to archive revision {result.id}: {result.error}', file=sys.stderr)
+        archived = sum(result.error is None for result in results)
+        print(f'Archived {archived} new revisions of {args.id} into {args.archive}')
+        return 1 if any(result.error is not None for result in results) else 0
+
+    revisions = itertools.islice(pygists.iter_gist_history(args.id), args.limit)
+    with writer(args) as out:
+        if not args.show_content:
+            out.write_all(revisions)
+            return
+
+        # Revisions are only fetched as they are printed
+        for revision in revisions:
+            out.write(resolve_content(pygists, pygists.get_gist_revision(args.id, revision.version)))
+
+
+def watch(pygists: 'Pygists', args):
+    if args.text and (args.json or args.ndjson):
+        sys.exit('--text cannot be combined with --json or --ndjson')
+    if args.show_content:
+        sys.exit('watch cannot show content, which gist listings do not include')
+
+    events = pygists.watch(min_interval=args.interval, max_interval=args.max_interval, initial=args.initial)
+    with writer(args, default='text' if args.text else 'ndjson') as out:
+        try:
+            # Events are printed as soon as they are detected
+            for event in events:
+                out.write(event)
+                out.stream.flush()
+        except KeyboardInterrupt:
+            pass
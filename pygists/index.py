@@ -0,0 +1,248 @@
+"""
+Local SQLite index of gist metadata for offline search
+"""
+from collections import namedtuple
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+import datetime as dt
+import os
+import sqlite3
+import threading
+
+from pygists.models.gist import Gist
+from pygists.settings import DEFAULT_INDEX_PATH
+
+if TYPE_CHECKING:
+    from pygists.pygists import Pygists
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS gists (
+    id TEXT PRIMARY KEY,
+    owner TEXT,
+    description TEXT,
+    public INTEGER,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    gist_id TEXT REFERENCES gists(id) ON DELETE CASCADE,
+    filename TEXT,
+    language TEXT,
+    size INTEGER,
+    content TEXT,
+    PRIMARY KEY (gist_id, filename)
+);
+CREATE INDEX IF NOT EXISTS files_language ON files(language COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS gists_updated_at ON gists(updated_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+'''
+FTS_SCHEMA = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS gists_fts USING fts5(
+    gist_id UNINDEXED, description, filenames, content
+);
+'''
+
+IndexedFile = namedtuple('IndexedFile', ('filename', 'language', 'size', 'content'), defaults=(None,))
+
+
+class IndexedGist(namedtuple(
+    'IndexedGist', ('id', 'owner', 'description', 'public', 'created_at', 'updated_at', 'files')
+)):
+    """Gist metadata as stored in the index. Renders like a Gist."""
+    __slots__ = ()
+
+    def to_dict(self, show_content: bool = False) -> Dict[str, Any]:
+        msg: Dict[str, Any] = {
+            'gist_id': self.id,
+            'username': self.owner,
+            'description': self.description,
+            'created': self.created_at.replace('T', ' ').rstrip('Z'),
+            'updated': self.updated_at.replace('T', ' ').rstrip('Z'),
+            'files': {},
+        }
+        for file in self.files:
+            msg['files'][file.filename] = {'filename': file.filename, 'size': file.size}
+            if show_content is True and file.content is not None:
+                msg['files'][file.filename]['content'] = file.content
+        return msg
+
+    def to_text(self, show_content: bool = False) -> str:
+        lines = [
+            f"{self.owner}'s GitHub Gist: {self.id}",
+            f"'{self.description}'",
+            f"Updated: {self.updated_at.replace('T', ' ').rstrip('Z')}",
+            "File | Language | Size (chars)",
+        ]
+        for file in self.files:
+            lines.append(f'{file.filename} | {file.language} | {file.size}')
+            if show_content is True and file.content is not None:
+                lines.append(file.content)
+        return '\n'.join(lines) + '\n'
+
+
+def fts_query(query: str) -> str:
+    """Quote every term of a user query so it is matched as a prefix, ignoring FTS5 operators"""
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in query.split())
+
+
+class GistIndex:
+    """SQLite index of gist metadata and, optionally, file contents.
+
+    refresh() incrementally updates the index with the gists updated since the last refresh. Queries
+    are answered offline, with full-text search over descriptions, file names and indexed contents
+    when SQLite is built with FTS5, and substring matching otherwise. Thread safe.
+    """
+
+    def __init__(self, path: os.PathLike = DEFAULT_INDEX_PATH) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA foreign_keys = ON')
+        self._db.executescript(SCHEMA)
+        try:
+            self._db.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> 'GistIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM gists').fetchone()[0]
+
+    @property
+    def watermark(self) -> Optional[dt.datetime]:
+        """Latest updated_at of the indexed gists, from which the next refresh lists gists"""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+        return dt.datetime.strptime(row[0], TIMESTAMP_FORMAT) if row is not None else None
+
+    def add(self, gists: Iterable[Gist], contents: Optional[Dict[str, Dict[str, str]]] = None) -> int:
+        """Insert or replace gists, with the file contents mapped by gist ID and file name if given"""
+        contents = contents or {}
+        count = 0
+        with self._lock, self._db:
+            for gist in gists:
+                self._add(gist, contents.get(gist.id, {}))
+                count += 1
+        return count
+
+    def _add(self, gist: Gist, contents: Dict[str, str]) -> None:
+        updated_at = gist.updated_at.strftime(TIMESTAMP_FORMAT)
+        self._db.execute('DELETE FROM files WHERE gist_id = ?', (gist.id,))
+        self._db.execute(
+            'INSERT OR REPLACE INTO gists VALUES (?, ?, ?, ?, ?, ?)', (
+                gist.id, gist.owner.login, gist.description, gist.public,
+                gist.created_at.strftime(TIMESTAMP_FORMAT), updated_at,
+            )
+        )
+        self._db.executemany('INSERT INTO files VALUES (?, ?, ?, ?, ?)', [
+            (gist.id, f.filename, f.language, f.size, contents.get(f.filename, f.content))
+            for f in gist.files
+        ])
+        if self.fts:
+            self._db.execute('DELETE FROM gists_fts WHERE gist_id = ?', (gist.id,))
+            self._db.execute('INSERT INTO gists_fts VALUES (?, ?, ?, ?)', (
+                gist.id, gist.description, ' '.join(f.filename for f in gist.files),
+                '\n'.join(c for c in (contents.get(f.filename, f.content) for f in gist.files) if c),
+            ))
+        # Not an upsert, which needs SQLite 3.24
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('watermark', MAX(COALESCE("
+            "(SELECT value FROM meta WHERE key = 'watermark'), ''), ?))", (updated_at,)
+        )
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock, self._db:
+            for gist_id in ids:
+                self._db.execute('DELETE FROM gists WHERE id = ?', (gist_id,))
+                if self.fts:
+                    self._db.execute('DELETE FROM gists_fts WHERE gist_id = ?', (gist_id,))
+
+    def refresh(self, pygists: 'Pygists', with_content: bool = False, full: bool = False) -> int:
+        """Index the gists updated since the last refresh, returning how many were indexed.
+
+        with_content also fetches and indexes the content of every updated file. A full refresh
+        lists every gist and drops the gists deleted upstream, which incremental refreshes miss.
+        """
+        gists = list(pygists.iter_user_gists(since=None if full else self.watermark))
+        if full:
+            listed = {gist.id for gist in gists}
+            with self._lock:
+                indexed = {row[0] for row in self._db.execute('SELECT id FROM gists')}
+            self.remove(indexed - listed)
+
+        contents: Dict[str, Dict[str, str]] = {}
+        if with_content:
+            for result in pygists.get_gists([gist.id for gist in gists]):
+                if result.error is None:
+                    contents[result.id] = {f.filename: pygists.read_file(f) for f in result.gist.files}
+
+        return self.add(gists, contents)
+
+    def search(
+        self, query: Optional[str] = None, language: Optional[str] = None, filename: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[IndexedGist]:
+        """Indexed gists matching every given criteria, most recently updated first.
+
+        query is matched against descriptions, file names and indexed contents, language against
+        the language of any file (case insensitive) and filename as a substring of any file name.
+        """
+        where = []
+        params: List[Any] = []
+        if query:
+            if self.fts:
+                where.append('id IN (SELECT gist_id FROM gists_fts WHERE gists_fts MATCH ?)')
+                params.append(fts_query(query))
+            else:
+                for term in query.split():
+                    where.append(
+                        "(description LIKE ? OR id IN (SELECT gist_id FROM files "
+                        "WHERE filename LIKE ? OR content LIKE ?))"
+                    )
+                    params.extend([f'%{term}%'] * 3)
+        if language:
+            where.append('id IN (SELECT gist_id FROM files WHERE language = ? COLLATE NOCASE)')
+            params.append(language)
+        if filename:
+            where.append('id IN (SELECT gist_id FROM files WHERE filename LIKE ?)')
+            params.append(f'%{filename}%')
+
+        sql = 'SELECT id, owner, description, public, created_at, updated_at FROM gists'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY updated_at DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+            files: Dict[str, List[IndexedFile]] = {row[0]: [] for row in rows}
+            for chunk in range(0, len(rows), 500):
+                ids = [row[0] for row in rows[chunk:chunk + 500]]
+                for gist_id, *file in self._db.execute(
+                    'SELECT gist_id, filename, language, size, content FROM files '
+                    f'WHERE gist_id IN ({", ".join("?" * len(ids))}) ORDER BY rowid', ids
+                ):
+                    files[gist_id].append(IndexedFile(*file))
+
+        return [
+            IndexedGist(gist_id, owner, description, bool(public), created_at, updated_at, files[gist_id])
+            for gist_id, owner, description, public, created_at, updated_at in rows
+        ]
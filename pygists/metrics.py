@@ -0,0 +1,189 @@
+"""
+Request and parsing instrumentation with pluggable metrics sinks
+
+Pygists reports every observation to its sink as a metric name, a value and a few labels:
+
+- request_seconds: from sending a request until its response headers arrive, which covers opening
+  the connection, uploading the body and GitHub's processing time. Labeled by method and status.
+- download_seconds: reading the response body once its headers arrived. Labeled by method.
+- request_bytes and response_bytes: size of the request and response bodies. Labeled by method.
+- retries: one observation per retried request. Labeled by method and reason.
+- ratelimit_remaining: rate limit budget left after each response.
+- decode_seconds and parse_seconds: decoding JSON responses and building Gist models from them.
+"""
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+import bisect
+import logging
+import math
+import os
+import threading
+
+from pygists.atomic import atomic_open
+
+Labels = Tuple[Tuple[str, str], ...]
+
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+SIZE_BUCKETS = tuple(float(1 << n) for n in range(10, 25, 2)) + (math.inf,)
+GAUGES = frozenset(('ratelimit_remaining',))
+MAX_SAMPLES = 10000
+
+logger = logging.getLogger(__name__)
+
+
+def buckets_for(name: str) -> Tuple[float, ...]:
+    return SIZE_BUCKETS if name.endswith('_bytes') else TIME_BUCKETS
+
+
+class Histogram:
+    """Distribution of the values observed for a metric, keeping the latest MAX_SAMPLES for quantiles"""
+
+    def __init__(self, buckets: Tuple[float, ...] = TIME_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.last = 0.0
+        self.samples: Deque[float] = deque(maxlen=MAX_SAMPLES)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.last = value
+        self.samples.append(value)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+class BaseSink:
+    """Interface for receivers of metrics. Implementations must be thread safe."""
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        raise NotImplementedError
+
+
+class MultiSink(BaseSink):
+    """Forward every observation to each of sinks"""
+
+    def __init__(self, *sinks: BaseSink) -> None:
+        self.sinks = sinks
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        for sink in self.sinks:
+            sink.observe(name, value, labels)
+
+
+class LoggingSink(BaseSink):
+    """Log every observation to the pygists.metrics logger"""
+
+    def __init__(self, level: int = logging.DEBUG) -> None:
+        self.level = level
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        logger.log(self.level, '%s %s %g', name, _format_labels(_labels(labels)), value)
+
+
+class MemorySink(BaseSink):
+    """Aggregate observations into in-memory histograms, one per metric name and labels"""
+
+    def __init__(self) -> None:
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets_for(name))
+            histogram.observe(value)
+
+    def get(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self.histograms.get((name, _labels(labels)))
+
+    def total(self, name: str) -> float:
+        """Sum of the values observed for a metric across every label"""
+        return sum(h.sum for (metric, _), h in self.histograms.items() if metric == name)
+
+    def summary(self) -> str:
+        """Table of the count, total, mean and quantiles of every histogram"""
+        rows = [('metric', 'labels', 'count', 'total', 'mean', 'p50', 'p95', 'max')]
+        with self._lock:
+            for (name, labels), h in sorted(self.histograms.items()):
+                rows.append((
+                    name, _format_labels(labels) or '-', str(h.count), f'{h.sum:.6g}', f'{h.mean:.6g}',
+                    f'{h.quantile(0.5):.6g}', f'{h.quantile(0.95):.6g}', f'{h.max:.6g}',
+                ))
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return '\n'.join(
+            '  '.join(cell.ljust(width) if i < 2 else cell.rjust(width) for i, (cell, width) in
+                      enumerate(zip(row, widths))).rstrip()
+            for row in rows
+        ) + '\n'
+
+
+class PrometheusSink(MemorySink):
+    """Aggregate observations like MemorySink and export them in the Prometheus text format.
+
+    flush() writes the metrics to path, for instance for the textfile collector of node_exporter.
+    """
+
+    def __init__(self, path: Optional[os.PathLike] = None, namespace: str = 'pygists') -> None:
+        super().__init__()
+        self.path = path
+        self.namespace = namespace
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            names = sorted({name for name, _ in self.histograms})
+            for name in names:
+                metric = f'{self.namespace}_{name}'
+                series = sorted((labels, h) for (n, labels), h in self.histograms.items() if n == name)
+                if name in GAUGES:
+                    lines.append(f'# TYPE {metric} gauge')
+                    lines.extend(f'{metric}{_prometheus_labels(labels)} {h.last:g}' for labels, h in series)
+                    continue
+
+                lines.append(f'# TYPE {metric} histogram')
+                for labels, h in series:
+                    cumulative = 0
+                    for bound, count in zip(h.buckets, h.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == math.inf else f'{bound:g}'
+                        bucket_labels = _prometheus_labels(labels + (('le', le),))
+                        lines.append(f'{metric}_bucket{bucket_labels} {cumulative}')
+                    lines.append(f'{metric}_sum{_prometheus_labels(labels)} {h.sum:g}')
+                    lines.append(f'{metric}_count{_prometheus_labels(labels)} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+    def flush(self) -> None:
+        if self.path is not None:
+            with atomic_open(self.path) as f:
+                f.write(self.render())
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    return ','.join(f'{key}={value}' for key, value in labels)
+
+
+def _prometheus_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
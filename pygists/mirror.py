@@ -0,0 +1,107 @@
+"""
+Incremental local mirror of a user's gists
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import datetime as dt
+import json
+import os
+import threading
+
+from pygists.atomic import atomic_open
+from pygists.delta import exact_content
+from pygists.models.gist import Gist
+from pygists.models.result import BatchResult
+from pygists.pygists import Pygists
+
+MANIFEST = 'manifest.json'
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+class Mirror:
+    """Keep one directory per gist ID under directory, indexed by a manifest.
+
+    The manifest records the updated_at and file sizes of every mirrored gist, plus the watermark:
+    the latest updated_at seen by the last complete sync. Syncing only lists gists updated since the
+    watermark and only downloads those whose updated_at moved past the mirrored copy. Every file,
+    including the manifest, is written atomically and the manifest is saved after each gist, so an
+    interrupted sync resumes without downloading finished gists again.
+
+    Gists deleted upstream are not noticed by incremental syncs and are kept in the mirror.
+    """
+
+    def __init__(self, pygists: Pygists, directory: os.PathLike) -> None:
+        self.pygists = pygists
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self.manifest = self._load_manifest()
+
+    @property
+    def watermark(self) -> Optional[dt.datetime]:
+        watermark = self.manifest.get('watermark')
+        return dt.datetime.strptime(watermark, TIMESTAMP_FORMAT) if watermark is not None else None
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.directory / MANIFEST, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'watermark': None, 'gists': {}}
+
+    def _save_manifest(self) -> None:
+        with atomic_open(self.directory / MANIFEST) as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+
+    def stale(self) -> List[Gist]:
+        """Gists updated upstream since they were last mirrored"""
+        mirrored = self.manifest['gists']
+        return [
+            gist for gist in self.pygists.iter_user_gists(since=self.watermark)
+            if mirrored.get(gist.id, {}).get('updated_at') != gist.updated_at.strftime(TIMESTAMP_FORMAT)
+        ]
+
+    def sync(self, max_workers: Optional[int] = None) -> List[BatchResult]:
+        """Download every stale gist concurrently, returning a result per gist.
+
+        The watermark only moves forward when every gist was mirrored, so failures are retried by
+        the next sync.
+        """
+        listed = self.stale()
+        results = self.pygists.run_batch(self._fetch, [gist.id for gist in listed], max_workers)
+
+        if listed and all(result.error is None for result in results):
+            latest = max(gist.updated_at for gist in listed)
+            with self._lock:
+                if self.watermark is None or latest > self.watermark:
+                    self.manifest['watermark'] = latest.strftime(TIMESTAMP_FORMAT)
+                self._save_manifest()
+
+        return results
+
+    def _fetch(self, gist_id: str) -> Gist:
+        gist = self.pygists.get_gist(gist_id)
+        gist_dir = self.directory / gist.id
+
+        for file in gist.files:
+            content = exact_content(file)
+            if content is None:
+                self.pygists.download_file(file, gist_dir / file.filename)
+            else:
+                with atomic_open(gist_dir / file.filename, 'wb') as f:
+                    f.write(content)
+
+        # Hidden files are gist files too, and temporary files are only left by interrupted syncs
+        names = {file.filename for file in gist.files}
+        for path in gist_dir.iterdir():
+            if path.name not in names and path.is_file():
+                path.unlink()
+
+        with self._lock:
+            self.manifest['gists'][gist.id] = {
+                'description': gist.description,
+                'updated_at': gist.updated_at.strftime(TIMESTAMP_FORMAT),
+                'files': {file.filename: file.size for file in gist.files},
+            }
+            self._save_manifest()
+
+        return gist
@@ -3,33 +3,118 @@ Github gist model
 """
 from collections import namedtuple
 import datetime as dt
-from typing import List
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
 import json
+import sys
 
-GistFile = namedtuple(
-    'GistFiles', ('filename', 'type', 'language', 'raw_url', 'size', 'truncated', 'content'),
+MAX_INTERNED_OWNERS = 1024
+
+
+class GistFile(namedtuple(
+    'GistFile', ('filename', 'type', 'language', 'raw_url', 'size', 'truncated', 'content'),
     defaults=(None, None)
-)
-GistOwner = namedtuple(
+)):
+    __slots__ = ()
+
+    @classmethod
+    def from_response(cls, file: Dict[str, Any]) -> 'GistFile':
+        """Build from a file of a GitHub API response, ignoring unknown keys"""
+        return cls._make(map(file.get, cls._fields))
+
+
+class GistOwner(namedtuple(
     'GistOwner', (
         'login', 'id', 'node_id', 'avatar_url', 'gravatar_id', 'url', 'html_url', 'followers_url',
         'following_url', 'gists_url', 'starred_url', 'subscriptions_url', 'organizations_url',
         'repos_url', 'events_url', 'received_events_url', 'type', 'site_admin'
     )
-)
+)):
+    __slots__ = ()
+
+    _interned: Dict[Tuple, 'GistOwner'] = {}
+
+    @classmethod
+    def from_response(cls, owner: Dict[str, Any]) -> 'GistOwner':
+        """Build from the owner of a GitHub API response.
+
+        All the gists of a listing share the same owner, so identical owners are interned and share
+        a single instance.
+        """
+        fields = tuple(map(owner.get, cls._fields))
+        interned = cls._interned.get(fields)
+        if interned is None:
+            if len(cls._interned) >= MAX_INTERNED_OWNERS:
+                cls._interned.clear()
+            interned = cls._interned.setdefault(fields, cls._make(fields))
+        return interned
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[dt.datetime]:
+    """Parse GitHub's YYYY-MM-DDTHH:MM:SSZ timestamps into naive UTC datetimes"""
+    if value is None:
+        return None
+    return dt.datetime.fromisoformat(value[:-1] if value.endswith('Z') else value)
+
+
+def parse_files(files: Any) -> List[GistFile]:
+    if isinstance(files, dict):
+        files = files.values()
+    return [GistFile.from_response(file) for file in files]
+
+
+def parse_owner(owner: Any) -> Optional[GistOwner]:
+    return GistOwner.from_response(owner) if owner is not None else None
+
+
+class GistRevision(namedtuple(
+    'GistRevision', ('version', 'committed_at', 'url', 'user', 'additions', 'deletions', 'total')
+)):
+    """A commit of a gist's history, with the number of lines it added and deleted"""
+    __slots__ = ()
+
+    @classmethod
+    def from_response(cls, revision: Dict[str, Any]) -> 'GistRevision':
+        """Build from an entry of the history of a gist or of its commits endpoint"""
+        changes = revision.get('change_status') or {}
+        return cls(
+            revision.get('version'), parse_timestamp(revision.get('committed_at')), revision.get('url'),
+            parse_owner(revision.get('user')), changes.get('additions'), changes.get('deletions'),
+            changes.get('total'),
+        )
+
+    def to_dict(self, show_content: bool = False) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'committed': self.committed_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'username': self.user.login if self.user is not None else None,
+            'additions': self.additions,
+            'deletions': self.deletions,
+        }
+
+    def to_text(self, show_content: bool = False) -> str:
+        login = self.user.login if self.user is not None else '-'
+        return (
+            f"{self.version} | {self.committed_at.strftime('%Y-%m-%d %H:%M:%S')} | {login} | "
+            f"+{self.additions or 0} -{self.deletions or 0}"
+        )
+
+
+def parse_history(history: Any) -> Optional[List[GistRevision]]:
+    return [GistRevision.from_response(revision) for revision in history] if history is not None else None
 
 
 class Gist:
     __slots__ = [
         'url', 'forks_url', 'commits_url', 'id', 'node_id', 'git_pull_url', 'git_push_url',
         'html_url', 'files', 'public', 'created_at', 'updated_at', 'description',
-        'comments', 'user', 'comments_url', 'owner', 'truncated', 'script_url'
+        'comments', 'user', 'comments_url', 'owner', 'truncated', 'history', 'script_url'
     ]
-    _transformations = {
-        'created_at': lambda _: dt.datetime.strptime(_, '%Y-%m-%dT%H:%M:%SZ'),
-        'updated_at': lambda _: dt.datetime.strptime(_, '%Y-%m-%dT%H:%M:%SZ'),
-        'files': lambda files: [GistFile(**_) for _ in files],
-        'owner': lambda _: GistOwner(**_),
+    _transformations: Dict[str, Callable[[Any], Any]] = {
+        'created_at': parse_timestamp,
+        'updated_at': parse_timestamp,
+        'files': parse_files,
+        'owner': parse_owner,
+        'history': parse_history,
     }
 
     id: str
@@ -50,61 +135,77 @@ class Gist:
     comments_url: str
     owner: GistOwner
     truncated: str
+    # Only set on single gists and revisions, listings do not include the history
+    history: Optional[List[GistRevision]]
     script_url: str
 
     def __init__(self, **kwargs):
+        transformations = self._transformations
         for key, value in kwargs.items():
-            setattr(self, key, self._transformations.get(key, lambda _: _)(value))
+            transform = transformations.get(key)
+            setattr(self, key, transform(value) if transform is not None else value)
 
     @classmethod
     def from_response(cls, resp):
-        """To be called with json response from GitHub API. Adds script_url and flattens files."""
-        resp['script_url'] = 'https://gist.github.com/{user}/{gist_id}.js'.format(
-            user=resp['owner']['login'], gist_id=resp['id']
-        )
+        """To be called with json response from GitHub API. Adds script_url and flattens files.
 
-        files = []
-        for file in resp['files'].values():
-            files.append({k: v for k, v in file.items()})
+        Every field is set, to None when missing from the response, and unknown fields are ignored.
+        The response is left untouched so cached responses can be parsed again.
+        """
+        gist = cls.__new__(cls)
+        for key, transform in _FIELD_PARSERS:
+            value = resp.get(key)
+            setattr(gist, key, transform(value) if transform is not None else value)
 
-        resp['files'] = files
+        gist.script_url = f'https://gist.github.com/{resp["owner"]["login"]}/{resp["id"]}.js'
+        return gist
 
-        resp.pop('history', None)  # TODO: handle forks, history
-        resp.pop('forks', None)
+    def to_dict(self, show_content: bool = False) -> Dict[str, Any]:
+        """Summary of the gist as rendered by describe(as_json=True)"""
+        msg: Dict[str, Any] = {
+            'gist_id': self.id,
+            'username': self.owner.login,
+            'description': self.description,
+            'created': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'updated': self.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'embed_url': self.script_url,
+            'files': {},
+        }
+        for file in self.files:
+            msg['files'][file.filename] = {
+                'filename': file.filename,
+                'size': file.size,
+            }
+            if show_content is True and file.content is not None:
+                msg['files'][file.filename]['content'] = file.content
+        return msg
 
-        return cls(**resp)
+    def to_text(self, show_content: bool = False) -> str:
+        """Summary of the gist as rendered by describe()"""
+        lines = [
+            f"{self.owner.login}'s GitHub Gist: {self.id}",
+            f"'{self.description}'",
+            f"Created: {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Updated: {self.updated_at.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Embed: {self.script_url}",
+            "File | Size (chars)",
+        ]
+        for file in self.files:
+            lines.append(f'{file.filename} | {file.size}')
+            if show_content is True and file.content is not None:
+                lines.append(file.content)
+        return '\n'.join(lines) + '\n'
 
-    def describe(self, as_json: bool = False, show_content: bool = False):
+    def describe(self, as_json: bool = False, show_content: bool = False, stream: Optional[IO[str]] = None):
+        """Write a summary of the gist to stream, or stdout, in a single write"""
         if as_json is True:
-            msg = {
-                'gist_id': self.id,
-                'username': self.owner.login,
-                'created': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'updated': self.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'embed_url': self.script_url,
-            }
-            msg['files'] = {}
-            for file in self.files:
-                msg[file.filename] = {
-                    'filename': file.filename,
-                    'size': file.size,
-                }
-                if show_content is True and file.content is not None:
-                    msg[file.filename].update({'content': file.content})
-            print(json.dumps(msg))
-            print('\n')
+            msg = json.dumps(self.to_dict(show_content)) + '\n'
         else:
-            str_msg = (
-                f"{self.owner.login}'s GitHub Gist: {self.id}\n"
-                f"'{self.description}'\n"
-                f"Created: {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                f"Updated: {self.updated_at.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                f"Embed: {self.script_url}\n"
-                "File | Size (chars)"
-            )
-            print(str_msg)
-            for file in self.files:
-                print(f'{file.filename}', '|', f'{file.size}')
-                if show_content is True and file.content is not None:
-                    print(file.content)
-            print('\n')
+            msg = self.to_text(show_content)
+        (stream if stream is not None else sys.stdout).write(msg + '\n\n')
+
+
+# Precompiled (field, parser) pairs used by Gist.from_response to build gists without a lookup per key
+_FIELD_PARSERS = tuple(
+    (key, Gist._transformations.get(key)) for key in Gist.__slots__ if key != 'script_url'
+)
@@ -0,0 +1,7 @@
+"""
+Result of a single item in a batch operation
+"""
+from collections import namedtuple
+
+BatchResult = namedtuple('BatchResult', ('id', 'gist', 'error'), defaults=(None, None))
+BatchResult.__doc__ = 'Outcome of one item of a batch: either gist (if any) or error is set'
@@ -0,0 +1,145 @@
+"""Request payloads for the GitHub Gists API shared by the sync and async clients"""
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+import json
+import os
+
+PathType = Union[str, bytes, os.PathLike]
+FilesType = Dict[str, Optional[Union[Dict[str, str], str]]]
+
+CHUNK_SIZE = 64 * 1024
+# Beyond these limits the API truncates gists and can no longer serve the full content of files
+MAX_GIST_FILES = 300
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
+UploadFile = namedtuple('UploadFile', ('path', 'filename'), defaults=(None,))
+UploadFile.__doc__ = (
+    'A file on disk to upload, optionally renaming the gist file to filename. '
+    'Without a path, the gist file is renamed keeping its content.'
+)
+UploadsType = Dict[str, Optional[UploadFile]]
+
+GistSpec = namedtuple('GistSpec', ('files', 'description', 'public'), defaults=('', True))
+GistSpec.__doc__ = 'Files on disk, description and visibility of a gist to create'
+
+
+def create_params(names: Sequence[str], contents: Sequence[str], description: str, public: bool) -> Dict:
+    """Build the body of a gist creation request"""
+    if len(names) != len(contents):
+        raise ValueError('Length of names and contents differs.')
+
+    files = {name: {'content': content} for name, content in zip(names, contents)}
+    return {
+        'files': files,
+        'description': description,
+        'public': public
+    }
+
+
+def edit_params(files: Optional[FilesType] = None, new_description: Optional[str] = None) -> Dict:
+    """Build the body of a gist edit request"""
+    if files is None and new_description is None:
+        raise ValueError('No new description or files to edit gist')
+
+    params: Dict = {}
+    if files is not None:
+        params['files'] = files
+    if new_description is not None:
+        params['description'] = new_description
+
+    return params
+
+
+def check_upload(files: UploadsType) -> None:
+    """Fail fast, before sending any bytes, when files exceed the limits of a gist"""
+    if len(files) > MAX_GIST_FILES:
+        raise ValueError(f'A gist can hold at most {MAX_GIST_FILES} files, got {len(files)}.')
+
+    for name, upload in files.items():
+        if upload is None or upload.path is None:
+            continue
+        size = os.stat(upload.path).st_size
+        if size > MAX_FILE_SIZE:
+            raise ValueError(
+                f'{name} is {size} bytes, larger than the {MAX_FILE_SIZE} bytes allowed per gist file.'
+            )
+
+
+def upload_files(*args: PathType) -> UploadsType:
+    """Map files on disk to the gist files they are uploaded as"""
+    return {Path(str(file)).name: UploadFile(Path(str(file))) for file in args}
+
+
+def upload_edit_files(
+    to_add: Sequence[PathType], to_delete: Sequence[PathType], to_modify: Dict[str, PathType]
+) -> UploadsType:
+    """Map files on disk to the gist files they add, delete or modify"""
+    files: UploadsType = upload_files(*to_add)
+
+    for name in to_delete:
+        files[Path(str(name)).name] = None
+
+    for old_name, new_file in to_modify.items():
+        p = Path(str(new_file))
+        files[old_name] = UploadFile(p, p.name)
+
+    return files
+
+
+class StreamingPayload:
+    """JSON request body encoded incrementally while it is sent.
+
+    File contents are read from disk and escaped chunk_size characters at a time, so only one chunk
+    per file is held in memory. Iterating again re-reads the files, which lets retries resend the body.
+    """
+
+    def __init__(
+        self, files: UploadsType, fields: Optional[Dict[str, Any]] = None, chunk_size: int = CHUNK_SIZE
+    ) -> None:
+        check_upload(files)
+        self.files = files
+        self.fields = fields or {}
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield b'{"files": {'
+        for i, (name, upload) in enumerate(self.files.items()):
+            yield f'{", " if i else ""}{json.dumps(name)}: '.encode()
+            if upload is None:
+                yield b'null'
+                continue
+
+            if upload.path is None:
+                yield f'{{"filename": {json.dumps(upload.filename)}}}'.encode()
+                continue
+
+            yield b'{"content": "'
+            with open(upload.path, 'r', encoding='utf-8', newline='') as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), ''):
+                    yield json.dumps(chunk)[1:-1].encode()
+            yield b'"'
+            if upload.filename is not None:
+                yield f', "filename": {json.dumps(upload.filename)}'.encode()
+            yield b'}'
+        yield b'}'
+
+        for key, value in self.fields.items():
+            yield f', {json.dumps(key)}: {json.dumps(value)}'.encode()
+        yield b'}'
+
+
+def read_manifest(path: PathType) -> List[GistSpec]:
+    """Read gists to create from a JSON manifest: a list of objects holding the files to upload and,
+    optionally, the description and public flag. File paths are relative to the manifest."""
+    manifest = Path(str(path))
+    with open(manifest, 'r') as f:
+        entries = json.load(f)
+
+    return [
+        GistSpec(
+            [manifest.parent / file for file in entry['files']],
+            entry.get('description', ''), entry.get('public', True)
+        )
+        for entry in entries
+    ]
@@ -0,0 +1,64 @@
+"""
+Pool of GitHub credentials sharing the requests of one client
+"""
+from typing import Any, List, Optional, Sequence, Tuple
+import threading
+
+from pygists.ratelimit import RateLimiter
+
+# Budget assumed for credentials GitHub has not reported on yet: the hourly limit of a user token
+UNKNOWN_BUDGET = 5000
+
+CredentialsType = Sequence[Tuple[str, str]]
+
+
+class Credential:
+    """A GitHub account with its own session, created on first use, and rate limit budget"""
+
+    def __init__(self, username: str, token: str, rate_limiter: RateLimiter) -> None:
+        self.username = username
+        self.token = token
+        self.rate_limiter = rate_limiter
+        self.session: Optional[Any] = None
+        self.in_flight = 0
+
+    def budget(self) -> float:
+        """Requests left in the current rate limit window, less the requests being sent"""
+        remaining = self.rate_limiter.remaining
+        return (UNKNOWN_BUDGET if remaining is None else remaining) - self.in_flight
+
+
+class CredentialPool:
+    """The owner's credential plus extra accounts that reads are spread over.
+
+    Reads go to the credential with the most budget left, counting requests in flight so that
+    concurrent workers spread out before GitHub reports the budgets. Writes always go to the owner,
+    since gists belong to the account that creates them. Tokens of the same account share its
+    budget, so the pool only scales with distinct accounts.
+    """
+
+    def __init__(self, owner: Credential, others: Sequence[Credential] = ()) -> None:
+        self.owner = owner
+        self.credentials: List[Credential] = [owner, *others]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.credentials)
+
+    def acquire(self, read: bool) -> Credential:
+        with self._lock:
+            credential = max(self.credentials, key=Credential.budget) if read else self.owner
+            credential.in_flight += 1
+            return credential
+
+    def release(self, credential: Credential) -> None:
+        with self._lock:
+            credential.in_flight -= 1
+
+
+def limiter_like(rate_limiter: RateLimiter) -> RateLimiter:
+    """A fresh limiter with the same settings, clock and sleep as rate_limiter"""
+    return RateLimiter(
+        reserve=rate_limiter.reserve, backoff=rate_limiter.backoff, max_backoff=rate_limiter.max_backoff,
+        clock=rate_limiter.clock, sleep=rate_limiter.sleep,
+    )
@@ -1,141 +1,739 @@
-import datetime as dt
-from typing import List, Sequence, Union, Optional, Dict
-from urllib.parse import urljoin
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
+import datetime as dt
+import hashlib
+import logging
+import mmap
 import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import (
+    Any, Callable, Deque, Iterable, Iterator, List, Sequence, Union, Optional, Dict
+)
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qs, urlencode
 
 import requests
+from requests.adapters import HTTPAdapter
 
-from pygists.models.gist import Gist
+from pygists.atomic import atomic_open
+from pygists.cache import BaseCache, CacheEntry, MemoryCache, cache_key
+from pygists.clone import GIST_GIT_URL, clone, git_env
+from pygists.coalesce import CoalescingStats, SingleFlight
+from pygists.delta import blob_sha, content_sha, diff, load_state, raw_sha, save_state, scan_directory
+from pygists.graphql import (
+    GRAPHQL_PATH, RAW_BASE_URL, GraphQLError, alias, batches, gists_query, list_query, to_rest, user_data
+)
+from pygists.index import GistIndex, IndexedGist
+from pygists.metrics import BaseSink
+from pygists.models.gist import Gist, GistFile, GistRevision
+from pygists.models.result import BatchResult
+from pygists.pool import Credential, CredentialPool, CredentialsType, limiter_like
+from pygists.ratelimit import RateLimiter, RateLimitStats, is_rate_limited
+from pygists.settings import DEFAULT_MAX_POLL_INTERVAL, DEFAULT_POLL_INTERVAL, DEFAULT_WORKERS
+from pygists.streamjson import iter_array
+from pygists.watch import DEFAULT_BACKOFF, GistEvent, PollInterval, WatchState, diff_listing, utcnow
+from pygists.payloads import (
+    CHUNK_SIZE, FilesType, GistSpec, PathType, StreamingPayload, create_params, edit_params,
+    upload_edit_files, upload_files
+)
 
 
 BASE_ENDPOINT = 'https://api.github.com/'
+MAX_PER_PAGE = 100
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 5
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+RETRY_STATUSES = frozenset((500, 502, 503, 504))
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+TRANSPORTS = ('rest', 'graphql')
+
+ProgressCallback = Callable[[int, int, float], None]
+
+logger = logging.getLogger(__name__)
+
+
+def _page_urls(last_url: str, first_page: int = 2) -> List[str]:
+    """Build every page URL from first_page up to the page referenced by a rel="last" link"""
+    parts = urlsplit(last_url)
+    query = parse_qs(parts.query)
+    last_page = int(query['page'][0])
+
+    urls = []
+    for page in range(first_page, last_page + 1):
+        query['page'] = [str(page)]
+        urls.append(urlunsplit(parts._replace(query=urlencode(query, doseq=True))))
+    return urls
 
 
 class Pygists:
-    def __init__(self, username: str, token: str) -> None:
+    def __init__(
+        self, username: str, token: str, max_workers: int = DEFAULT_WORKERS, base_url: str = BASE_ENDPOINT,
+        cache: Optional[BaseCache] = None, rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = DEFAULT_RETRIES, raw_dir: Optional[PathType] = None,
+        index: Optional[GistIndex] = None, metrics: Optional[BaseSink] = None,
+        git_base_url: str = GIST_GIT_URL, token_pool: Optional[CredentialsType] = None,
+        transport: str = 'rest', coalesce_window: Optional[float] = 0.0, raw_base_url: Optional[str] = None
+    ) -> None:
+        if transport not in TRANSPORTS:
+            raise ValueError(f'Unknown transport {transport!r}, expected one of {", ".join(TRANSPORTS)}')
         self.username = username
         self.token = token
-        self._session = None
+        self.max_workers = max_workers
+        self.base_url = base_url
+        self.cache = cache
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.max_retries = max_retries
+        self.raw_dir = Path(str(raw_dir)) if raw_dir is not None else None
+        self.index = index
+        self.metrics = metrics
+        self.git_base_url = git_base_url
+        # Reads are spread over the (username, token) pairs of token_pool, each with its own budget
+        self.credentials = CredentialPool(
+            Credential(username, token, self.rate_limiter),
+            [Credential(user, secret, limiter_like(self.rate_limiter)) for user, secret in token_pool or ()],
+        )
+        # Lists and batches of gists are fetched over GraphQL, whose rate limit is a budget of its own.
+        # Its responses carry no raw URLs, which are built under raw_base_url: the one of github.com
+        # for its API, and else the root of base_url, as served by test servers
+        self.transport = transport
+        if raw_base_url is None:
+            raw_base_url = RAW_BASE_URL if base_url == BASE_ENDPOINT else urljoin(base_url, '/')
+        self.raw_base_url = raw_base_url
+        self._graphql_credential = Credential(username, token, limiter_like(self.rate_limiter))
+        # Concurrent identical reads share one request, and its result for coalesce_window seconds
+        # after it completes. None disables coalescing
+        self.flights = SingleFlight(coalesce_window) if coalesce_window is not None else None
+        self._raw_tmp: Optional[tempfile.TemporaryDirectory] = None
+        self._session_lock = threading.Lock()
 
     @property
     def session(self):
         """Set session authorization parameters"""
-        if self._session is None:
-            self._session = requests.Session()
-            self._session.auth = (self.username, self.token)
-            self._session.headers.update({
-                'Accept': 'application/vnd.github.v3+json',
-                'User-Agent': self.username,
-            })
-        return self._session
+        return self._session_for(self.credentials.owner)
+
+    def _session_for(self, credential: Credential) -> requests.Session:
+        with self._session_lock:
+            if credential.session is None:
+                credential.session = self._create_session(credential.username, credential.token)
+        return credential.session
+
+    def _create_session(self, username: str, token: str) -> requests.Session:
+        session = requests.Session()
+        session.auth = (username, token)
+        session.headers.update({
+            'Accept': 'application/vnd.github.v3+json',
+            'User-Agent': username,
+        })
+
+        # Keep one pooled connection per worker so concurrent requests reuse their sockets
+        pool_size = max(self.max_workers, DEFAULT_POOL_SIZE)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @property
+    def rate_limit(self) -> RateLimitStats:
+        """Current rate limit budget and request throughput of the owner's token"""
+        return self.rate_limiter.stats
+
+    @property
+    def rate_limits(self) -> Dict[str, RateLimitStats]:
+        """Current rate limit budget and request throughput of every token, by username"""
+        return {
+            credential.username: credential.rate_limiter.stats for credential in self.credentials.credentials
+        }
+
+    @property
+    def coalescing(self) -> Optional[CoalescingStats]:
+        """Reads made and reads answered by another read in flight or within the coalescing window"""
+        return self.flights.stats if self.flights is not None else None
+
+    def _coalesce(self, key: Any, func: Callable[[], Any]) -> Any:
+        return self.flights.do(key, func) if self.flights is not None else func()
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send every request to GitHub through the rate limiter of the credential it is routed to.
+
+        Reads are routed to the token with the most budget left and writes to the owner's token.
+        Requests rejected by the rate limits are retried once the limiter allows it. Idempotent
+        requests are also retried on server errors and connection failures, with jittered exponential
+        backoff. Raises requests.HTTPError for error responses once retries are exhausted.
+        """
+        read = method in READ_METHODS
+        credential = self.credentials.acquire(read=read)
+        try:
+            r = self._send(credential, method, url, **kwargs)
+        finally:
+            self.credentials.release(credential)
+            if not read and self.flights is not None:
+                # Reads shared from before a write would not reflect it
+                self.flights.clear()
+
+        r.raise_for_status()
+        return r
+
+    def _send(
+        self, credential: Credential, method: str, url: str, idempotent: Optional[bool] = None, **kwargs: Any
+    ) -> requests.Response:
+        send = getattr(self._session_for(credential), method.lower())
+        limiter = credential.rate_limiter
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        for attempt in range(self.max_retries + 1):
+            limiter.wait()
+            start = time.perf_counter()
+            try:
+                r = send(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if not idempotent or attempt == self.max_retries:
+                    raise
+                self._observe('retries', 1, method=method, reason='connection')
+                limiter.sleep(limiter.retry_delay(None, attempt))
+                continue
+
+            limiter.update(r)
+            if self.metrics is not None:
+                seconds = time.perf_counter() - start
+                self._observe_response(r, seconds, credential, kwargs.get('stream', False))
+            retry = is_rate_limited(r) or (idempotent and r.status_code in RETRY_STATUSES)
+            if not retry or attempt == self.max_retries:
+                break
+            self._observe('retries', 1, method=method, reason=str(r.status_code))
+            limiter.sleep(limiter.retry_delay(r, attempt))
+        return r
+
+    def _graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a GraphQL query with the owner's token, retrying like an idempotent request"""
+        endpoint = urljoin(self.base_url, GRAPHQL_PATH)
+        r = self._send(
+            self._graphql_credential, 'POST', endpoint, idempotent=True,
+            json={'query': query, 'variables': variables},
+        )
+        r.raise_for_status()
+        return self._json(r)
+
+    def _observe(self, name: str, value: float, **labels: str) -> None:
+        if self.metrics is not None:
+            self.metrics.observe(name, value, labels)
+
+    def _observe_response(
+        self, r: requests.Response, seconds: float, credential: Credential, streamed: bool = False
+    ) -> None:
+        """Split the time of a request between waiting for the response headers and reading the body.
+
+        Streamed bodies are read by the caller, so their download time is not recorded.
+        """
+        method = r.request.method or ''
+        headers_seconds = r.elapsed.total_seconds()
+        self._observe('request_seconds', headers_seconds, method=method, status=str(r.status_code))
+        self._observe('download_seconds', max(seconds - headers_seconds, 0.0), method=method)
+        if r.request.headers.get('Content-Length') is not None:
+            self._observe('request_bytes', int(r.request.headers['Content-Length']), method=method)
+        if not streamed:
+            self._observe('response_bytes', len(r.content or b''), method=method)
+        if credential.rate_limiter.remaining is not None:
+            # Budgets are only told apart when requests are spread over several tokens
+            labels = {'username': credential.username} if len(self.credentials) > 1 else {}
+            self._observe('ratelimit_remaining', credential.rate_limiter.remaining, **labels)
+
+    def _json(self, r: requests.Response) -> Any:
+        if self.metrics is None:
+            return r.json()
+        start = time.perf_counter()
+        body = r.json()
+        self._observe('decode_seconds', time.perf_counter() - start)
+        return body
+
+    def _parse(self, body: Dict[str, Any]) -> Gist:
+        return self._parse_page([body])[0]
+
+    def _parse_page(self, bodies: List[Dict[str, Any]]) -> List[Gist]:
+        if self.metrics is None:
+            return [Gist.from_response(body) for body in bodies]
+        start = time.perf_counter()
+        gists = [Gist.from_response(body) for body in bodies]
+        self._observe('parse_seconds', time.perf_counter() - start)
+        return gists
 
     def create_gist_from_files(
-        self, *args: Union[str, bytes, os.PathLike], description: str = '', public: bool = True
+        self, *args: PathType, description: str = '', public: bool = True
     ) -> Gist:
-        names = []
-        contents = []
-        for file in args:
-            p = Path(str(file))
-            with open(p, 'r') as f:
-                names.append(p.name)
-                contents.append(f.read())
+        """Create gist streaming the content of files from disk"""
+        payload = StreamingPayload(upload_files(*args), {'description': description, 'public': public})
+        endpoint = urljoin(self.base_url, 'gists')
 
-        return self.create_gist(names, contents, description, public)
+        r = self._request('POST', endpoint, data=payload, headers={'Content-Type': 'application/json'})
+
+        return self._parse(self._json(r))
 
     def create_gist(
             self, names: Sequence[str], contents: Sequence[str], description: str, public: bool
     ) -> Gist:
         """Create gist with the GitHub API"""
+        params = create_params(names, contents, description, public)
+        endpoint = urljoin(self.base_url, 'gists')
 
-        if len(names) != len(contents):
-            raise ValueError('Length of names and contents differs.')
-
-        endpoint = urljoin(BASE_ENDPOINT, 'gists')
-        files = {name: {'content': content} for name, content in zip(names, contents)}
-        params = {
-            'files': files,
-            'description': description,
-            'public': public
-        }
-
-        r = self.session.post(endpoint, json=params)
-        r.raise_for_status()
+        r = self._request('POST', endpoint, json=params)
 
-        return Gist.from_response(r.json())
+        return self._parse(self._json(r))
 
     def edit_gist_from_files(
-        self, to_add: Sequence[Union[str, bytes, os.PathLike]],
-        to_delete: Sequence[Union[str, bytes, os.PathLike]],
-        to_modify: Dict[str, Union[str, bytes, os.PathLike]],
+        self, to_add: Sequence[PathType], to_delete: Sequence[PathType], to_modify: Dict[str, PathType],
         gist_id: str, description: Optional[str] = None,
     ) -> Gist:
-        files: Dict[str, Optional[Union[Dict[str, str], str]]] = {}
-
-        for file in to_add:
-            p = Path(str(file))
-            with open(p, 'r') as f:
-                files[p.name] = {'content': f.read()}
+        """Edit gist streaming the content of added and modified files from disk"""
+        files = upload_edit_files(to_add, to_delete, to_modify)
+        if not files and description is None:
+            raise ValueError('No new description or files to edit gist')
 
-        for name in to_delete:
-            files[p.name] = None
+        payload = StreamingPayload(files, {'description': description} if description is not None else None)
+        endpoint = urljoin(self.base_url, f'gists/{gist_id}')
 
-        for old_name, new_file in to_modify.items():
-            p = Path(str(file))
-            with open(p, 'r') as f:
-                files[old_name] = {'content': f.read(), 'filename': p.name}
+        r = self._request('PATCH', endpoint, data=payload, headers={'Content-Type': 'application/json'})
 
-        return self.edit_gist(
-            gist_id=gist_id,
-            files=files if files else None,
-            new_description=description if description is not None else None
-        )
+        return self._parse(self._json(r))
 
     def edit_gist(
-        self, gist_id: str, files: Optional[Dict[str, Optional[Union[Dict[str, str], str]]]] = None,
-        new_description: Optional[str] = None
+        self, gist_id: str, files: Optional[FilesType] = None, new_description: Optional[str] = None
     ) -> Gist:
         """Edit a single gist"""
-        endpoint = urljoin(BASE_ENDPOINT, f'gists/{gist_id}')
-        if files is None and new_description is None:
-            raise ValueError('No new description or files to edit gist')
+        params = edit_params(files, new_description)
+        endpoint = urljoin(self.base_url, f'gists/{gist_id}')
 
-        params = {}
-        if files is not None:
-            params['files'] = files  # type: ignore
-        if new_description is not None:
-            params['description'] = new_description  # type: ignore
+        r = self._request('PATCH', endpoint, json=params)
 
-        r = self.session.patch(endpoint, json=params)
-        r.raise_for_status()
+        return self._parse(self._json(r))
 
-        return Gist.from_response(r.json())
+    def sync_gist_from_dir(
+        self, gist_id: str, directory: PathType, description: Optional[str] = None
+    ) -> Gist:
+        """Make a gist hold exactly the files of directory, uploading only what changed.
 
-    def list_user_gists(self, since: Optional[dt.datetime] = None) -> List[Gist]:
-        """List all user's public gists"""
-        endpoint = urljoin(BASE_ENDPOINT, f'users/{self.username}/gists')
+        Files are compared by size and git blob hash, read from raw URLs so remote files are not
+        downloaded, and local hashes are cached between syncs. The edit only carries new and modified
+        files, deletions and renames; no edit is sent when nothing changed.
+        """
+        directory = Path(str(directory))
+        state = load_state(directory)
+        local = scan_directory(directory, state if state.get('gist_id') == gist_id else None)
 
-        r = self.session.get(
-            endpoint,
-            params={'since': since.isoformat()} if since is not None else None
-        )
-        return [Gist.from_response(gist) for gist in r.json()]
+        gist = self.get_gist(gist_id)
+        files = diff(local, gist.files, self._file_sha)
+        if files or (description is not None and description != gist.description):
+            fields = {'description': description} if description is not None else None
+            payload = StreamingPayload(files, fields)
+            endpoint = urljoin(self.base_url, f'gists/{gist_id}')
+            r = self._request('PATCH', endpoint, data=payload, headers={'Content-Type': 'application/json'})
+            gist = self._parse(self._json(r))
+
+        save_state(directory, gist_id, local)
+        return gist
+
+    def _file_sha(self, file: GistFile) -> str:
+        """Git blob hash of a gist file, downloading it only when its raw URL does not carry it"""
+        sha = raw_sha(file)
+        if sha is not None:
+            return sha
+        if not file.truncated and file.content is not None:
+            return content_sha(file.content.encode())
+        return blob_sha(self.download_file(file))
+
+    def list_user_gists(
+        self, since: Optional[dt.datetime] = None, per_page: int = MAX_PER_PAGE, stream: bool = False
+    ) -> List[Gist]:
+        """List all user's public gists, sharing the listing between concurrent identical calls"""
+        def list_gists() -> List[Gist]:
+            return list(self.iter_user_gists(since=since, per_page=per_page, stream=stream))
+
+        # Each caller gets a list of its own, the gists in it are shared
+        return list(self._coalesce(('list', since, per_page, stream), list_gists))
+
+    def iter_user_gists(
+        self, since: Optional[dt.datetime] = None, per_page: int = MAX_PER_PAGE,
+        max_workers: Optional[int] = None, stream: bool = False
+    ) -> Iterator[Gist]:
+        """Iterate over all user's public gists following the Link header pagination.
+
+        Gists are yielded in page order as soon as their page arrives. When the first response
+        reveals the rel="last" page, the remaining pages are prefetched over a pool of at most
+        max_workers threads, holding no more than max_workers pages in memory at a time.
+
+        With stream, pages are instead fetched one at a time and each gist is yielded as soon as its
+        element of the page has arrived, keeping no more than one gist's JSON in memory. Over the
+        graphql transport, pages are followed by cursor one at a time.
+        """
+        endpoint = urljoin(self.base_url, f'users/{self.username}/gists')
+        params: Dict[str, Union[str, int]] = {'per_page': per_page}
+        if since is not None:
+            params['since'] = since.isoformat()
+
+        if self.transport == 'graphql':
+            yield from self._graphql_pages(since, per_page)
+            return
+        if stream:
+            yield from self._stream_pages(endpoint, params)
+            return
+
+        page = self._get(endpoint, params=params)
+        yield from self._parse_page(page.body)
+
+        workers = max_workers if max_workers is not None else self.max_workers
+        last_url = page.links.get('last', {}).get('url')
+        if last_url is not None and workers > 1:
+            yield from self._prefetch_pages(_page_urls(last_url), workers)
+            return
+
+        # The next link already carries every query parameter
+        url = page.links.get('next', {}).get('url')
+        while url is not None:
+            page = self._get(url)
+            yield from self._parse_page(page.body)
+            url = page.links.get('next', {}).get('url')
+
+    def watch(
+        self, min_interval: float = DEFAULT_POLL_INTERVAL, max_interval: float = DEFAULT_MAX_POLL_INTERVAL,
+        backoff: float = DEFAULT_BACKOFF, initial: bool = False, polls: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep, clock: Callable[[], dt.datetime] = utcnow
+    ) -> Iterator[GistEvent]:
+        """Poll the user's gists, yielding an event for every change between successive listings.
+
+        Listings are revalidated with conditional requests, answered with a 304 that does not count
+        against the rate limit while nothing changed, so a client without a cache is given a
+        MemoryCache. The interval between polls grows by backoff with every poll without changes, up
+        to max_interval, and drops back to min_interval after any. With initial, the gists of the
+        first poll are reported as created. Polls failing on network or server errors are logged and
+        count as quiet. Stops after polls polls, if given. Over the GraphQL transport, edits keeping the
+        size of a file yield no file_changed event, only the updated event of the gist.
+        """
+        if self.cache is None:
+            self.cache = MemoryCache()
+
+        interval = PollInterval(min_interval, max_interval, backoff)
+        state: Optional[WatchState] = None
+        done = 0
+        while polls is None or done < polls:
+            if done:
+                sleep(interval.seconds)
+            done += 1
+            try:
+                gists = list(self.iter_user_gists())
+            except requests.RequestException as e:
+                response = getattr(e, 'response', None)
+                if response is not None and response.status_code < 500:
+                    raise
+                logger.warning('Polling the gists of %s failed: %s', self.username, e)
+                interval.update(False)
+                continue
+
+            current, events = diff_listing(state or {}, gists, clock())
+            if state is not None:
+                interval.update(bool(events))
+            elif not initial:
+                events = []
+            state = current
+            yield from events
+
+    def _graphql_pages(self, since: Optional[dt.datetime], per_page: int) -> Iterator[Gist]:
+        """Follow the cursors of the user's gists, stopping at the first one updated before since"""
+        if since is not None and since.tzinfo is not None:
+            since = since.astimezone(dt.timezone.utc).replace(tzinfo=None)
+
+        variables: Dict[str, Any] = {
+            'login': self.username, 'first': min(per_page, MAX_PER_PAGE), 'after': None
+        }
+        while True:
+            user, _ = user_data(self._graphql(list_query(), variables))
+            page = user['gists']
+            nodes = [to_rest(node, self.base_url, self.raw_base_url) for node in page['nodes']]
+            for gist in self._parse_page(nodes):
+                if since is not None and gist.updated_at < since:
+                    return
+                yield gist
+            if not page['pageInfo']['hasNextPage']:
+                return
+            variables['after'] = page['pageInfo']['endCursor']
+
+    def _stream_pages(self, url: str, params: Dict[str, Any]) -> Iterator[Gist]:
+        """Follow the next links from url, decoding the gists of every page while it is received.
+
+        Bodies are requested gzip compressed and decompressed chunk by chunk as they are read.
+        Decoded pages are never held whole, so they bypass the cache.
+        """
+        next_url: Optional[str] = url
+        while next_url is not None:
+            r = self._request(
+                'GET', next_url, params=params, stream=True, headers={'Accept-Encoding': 'gzip'}
+            )
+            with r:
+                for body in iter_array(r.iter_content(CHUNK_SIZE)):
+                    yield self._parse(body)
+            # The next link already carries every query parameter
+            next_url = r.links.get('next', {}).get('url')
+            params = {}
+
+    def _prefetch_pages(self, urls: Sequence[str], workers: int) -> Iterator[Gist]:
+        """Fetch pages concurrently over a sliding window of workers, yielding gists in page order"""
+        remaining = iter(urls)
+        pending: Deque[Future] = deque()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for url in remaining:
+                    pending.append(executor.submit(self._get, url))
+                    if len(pending) == workers:
+                        break
+
+                while pending:
+                    page = pending.popleft().result()
+                    next_url = next(remaining, None)
+                    if next_url is not None:
+                        pending.append(executor.submit(self._get, next_url))
+
+                    yield from self._parse_page(page.body)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> CacheEntry:
+        """GET a JSON document, revalidating any cached copy with a conditional request.
+
+        A 304 Not Modified answer does not count against the rate limit and is served from the cache.
+        """
+        key = cache_key(self.username, url, params) if self.cache is not None else None
+        cached = self.cache.get(key) if key is not None else None  # type: ignore
+
+        kwargs: Dict[str, Any] = {'params': params}
+        if cached is not None:
+            kwargs['headers'] = {}
+            if cached.etag is not None:
+                kwargs['headers']['If-None-Match'] = cached.etag
+            if cached.last_modified is not None:
+                kwargs['headers']['If-Modified-Since'] = cached.last_modified
+
+        r = self._request('GET', url, **kwargs)
+        if cached is not None and r.status_code == 304:
+            return cached
+
+        entry = CacheEntry(r.headers.get('ETag'), r.headers.get('Last-Modified'), self._json(r), r.links)
+        if key is not None and (entry.etag is not None or entry.last_modified is not None):
+            self.cache.set(key, entry)  # type: ignore
+        return entry
 
     def get_gist(self, gist_id: str) -> Gist:
-        """Get a user's gist"""
-        endpoint = urljoin(BASE_ENDPOINT, f'/gists/{gist_id}')
+        """Get a user's gist, sharing the request and the gist between concurrent identical calls"""
+        endpoint = urljoin(self.base_url, f'gists/{gist_id}')
 
-        r = self.session.get(
-            endpoint,
-        )
-        return Gist.from_response(r.json())
+        return self._coalesce(('gist', gist_id), lambda: self._parse(self._get(endpoint).body))
+
+    def get_gist_revision(self, gist_id: str, version: str) -> Gist:
+        """Get a gist as it was at a revision of its history"""
+        endpoint = urljoin(self.base_url, f'gists/{gist_id}/{version}')
+
+        return self._parse(self._get(endpoint).body)
+
+    def iter_gist_history(self, gist_id: str, per_page: int = MAX_PER_PAGE) -> Iterator[GistRevision]:
+        """Iterate over the revisions of a gist, newest first, fetching each page once it is reached"""
+        url: Optional[str] = urljoin(self.base_url, f'gists/{gist_id}/commits')
+        params: Optional[Dict[str, Any]] = {'per_page': per_page}
+        while url is not None:
+            page = self._get(url, params=params)
+            for revision in page.body:
+                yield GistRevision.from_response(revision)
+            # The next link already carries every query parameter
+            url, params = page.links.get('next', {}).get('url'), None
+
+    def get_gists(
+        self, ids: Iterable[str], max_workers: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None, content: bool = True
+    ) -> List[BatchResult]:
+        """Get many gists concurrently over the shared session.
 
-    def delete_gist(self, gist_id: str):
+        Results are returned in input order. A failure to get a gist is recorded in the error of its
+        result instead of aborting the rest of the batch. Over the graphql transport, gists are looked
+        up in batches of one query each, fetching the text of their files only with content.
+        """
+        if self.transport == 'graphql':
+            return self._graphql_gists(list(ids), max_workers, progress, content)
+        return self.run_batch(self.get_gist, ids, max_workers, progress)
+
+    def _graphql_gists(
+        self, ids: List[str], max_workers: Optional[int], progress: Optional[ProgressCallback], content: bool
+    ) -> List[BatchResult]:
+        def lookup(batch: List[str]) -> List[BatchResult]:
+            variables = {'login': self.username, **{alias(i): gist_id for i, gist_id in enumerate(batch)}}
+            try:
+                user, errors = user_data(self._graphql(gists_query(len(batch), content), variables))
+            except Exception as e:
+                return [BatchResult(gist_id, error=e) for gist_id in batch]
+
+            nodes = {alias(i): user.get(alias(i)) for i in range(len(batch))}
+            gists = iter(self._parse_page([
+                to_rest(node, self.base_url, self.raw_base_url) for node in nodes.values() if node
+            ]))
+            results = []
+            for (name, node), gist_id in zip(nodes.items(), batch):
+                if node is None:
+                    error = errors.get(name) or GraphQLError(f'Could not resolve to a Gist named {gist_id}')
+                    results.append(BatchResult(gist_id, error=error))
+                else:
+                    results.append(BatchResult(gist_id, gist=next(gists)))
+            return results
+
+        workers = max_workers if max_workers is not None else self.max_workers
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = [executor.submit(lookup, batch) for batch in batches(ids)]
+            if progress is not None:
+                started, done = time.monotonic(), 0
+                for future in as_completed(futures):
+                    done += len(future.result())
+                    progress(done, len(ids), time.monotonic() - started)
+            return [result for future in futures for result in future.result()]
+
+    def create_gists(
+        self, specs: Iterable[GistSpec], max_workers: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> List[BatchResult]:
+        """Create a gist from the files of every spec concurrently, see get_gists.
+
+        The result of each created gist holds its new ID, failed results have no ID.
+        """
+        def create(spec: GistSpec) -> Gist:
+            return self.create_gist_from_files(*spec.files, description=spec.description, public=spec.public)
+
+        return self.run_batch(create, specs, max_workers, progress, key=lambda spec: None)
+
+    def delete_gists(
+        self, ids: Iterable[str], max_workers: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> List[BatchResult]:
+        """Delete many gists concurrently, see get_gists"""
+        return self.run_batch(self.delete_gist, ids, max_workers, progress)
+
+    def clone_gist(
+        self, gist_id: str, path: Optional[PathType] = None, depth: Optional[int] = 1,
+        filter_spec: Optional[str] = None
+    ) -> Path:
+        """Clone a gist with git into path, by default a directory named after its ID in the current
+        directory. An existing clone is updated instead, unless it has local changes.
+
+        Unlike the API, git never truncates files and sends them compressed in a pack. Only the latest
+        revision is fetched unless depth is None, and filter_spec (e.g. blob:limit=1m) makes a partial
+        clone. Private gists are fetched with the client's credentials.
+        """
+        url = urljoin(self.git_base_url, f'{gist_id}.git')
+        target = Path(str(path)) if path is not None else Path(gist_id)
+        return clone(url, target, git_env(self.username, self.token), depth, filter_spec)
+
+    def clone_gists(
+        self, ids: Iterable[str], directory: PathType = '.', depth: Optional[int] = 1,
+        filter_spec: Optional[str] = None, max_workers: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> List[BatchResult]:
+        """Clone many gists concurrently into directory, one subdirectory per gist ID"""
+        def clone_one(gist_id: str) -> None:
+            self.clone_gist(gist_id, Path(str(directory)) / gist_id, depth, filter_spec)
+
+        return self.run_batch(clone_one, ids, max_workers, progress)
+
+    def run_batch(
+        self, func: Callable[[Any], Optional[Gist]], items: Iterable[Any], max_workers: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None, key: Callable[[Any], Optional[str]] = lambda item: item
+    ) -> List[BatchResult]:
+        """Call func on every item over a pool of max_workers threads sharing the session.
+
+        Returns a BatchResult per item, in input order, identified by key(item) or else by the ID of
+        the gist returned by func. Exceptions are recorded in the error of their result. progress is
+        called from the calling thread with the number of items done, the total and the elapsed
+        seconds every time an item completes.
+        """
+        def run(item: Any) -> BatchResult:
+            item_id = key(item)
+            try:
+                gist = func(item)
+            except Exception as e:
+                return BatchResult(item_id, error=e)
+            return BatchResult(item_id if item_id is not None else getattr(gist, 'id', None), gist=gist)
+
+        workers = max_workers if max_workers is not None else self.max_workers
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = [executor.submit(run, item) for item in items]
+            if progress is not None:
+                started = time.monotonic()
+                for done, _ in enumerate(as_completed(futures), 1):
+                    progress(done, len(futures), time.monotonic() - started)
+            return [future.result() for future in futures]
+
+    def search(
+        self, query: Optional[str] = None, language: Optional[str] = None, filename: Optional[str] = None,
+        limit: Optional[int] = None, refresh: bool = True
+    ) -> List[IndexedGist]:
+        """Search the user's gists in the local index, see GistIndex.search.
+
+        The index, created under the default cache directory unless one was given, is first refreshed
+        with the gists updated since the last search. Pass refresh=False to answer offline.
+        """
+        if self.index is None:
+            self.index = GistIndex()
+        if refresh:
+            self.index.refresh(self)
+        return self.index.search(query, language=language, filename=filename, limit=limit)
+
+    def read_file(self, file: GistFile) -> str:
+        """Full content of a gist file, fetching it from its raw_url only when the API truncated it"""
+        if not file.truncated and file.content is not None:
+            return file.content
+
+        with open(self.download_file(file), 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+
+    def map_file(self, file: GistFile) -> Union[mmap.mmap, bytes]:
+        """Full content of a gist file as a read-only memory map of its downloaded copy.
+
+        Empty files cannot be mapped, so their content is returned as empty bytes.
+        """
+        with open(self.download_file(file), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def download_file(self, file: GistFile, path: Optional[PathType] = None) -> Path:
+        """Stream the full content of a gist file from its raw_url to path.
+
+        Without a path, the file is kept in the raw file cache: raw_dir if set, otherwise a temporary
+        directory removed along with this instance. REST raw URLs point to a specific gist revision, so a
+        cached copy never goes stale and is only downloaded once. Raw URLs of the latest revision, as
+        in gists fetched over GraphQL, are downloaded every time.
+        """
+        cached = self._raw_path(file.raw_url)
+        if cached.exists() and raw_sha(file) is not None:
+            if path is None:
+                return cached
+            shutil.copyfile(cached, str(path))
+            return Path(str(path))
+
+        dest = Path(str(path)) if path is not None else cached
+        with atomic_open(dest, 'wb') as f:
+            r = self._request('GET', file.raw_url, stream=True)
+            for chunk in r.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+        return dest
+
+    def _raw_path(self, raw_url: str) -> Path:
+        if self.raw_dir is not None:
+            directory = self.raw_dir
+        else:
+            with self._session_lock:
+                if self._raw_tmp is None:
+                    self._raw_tmp = tempfile.TemporaryDirectory(prefix='pygists-')
+            directory = Path(self._raw_tmp.name)
+        return directory / hashlib.sha256(raw_url.encode()).hexdigest()
+
+    def delete_gist(self, gist_id: str) -> None:
         """Delete a user's gist"""
-        endpoint = urljoin(BASE_ENDPOINT, f'/gists/{gist_id}')
+        endpoint = urljoin(self.base_url, f'gists/{gist_id}')
 
-        r = self.session.delete(
-            endpoint,
-        )
-        if r.status_code > 204:
-            print(f'Delete operation failed: {r.json()}')
+        self._request('DELETE', endpoint)
@@ -0,0 +1,145 @@
+"""
+Rate limit tracking and request pacing for the GitHub API
+"""
+from collections import namedtuple
+from typing import Callable, Optional
+import random
+import threading
+import time
+
+import requests
+
+DEFAULT_RESERVE = 0.1
+DEFAULT_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+RateLimitStats = namedtuple(
+    'RateLimitStats', ('limit', 'remaining', 'reset', 'requests', 'retries', 'throttled', 'throughput')
+)
+RateLimitStats.__doc__ = (
+    'Latest known rate limit budget, requests and retries sent, seconds spent throttling '
+    'and requests per second since the first request'
+)
+
+
+class RateLimiter:
+    """Track the rate limit budget reported by GitHub and pace requests to stay within it.
+
+    Requests are sent as fast as they come while the remaining budget is above reserve (a fraction
+    of the limit). Below it, requests are spread evenly over the time left until the budget resets
+    so that the budget is never exhausted. Thread safe: a single limiter is shared by all workers.
+    """
+
+    def __init__(
+        self, reserve: float = DEFAULT_RESERVE, backoff: float = DEFAULT_BACKOFF,
+        max_backoff: float = MAX_BACKOFF, clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.reserve = reserve
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.sleep = sleep
+
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset: Optional[float] = None
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0.0
+        self._started: Optional[float] = None
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> RateLimitStats:
+        with self._lock:
+            elapsed = self.clock() - self._started if self._started is not None else 0.0
+            throughput = self.requests / elapsed if elapsed > 0 else 0.0
+            return RateLimitStats(
+                self.limit, self.remaining, self.reset, self.requests, self.retries, self.throttled,
+                throughput
+            )
+
+    def wait(self) -> None:
+        """Block until the next request may be sent"""
+        with self._lock:
+            now = self.clock()
+            if self._started is None:
+                self._started = now
+
+            start = max(now, self._blocked_until, self._next_slot)
+            self._next_slot = start + self._interval(start)
+            delay = start - now
+            self.requests += 1
+            if delay > 0:
+                self.throttled += delay
+
+        if delay > 0:
+            self.sleep(delay)
+
+    def _interval(self, now: float) -> float:
+        """Seconds to leave between requests given the remaining budget"""
+        if self.limit is None or self.remaining is None or self.reset is None:
+            return 0.0
+        if self.remaining > self.limit * self.reserve:
+            return 0.0
+        return max(self.reset - now, 0.0) / max(self.remaining, 1)
+
+    def update(self, response: requests.Response) -> None:
+        """Record the budget reported in the rate limit headers of a response"""
+        headers = response.headers
+        if 'X-RateLimit-Remaining' not in headers:
+            return
+
+        remaining = int(headers['X-RateLimit-Remaining'])
+        reset = float(headers['X-RateLimit-Reset']) if 'X-RateLimit-Reset' in headers else None
+        with self._lock:
+            # Responses to concurrent requests arrive in any order, but within a rate limit window the
+            # budget only goes down
+            if self.remaining is not None and reset is not None and reset == self.reset:
+                remaining = min(remaining, self.remaining)
+            self.remaining = remaining
+            if 'X-RateLimit-Limit' in headers:
+                self.limit = int(headers['X-RateLimit-Limit'])
+            if reset is not None:
+                self.reset = reset
+            if self.remaining == 0 and self.reset is not None:
+                self._blocked_until = max(self._blocked_until, self.reset)
+
+    def retry_delay(self, response: Optional[requests.Response], attempt: int) -> float:
+        """Seconds to wait before retrying a failed request. Also delays every other request when
+        GitHub asked us to slow down."""
+        delay = self._backoff(attempt)
+
+        if response is not None and 'Retry-After' in response.headers:
+            delay = float(response.headers['Retry-After'])
+        elif response is not None and response.headers.get('X-RateLimit-Remaining') == '0':
+            reset = float(response.headers.get('X-RateLimit-Reset', 0))
+            delay = max(reset - self.clock(), delay)
+
+        with self._lock:
+            self.retries += 1
+            if is_rate_limited(response):
+                self._blocked_until = max(self._blocked_until, self.clock() + delay)
+        return delay
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+def is_rate_limited(response: Optional[requests.Response]) -> bool:
+    """Whether GitHub rejected a request because of its primary or secondary rate limits"""
+    if response is None:
+        return False
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    return (
+        'Retry-After' in response.headers
+        or response.headers.get('X-RateLimit-Remaining') == '0'
+        or 'rate limit' in response.text.lower()
+    )
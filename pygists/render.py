@@ -0,0 +1,64 @@
+"""
+Buffered rendering of gists to a stream
+"""
+from typing import IO, Iterable, Optional
+import json
+import sys
+
+from pygists.models.gist import Gist
+
+FORMATS = ('text', 'json', 'ndjson')
+
+
+class GistWriter:
+    """Render gists to stream with a single write per gist.
+
+    Formats:
+        text: the human readable summary printed by Gist.describe.
+        json: a single JSON array holding every gist, closed by close().
+        ndjson: one JSON document per line, ready to be streamed into tools like jq.
+    """
+
+    def __init__(
+        self, stream: Optional[IO[str]] = None, fmt: str = 'text', show_content: bool = False
+    ) -> None:
+        if fmt not in FORMATS:
+            raise ValueError(f'Unknown output format: {fmt}. Expected one of: {", ".join(FORMATS)}')
+        self.stream = stream if stream is not None else sys.stdout
+        self.fmt = fmt
+        self.show_content = show_content
+        self.count = 0
+        self._closed = False
+
+    def __enter__(self) -> 'GistWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, gist: Gist) -> None:
+        if self.fmt == 'text':
+            msg = gist.to_text(self.show_content) + '\n\n'
+        elif self.fmt == 'ndjson':
+            msg = json.dumps(gist.to_dict(self.show_content)) + '\n'
+        else:
+            msg = ('[\n' if self.count == 0 else ',\n') + json.dumps(gist.to_dict(self.show_content))
+
+        self.stream.write(msg)
+        self.count += 1
+
+    def write_all(self, gists: Iterable[Gist]) -> int:
+        """Write gists as they are produced, returning how many were written"""
+        for gist in gists:
+            self.write(gist)
+        return self.count
+
+    def close(self) -> None:
+        """Terminate the JSON array, if any, and flush the stream"""
+        if self._closed:
+            return
+        self._closed = True
+
+        if self.fmt == 'json':
+            self.stream.write('[]\n' if self.count == 0 else '\n]\n')
+        self.stream.flush()
@@ -0,0 +1,102 @@
+"""
+Local archive of gist revisions storing every distinct file content once
+"""
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+import json
+import os
+
+from pygists.atomic import atomic_open
+from pygists.delta import content_sha, exact_content, raw_sha
+from pygists.models.gist import Gist, GistRevision
+from pygists.models.result import BatchResult
+
+if TYPE_CHECKING:
+    from pygists.pygists import ProgressCallback, Pygists
+
+
+class RevisionStore:
+    """Archive the revisions of gists under directory.
+
+    File contents are stored once under objects/, named by their git blob hash, and every revision
+    is a small manifest under revisions/<gist ID>/<version>.json mapping its file names to hashes.
+    Archiving a long history where few files change per revision takes little more space than a
+    single copy of the gist, and contents already in the store are not downloaded again since raw
+    URLs carry the hash of the file. Every file is written atomically.
+    """
+
+    def __init__(self, directory: os.PathLike) -> None:
+        self.directory = Path(directory)
+
+    def _object_path(self, sha: str) -> Path:
+        return self.directory / 'objects' / sha[:2] / sha[2:]
+
+    def _revision_path(self, gist_id: str, version: str) -> Path:
+        return self.directory / 'revisions' / gist_id / f'{version}.json'
+
+    def has(self, gist_id: str, version: str) -> bool:
+        return self._revision_path(gist_id, version).exists()
+
+    def versions(self, gist_id: str) -> List[str]:
+        """Archived versions of a gist, newest first"""
+        paths = (self.directory / 'revisions' / gist_id).glob('*.json')
+        manifests = [self.manifest(gist_id, path.stem) for path in paths]
+        return [m['version'] for m in sorted(manifests, key=lambda m: m['committed_at'] or '', reverse=True)]
+
+    def manifest(self, gist_id: str, version: str) -> Dict[str, Any]:
+        with open(self._revision_path(gist_id, version), 'r') as f:
+            return json.load(f)
+
+    def read(self, gist_id: str, version: str) -> Dict[str, bytes]:
+        """Content of every file of an archived revision as it was uploaded, by file name"""
+        return {
+            name: self._object_path(sha).read_bytes()
+            for name, sha in self.manifest(gist_id, version)['files'].items()
+        }
+
+    def add(self, pygists: 'Pygists', gist: Gist, revision: GistRevision) -> int:
+        """Store a gist fetched at revision, returning how many file contents were new to the store"""
+        files = {}
+        new = 0
+        for file in gist.files:
+            sha = raw_sha(file)
+            if sha is None or not self._object_path(sha).exists():
+                content = exact_content(file)
+                if content is None:
+                    content = pygists.download_file(file).read_bytes()
+                sha = sha or content_sha(content)
+                if not self._object_path(sha).exists():
+                    with atomic_open(self._object_path(sha), 'wb') as f:
+                        f.write(content)
+                    new += 1
+            files[file.filename] = sha
+
+        with atomic_open(self._revision_path(gist.id, revision.version)) as f:
+            json.dump({
+                'gist_id': gist.id,
+                'version': revision.version,
+                'committed_at': revision.committed_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'description': gist.description,
+                'files': files,
+            }, f, indent=2, sort_keys=True)
+        return new
+
+    def archive(
+        self, pygists: 'Pygists', gist_id: str, max_workers: Optional[int] = None,
+        progress: Optional['ProgressCallback'] = None
+    ) -> List[BatchResult]:
+        """Fetch and store every revision of a gist missing from the store, concurrently.
+
+        Returns a result per fetched revision, identified by its version.
+        """
+        missing = [
+            revision for revision in pygists.iter_gist_history(gist_id)
+            if not self.has(gist_id, revision.version)
+        ]
+
+        def fetch(revision: GistRevision) -> Gist:
+            gist = pygists.get_gist_revision(gist_id, revision.version)
+            self.add(pygists, gist, revision)
+            return gist
+
+        return pygists.run_batch(fetch, missing, max_workers, progress, key=lambda revision: revision.version)
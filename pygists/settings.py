@@ -0,0 +1,20 @@
+"""
+Defaults shared by the client and the command line, kept free of heavy imports
+"""
+from pathlib import Path
+from typing import Mapping
+import os
+
+
+def cache_dir(environ: Mapping[str, str] = os.environ) -> Path:
+    """The pygists directory under XDG_CACHE_HOME, or under ~/.cache when it is not set"""
+    return Path(environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'pygists'
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_CACHE_DIR = cache_dir()
+DEFAULT_INDEX_PATH = DEFAULT_CACHE_DIR / 'index.sqlite3'
+DEFAULT_SOCKET_PATH = Path(os.getenv('XDG_RUNTIME_DIR') or DEFAULT_CACHE_DIR) / 'pygists.sock'
+# Seconds between polls of pygists watch, after a change and at most
+DEFAULT_POLL_INTERVAL = 10.0
+DEFAULT_MAX_POLL_INTERVAL = 600.0
@@ -0,0 +1,74 @@
+"""
+Incremental decoding of JSON arrays received in chunks
+"""
+from typing import Any, Iterable, Iterator
+import codecs
+import itertools
+import json
+import re
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Characters continuing a number past the part json decodes from a truncated one
+NUMBER_PARTS = '.eE+-'
+
+
+def iter_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Decode the elements of a UTF-8 JSON array as soon as each one is complete.
+
+    Only the elements not yet decoded are buffered, so memory use is bounded by the largest element
+    rather than the whole document. Elements are decoded by json's C scanner from their start; after
+    an attempt fails on a partial element, the next one waits until the buffer has doubled, keeping
+    the total work linear in the size of the document. Raises ValueError when it is not an array.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    text = ''
+    retry_at = 0
+    started = False
+    first = True
+
+    # None marks the end of the document, after which attempts are no longer deferred
+    for chunk in itertools.chain(chunks, [None]):
+        if chunk is not None:
+            text += utf8.decode(chunk)
+            if len(text) < retry_at:
+                continue
+        else:
+            text += utf8.decode(b'', final=True)
+
+        pos = WHITESPACE.match(text).end()  # type: ignore
+        if not started and pos < len(text):
+            if text[pos] != '[':
+                raise ValueError('Expected a JSON array')
+            started = True
+            pos = WHITESPACE.match(text, pos + 1).end()  # type: ignore
+
+        while started and pos < len(text):
+            if first and text[pos] == ']':
+                return
+            try:
+                element, end = decoder.raw_decode(text, pos)
+            except json.JSONDecodeError:
+                # Most likely the element continues in the next chunk
+                if chunk is None:
+                    raise
+                break
+            # A delimiter must follow, so that numbers cut short are not taken as complete
+            after = WHITESPACE.match(text, end).end()  # type: ignore
+            if after == len(text):
+                break
+            if text[after] not in ',]':
+                # Numbers cut at their fraction or exponent, such as 1. or 1e, are decoded up to it
+                if chunk is not None and after == end and text[after] in NUMBER_PARTS:
+                    break
+                raise ValueError(f'Expected , or ] at {after} of the buffered JSON')
+            yield element
+            if text[after] == ']':
+                return
+            first = False
+            pos = WHITESPACE.match(text, after + 1).end()  # type: ignore
+
+        text = text[pos:]
+        retry_at = 2 * len(text)
+
+    raise ValueError('Incomplete JSON array')
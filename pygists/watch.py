@@ -0,0 +1,118 @@
+"""
+Change feed of a user's gists, built by comparing successive listings
+"""
+from collections import namedtuple
+import datetime as dt
+from typing import Any, Dict, Iterable, List, Tuple
+
+from pygists.models.gist import Gist
+from pygists.settings import DEFAULT_MAX_POLL_INTERVAL, DEFAULT_POLL_INTERVAL
+
+DEFAULT_BACKOFF = 2.0
+
+EVENTS = ('created', 'updated', 'deleted', 'file_changed')
+FILE_CHANGES = ('added', 'removed', 'modified')
+
+
+class GistEvent(namedtuple(
+    'GistEvent', ('event', 'gist_id', 'detected_at', 'gist', 'filename', 'change'),
+    defaults=(None, None, None)
+)):
+    """A change to a gist: one of EVENTS, with the filename and one of FILE_CHANGES for file_changed.
+
+    gist is the gist as listed after the change, None once deleted.
+    """
+    __slots__ = ()
+
+    def to_dict(self, show_content: bool = False) -> Dict[str, Any]:
+        msg: Dict[str, Any] = {
+            'event': self.event,
+            'gist_id': self.gist_id,
+            'detected': self.detected_at.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        if self.gist is not None:
+            msg['updated'] = self.gist.updated_at.strftime('%Y-%m-%d %H:%M:%S')
+            msg['description'] = self.gist.description
+        if self.filename is not None:
+            msg['filename'] = self.filename
+            msg['change'] = self.change
+        return msg
+
+    def to_text(self, show_content: bool = False) -> str:
+        text = f"{self.detected_at.strftime('%Y-%m-%d %H:%M:%S')} | {self.event} | {self.gist_id}"
+        if self.filename is not None:
+            text += f' | {self.change} {self.filename}'
+        return text
+
+
+class GistState(namedtuple('GistState', ('updated_at', 'description', 'files'))):
+    """What a listing tells about a gist: update time, description, and size and raw_url by filename.
+
+    REST raw URLs embed the git blob hash of the content, so a file changes exactly when its raw_url
+    does. Those of gists listed over GraphQL do not, so an edit keeping the size of a file is only
+    seen as an update of its gist, without a file_changed event.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_gist(cls, gist: Gist) -> 'GistState':
+        files = {file.filename: (file.size, file.raw_url) for file in gist.files}
+        return cls(gist.updated_at, gist.description, files)
+
+
+WatchState = Dict[str, GistState]
+
+
+def diff_listing(
+    state: WatchState, gists: Iterable[Gist], detected_at: dt.datetime
+) -> Tuple[WatchState, List[GistEvent]]:
+    """The state of a new listing and the events that lead to it from state"""
+    listed = {gist.id: gist for gist in gists}
+    current = {gist_id: GistState.from_gist(gist) for gist_id, gist in listed.items()}
+    events = []
+    for gist_id, gist in listed.items():
+        old = state.get(gist_id)
+        new = current[gist_id]
+        if old is None:
+            events.append(GistEvent('created', gist_id, detected_at, gist))
+        elif old != new:
+            events.append(GistEvent('updated', gist_id, detected_at, gist))
+            for filename in sorted(set(old.files) | set(new.files)):
+                before, after = old.files.get(filename), new.files.get(filename)
+                change = 'added' if before is None else 'removed' if after is None else (
+                    'modified' if before != after else None
+                )
+                if change is not None:
+                    events.append(GistEvent('file_changed', gist_id, detected_at, gist, filename, change))
+
+    for gist_id in sorted(state.keys() - current.keys()):
+        events.append(GistEvent('deleted', gist_id, detected_at))
+    return current, events
+
+
+class PollInterval:
+    """Seconds to wait between polls.
+
+    Starts at minimum and grows by backoff with every poll without changes, up to maximum. Any change
+    brings it back to minimum.
+    """
+
+    def __init__(
+        self, minimum: float = DEFAULT_POLL_INTERVAL, maximum: float = DEFAULT_MAX_POLL_INTERVAL,
+        backoff: float = DEFAULT_BACKOFF
+    ) -> None:
+        if not 0 < minimum <= maximum:
+            raise ValueError('Expected 0 < minimum <= maximum poll interval')
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.seconds = minimum
+
+    def update(self, active: bool) -> float:
+        self.seconds = self.minimum if active else min(self.seconds * self.backoff, self.maximum)
+        return self.seconds
+
+
+def utcnow() -> dt.datetime:
+    """Naive UTC now, like the timestamps of gists"""
+    return dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
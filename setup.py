@@ -14,12 +14,15 @@ setup(
     description='CLI tool to operate with the GitHub Gists API.',
     scripts=['bin/pygists'],
     long_description=readme(),
-    packages=find_packages(exclude=['tests', 'docs']),
+    packages=find_packages(exclude=['tests', 'tests.*', 'docs', 'benchmarks', 'benchmarks.*']),
     license='MIT',
     url='https://github.com/tomasfarias/Pygists',
     install_requires=[
         'requests==2.24.0'
     ],
+    extras_require={
+        'async': ['aiohttp>=3.6'],
+    },
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'License :: OSI Approved :: MIT License',
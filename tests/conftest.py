@@ -1,5 +1,7 @@
 import pytest
 
+from tests.fake_github import FakeGitHub
+
 
 def pytest_addoption(parser):
     parser.addoption(
@@ -10,6 +12,9 @@ def pytest_addoption(parser):
 
 def pytest_configure(config):
     config.addinivalue_line('markers', 'integration: mark test as part of integration test suite')
+    config.addinivalue_line(
+        'markers', 'fake_github(**kwargs): arguments of the FakeGitHub created by the server fixture'
+    )
 
 
 def pytest_collection_modifyitems(config, items):
@@ -20,3 +25,12 @@ def pytest_collection_modifyitems(config, items):
     for item in items:
         if 'integration' in item.keywords:
             item.add_marker(skip_integration)
+
+
+@pytest.fixture
+def server(request):
+    """A FakeGitHub serving on a local port for the duration of a test, created with the keyword
+    arguments of the fake_github marker of the test, if any"""
+    marker = request.node.get_closest_marker('fake_github')
+    with FakeGitHub(**(marker.kwargs if marker is not None else {})) as fake:
+        yield fake
@@ -0,0 +1,391 @@
+"""A local stand-in for the GitHub Gists API endpoints used by Pygists"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+import base64
+import calendar
+import collections
+import copy
+import difflib
+import gzip
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
+
+from tests.utils import gist_data
+
+
+class FakeGitHub:
+    """Serve an in-memory collection of gists over HTTP on localhost.
+
+    Use as a context manager: the server runs in a background thread and url points to its root.
+    Every API request is delayed by latency seconds. When rate_limit is set, responses carry the
+    X-RateLimit headers of a budget of that many requests per hour for every authenticated user,
+    and requests are rejected with a 403 once it is exhausted; like on GitHub, 304 Not Modified
+    responses are free. logins counts the API requests sent by every user. JSON bodies are gzip
+    compressed for clients accepting it, counted by gzipped. POST /graphql answers the gist lookups
+    and listings sent by Pygists, each query counting as one request.
+    """
+
+    def __init__(self, username='test_user', latency=0.0, rate_limit=None):
+        self.username = username
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.budgets = {}
+        self.logins = collections.Counter()
+        self.reset = int(time.time()) + 3600
+        self.gists = {}
+        self.requests = []
+        self.not_modified = 0
+        self.gzipped = 0
+        self.raw = {}
+        self.revisions = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True
+        )
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add_gist(self, gist_id=None, description='', files=None, updated_at=None, truncate=None):
+        """Store a gist as if it had been created through the API.
+
+        File contents longer than truncate characters are truncated in API responses and must be
+        fetched through their raw_url.
+        """
+        with self._lock:
+            gist_id = gist_id or f'{next(self._ids):032x}'
+            gist = gist_data(gist_id, description, self.username, files)
+            if updated_at is not None:
+                gist['updated_at'] = updated_at
+            for file in gist['files'].values():
+                self._store_raw(gist_id, file, truncate)
+            self.gists[gist_id] = gist
+            self._commit(gist, {}, gist['updated_at'])
+            return gist
+
+    def _commit(self, gist, previous, committed_at=None):
+        """Record the current files of a gist as a new revision of its history"""
+        additions = deletions = 0
+        names = set(previous) | set(gist['files'])
+        for name in names:
+            old = previous.get(name, {}).get('content', '').splitlines()
+            new = gist['files'].get(name, {}).get('content', '').splitlines()
+            for line in difflib.ndiff(old, new):
+                additions += line.startswith('+ ')
+                deletions += line.startswith('- ')
+
+        history = gist.setdefault('history', [])
+        if committed_at is None:
+            # Keep commit times strictly increasing so revisions sort like the history
+            now = time.time()
+            if history:
+                latest = calendar.timegm(time.strptime(history[0]['committed_at'], '%Y-%m-%dT%H:%M:%SZ'))
+                now = max(now, latest + 1)
+            committed_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now))
+        state = f'{gist["id"]} {len(history)} {json.dumps(gist["files"])}'
+        version = hashlib.sha1(state.encode()).hexdigest()
+        history.insert(0, {
+            'user': gist['owner'],
+            'version': version,
+            'committed_at': committed_at,
+            'change_status': {'total': additions + deletions, 'additions': additions, 'deletions': deletions},
+            'url': f'{self.url}gists/{gist["id"]}/{version}',
+        })
+        self.revisions.setdefault(gist['id'], {})[version] = copy.deepcopy(gist)
+
+    def populate(self, count, files_per_gist=1, file_size=100, truncate=None):
+        """Add count gists with files_per_gist files of file_size characters each, returning their IDs"""
+        ids = []
+        for i in range(count):
+            updated_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(1546300800 + i))
+            files = {
+                f'file_{j}.py': (f'# {i} {j}\n' + 'x' * file_size)[:file_size] for j in range(files_per_gist)
+            }
+            gist = self.add_gist(
+                description=f'Gist {i}', files=files, updated_at=updated_at, truncate=truncate
+            )
+            ids.append(gist['id'])
+        return ids
+
+    def _store_raw(self, gist_id, file, truncate=None):
+        # Like GitHub, raw URLs embed the git blob hash of the content
+        content = file['content'].encode()
+        revision = hashlib.sha1(f'blob {len(content)}\0'.encode() + content).hexdigest()
+        path = f'/{self.username}/{gist_id}/raw/{revision}/{file["filename"]}'
+        self.raw[path] = file['content']
+        # Without the revision, the raw URL serves the latest content, as in GraphQL responses
+        self.raw[f'/{self.username}/{gist_id}/raw/{quote(file["filename"])}'] = file['content']
+        file['raw_url'] = f'{self.url.rstrip("/")}{path}'
+        if truncate is not None and len(file['content']) > truncate:
+            file['content'] = file['content'][:truncate]
+            file['truncated'] = True
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately, which Nagle's algorithm would delay
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                fake._dispatch(self, 'GET')
+
+            def do_POST(self):
+                fake._dispatch(self, 'POST')
+
+            def do_PATCH(self):
+                fake._dispatch(self, 'PATCH')
+
+            def do_DELETE(self):
+                fake._dispatch(self, 'DELETE')
+
+        return Handler
+
+    def _dispatch(self, handler, method):
+        parts = urlsplit(handler.path)
+        path = parts.path.strip('/').split('/')
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        raw = self._read_body(handler)
+        body = json.loads(raw) if raw else None
+        self.requests.append((method, parts.path, query))
+        if self.latency:
+            time.sleep(self.latency)
+
+        if method == 'GET' and parts.path in self.raw:
+            return self._respond_raw(handler, self.raw[parts.path])
+        login = self._login(handler)
+        self.logins[login] += 1
+        if self.remaining(login) == 0:
+            return self._respond(handler, 403, {'message': 'API rate limit exceeded'})
+        if method == 'GET' and len(path) == 3 and path[0] == 'users' and path[2] == 'gists':
+            return self._list(handler, parts.path, query)
+        if method == 'GET' and len(path) == 3 and path[0] == 'gists' and path[1] in self.gists:
+            if path[2] == 'commits':
+                return self._paginate(handler, parts.path, query, self.gists[path[1]]['history'])
+            revision = self.revisions[path[1]].get(path[2])
+            if revision is not None:
+                return self._respond(handler, 200, revision)
+        if method == 'POST' and path == ['graphql']:
+            return self._graphql(handler, body)
+        if method == 'POST' and path == ['gists']:
+            return self._create(handler, body)
+        if len(path) == 2 and path[0] == 'gists':
+            gist = self.gists.get(path[1])
+            if gist is None:
+                return self._respond(handler, 404, {'message': 'Not Found'})
+            if method == 'GET':
+                return self._respond(handler, 200, gist)
+            if method == 'PATCH':
+                return self._edit(handler, gist, body)
+            if method == 'DELETE':
+                del self.gists[path[1]]
+                return self._respond(handler, 204)
+        return self._respond(handler, 404, {'message': 'Not Found'})
+
+    def remaining(self, login):
+        """Requests left in the rate limit budget of a user, None without rate limits"""
+        return self.budgets.get(login, self.rate_limit)
+
+    def _login(self, handler):
+        authorization = handler.headers.get('Authorization', '')
+        if not authorization.startswith('Basic '):
+            return None
+        return base64.b64decode(authorization[len('Basic '):]).decode().split(':')[0]
+
+    def _read_body(self, handler):
+        if handler.headers.get('Transfer-Encoding', '').lower() != 'chunked':
+            return handler.rfile.read(int(handler.headers.get('Content-Length') or 0))
+
+        chunks = []
+        while True:
+            size = int(handler.rfile.readline().split(b';')[0], 16)
+            chunk = handler.rfile.read(size + 2)[:size]
+            if size == 0:
+                return b''.join(chunks)
+            chunks.append(chunk)
+
+    def _list(self, handler, path, query):
+        gists = sorted(self.gists.values(), key=lambda g: g['updated_at'], reverse=True)
+        if 'since' in query:
+            gists = [g for g in gists if g['updated_at'] >= query['since']]
+
+        # Like GitHub, listings include neither file contents nor the history
+        listed = [
+            dict({k: v for k, v in gist.items() if k != 'history'}, files={
+                name: {k: v for k, v in file.items() if k not in ('content', 'truncated')}
+                for name, file in gist['files'].items()
+            })
+            for gist in gists
+        ]
+        self._paginate(handler, path, query, listed)
+
+    def _paginate(self, handler, path, query, items):
+        per_page = min(int(query.get('per_page', 30)), 100)
+        page = int(query.get('page', 1))
+        last = max(1, -(-len(items) // per_page))
+        links = []
+        if page < last:
+            links.append(f'<{self._page_url(handler, path, query, page + 1)}>; rel="next"')
+            links.append(f'<{self._page_url(handler, path, query, last)}>; rel="last"')
+
+        headers = {'Link': ', '.join(links)} if links else {}
+        self._respond(handler, 200, items[(page - 1) * per_page:page * per_page], headers)
+
+    def _page_url(self, handler, path, query, page):
+        params = '&'.join(f'{k}={v}' for k, v in {**query, 'page': page}.items())
+        return f'{self.url.rstrip("/")}{path}?{params}'
+
+    def _graphql(self, handler, body):
+        query, variables = body['query'], body.get('variables') or {}
+        content = re.search(r'\btext\b', query) is not None
+        if variables.get('login') != self.username:
+            error = {'type': 'NOT_FOUND', 'path': ['user'], 'message': 'Could not resolve to a User'}
+            return self._respond(handler, 200, {'data': {'user': None}, 'errors': [error]})
+
+        if 'gists(' in query:
+            gists = sorted(self.gists.values(), key=lambda g: g['updated_at'], reverse=True)
+            start = int(variables.get('after') or 0)
+            end = start + min(variables['first'], 100)
+            page = {
+                'pageInfo': {'hasNextPage': end < len(gists), 'endCursor': str(end)},
+                'nodes': [self._graphql_node(gist, content) for gist in gists[start:end]],
+            }
+            return self._respond(handler, 200, {'data': {'user': {'gists': page}}})
+
+        user, errors = {}, []
+        for alias, variable in re.findall(r'(\w+): gist\(name: \$(\w+)\)', query):
+            gist = self.gists.get(variables[variable])
+            user[alias] = self._graphql_node(gist, content) if gist is not None else None
+            if gist is None:
+                errors.append({
+                    'type': 'NOT_FOUND', 'path': ['user', alias],
+                    'message': f"Could not resolve to a Gist with the name '{variables[variable]}'.",
+                })
+        response = {'data': {'user': user}}
+        if errors:
+            response['errors'] = errors
+        self._respond(handler, 200, response)
+
+    def _graphql_node(self, gist, content):
+        files = []
+        for file in gist['files'].values():
+            node = {
+                'name': file['filename'],
+                'encodedName': quote(file['filename']),
+                'size': file['size'],
+                'language': {'name': file['language']} if file['language'] else None,
+            }
+            if content:
+                node.update(text=file['content'], isTruncated=file.get('truncated', False))
+            files.append(node)
+
+        owner = gist['owner']
+        return {
+            'id': gist['node_id'],
+            'name': gist['id'],
+            'description': gist['description'],
+            'isPublic': gist['public'],
+            'createdAt': gist['created_at'],
+            'updatedAt': gist['updated_at'],
+            'url': gist['html_url'],
+            'comments': {'totalCount': gist['comments']},
+            'owner': {
+                '__typename': owner['type'], 'login': owner['login'], 'id': owner['node_id'],
+                'avatarUrl': owner['avatar_url'], 'url': owner['html_url'],
+            },
+            'files': files,
+        }
+
+    def _create(self, handler, body):
+        files = {name: spec['content'] for name, spec in body['files'].items()}
+        gist = self.add_gist(description=body.get('description', ''), files=files)
+        gist['public'] = body.get('public', True)
+        self._respond(handler, 201, gist)
+
+    def _edit(self, handler, gist, body):
+        previous = copy.deepcopy(gist['files'])
+        gist['updated_at'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        if 'description' in body:
+            gist['description'] = body['description']
+
+        for name, spec in body.get('files', {}).items():
+            if spec is None:
+                gist['files'].pop(name, None)
+                continue
+
+            old = gist['files'].pop(name, {})
+            new_name = spec.get('filename', name)
+            content = spec.get('content', old.get('content', ''))
+            gist['files'][new_name] = dict(
+                old, filename=new_name, content=content, size=len(content.encode()), truncated=False,
+                language=old.get('language'), type=old.get('type', 'text/plain'),
+            )
+            self._store_raw(gist['id'], gist['files'][new_name])
+        if 'files' in body:
+            self._commit(gist, previous)
+        self._respond(handler, 200, gist)
+
+    def _respond_raw(self, handler, content):
+        payload = content.encode()
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/plain; charset=utf-8')
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _respond(self, handler, status, body=None, headers=None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        headers = dict(headers or {})
+        if handler.command == 'GET' and status == 200:
+            etag = f'"{hashlib.sha1(payload).hexdigest()}"'
+            headers['ETag'] = etag
+            if handler.headers.get('If-None-Match') == etag:
+                status, payload = 304, b''
+                self.not_modified += 1
+
+        if self.rate_limit is not None:
+            login = self._login(handler)
+            with self._lock:
+                remaining = self.remaining(login)
+                if status != 304 and remaining > 0:
+                    remaining = self.budgets[login] = remaining - 1
+                headers.update({
+                    'X-RateLimit-Limit': str(self.rate_limit),
+                    'X-RateLimit-Remaining': str(remaining),
+                    'X-RateLimit-Reset': str(self.reset),
+                    'X-RateLimit-Used': str(self.rate_limit - remaining),
+                })
+
+        if payload and 'gzip' in handler.headers.get('Accept-Encoding', ''):
+            payload = gzip.compress(payload)
+            headers['Content-Encoding'] = 'gzip'
+            self.gzipped += 1
+
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json; charset=utf-8')
+        handler.send_header('Content-Length', str(len(payload)))
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(payload)
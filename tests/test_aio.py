@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+from pygists.aio import AsyncPygists  # noqa: E402
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_create_and_get_gist(server, tmpdir):
+    p = tmpdir.join('test.py')
+    p.write('print("Hello World!")')
+
+    async def scenario():
+        async with AsyncPygists('test_user', 'test_token', base_url=server.url) as client:
+            created = await client.create_gist_from_files(str(p), description='Testing')
+            fetched = await client.get_gist(created.id)
+        return created, fetched
+
+    created, fetched = run(scenario())
+
+    assert created.id == fetched.id
+    assert fetched.description == 'Testing'
+    assert [(f.filename, f.content) for f in fetched.files] == [('test.py', 'print("Hello World!")')]
+
+
+def test_edit_and_delete_gist(server):
+    gist = server.add_gist(files={'test.py': 'old'})
+
+    async def scenario():
+        async with AsyncPygists('test_user', 'test_token', base_url=server.url) as client:
+            edited = await client.edit_gist(gist['id'], files={'test.py': {'content': 'new'}})
+            await client.delete_gist(gist['id'])
+        return edited
+
+    edited = run(scenario())
+
+    assert edited.files[0].content == 'new'
+    assert gist['id'] not in server.gists
+
+
+def test_list_gists_follows_pagination(server):
+    ids = [server.add_gist(updated_at=f'2019-01-{day:02}T10:00:20Z')['id'] for day in range(1, 6)]
+
+    async def scenario():
+        async with AsyncPygists('test_user', 'test_token', base_url=server.url) as client:
+            return await client.list_user_gists(per_page=2)
+
+    gists = run(scenario())
+
+    assert [g.id for g in gists] == ids[::-1]
+    assert len([r for r in server.requests if r[1] == '/users/test_user/gists']) == 3
+
+
+def test_concurrent_requests_share_one_session(server):
+    ids = [server.add_gist()['id'] for _ in range(20)]
+
+    async def scenario():
+        async with AsyncPygists('test_user', 'test_token', base_url=server.url, max_connections=5) as client:
+            gists = await asyncio.gather(*(client.get_gist(gist_id) for gist_id in ids))
+            assert client.session.connector.limit == 5
+        return gists
+
+    assert [g.id for g in run(scenario())] == ids
+
+
+def test_http_errors_are_raised(server):
+    async def scenario():
+        async with AsyncPygists('test_user', 'test_token', base_url=server.url) as client:
+            await client.get_gist('missing')
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        run(scenario())
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from benchmarks import __main__ as runner, bench_api
+from pygists.cache import MemoryCache
+from pygists.pygists import Pygists
+
+
+@pytest.mark.fake_github(rate_limit=3)
+def test_fake_github_reports_rate_limit(server):
+    gist_id = server.populate(1)[0]
+    pygists = Pygists(server.username, 'token', base_url=server.url, cache=MemoryCache())
+
+    pygists.get_gist(gist_id)
+    pygists.get_gist(gist_id)  # Not modified, free
+
+    assert pygists.rate_limit.limit == 3
+    assert pygists.rate_limit.remaining == 2
+
+
+def test_fake_github_populate_sizes_files(server):
+    ids = server.populate(3, files_per_gist=2, file_size=500)
+
+    assert len(ids) == len(server.gists) == 3
+    assert all(
+        file['size'] == 500 for gist in server.gists.values() for file in gist['files'].values()
+    )
+
+
+def test_api_benchmarks_report_every_scenario():
+    results = bench_api.run(gists=5, workers=2, creates=1, file_size=1000)
+
+    assert [result['benchmark'] for result in results] == [
+        'api.list', 'api.list_buffered', 'api.list_streamed', 'api.get', 'api.get_graphql', 'api.create'
+    ]
+    assert [result['count'] for result in results] == [5, 5, 5, 5, 5, 1]
+    assert results[2]['first_seconds'] <= results[2]['seconds']
+    assert results[3]['errors'] == 0
+    assert results[3]['latency_p95'] >= results[3]['latency_p50']
+    assert results[3]['requests_per_gist'] == 1.0
+    assert results[4]['requests_per_gist'] == 0.2
+
+
+def test_benchmark_runner_appends_json_lines(tmpdir):
+    output = tmpdir.join('results.jsonl')
+    runner.main(['--quick', '--output', str(output)])
+    runner.main(['--quick', '--output', str(output)])
+
+    results = [json.loads(line) for line in output.readlines()]
+    assert len(results) == 16
+    assert all('python' in result and 'seconds' in result for result in results)
@@ -0,0 +1,48 @@
+from pygists import Pygists
+from pygists.cache import CacheEntry, FileCache, MemoryCache, cache_key
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(maxsize=2)
+    cache.set('a', CacheEntry('"a"', None, 1))
+    cache.set('b', CacheEntry('"b"', None, 2))
+    cache.get('a')
+    cache.set('c', CacheEntry('"c"', None, 3))
+
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a').body == 1
+    assert cache.get('c').body == 3
+
+
+def test_file_cache_round_trip(tmpdir):
+    cache = FileCache(tmpdir)
+    entry = CacheEntry('"abc"', 'Tue, 01 Jan 2019 10:00:20 GMT', [{'id': '1'}], {'next': {'url': 'x'}})
+    cache.set('key', entry)
+
+    assert FileCache(tmpdir).get('key') == entry
+    cache.delete('key')
+    assert cache.get('key') is None
+
+
+def test_cache_key_ignores_params_order():
+    assert cache_key('user', 'url', {'a': 1, 'b': 2}) == cache_key('user', 'url', {'b': 2, 'a': 1})
+    assert cache_key('user', 'url') != cache_key('other_user', 'url')
+
+
+def test_not_modified_responses_are_served_from_cache(server):
+    gist_id = server.add_gist(description='Cached')['id']
+    server.add_gist()
+    pygists = Pygists('test_user', 'test_token', base_url=server.url, cache=MemoryCache())
+
+    first = pygists.get_gist(gist_id)
+    second = pygists.get_gist(gist_id)
+    listed = [pygists.list_user_gists(), pygists.list_user_gists()]
+
+    server.gists[gist_id]['description'] = 'Changed'
+    changed = pygists.get_gist(gist_id)
+
+    assert first.description == second.description == 'Cached'
+    assert changed.description == 'Changed'
+    assert [g.id for g in listed[0]] == [g.id for g in listed[1]]
+    assert server.not_modified == 2
@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+
+from pygists.coalesce import CoalescingStats, SingleFlight
+from pygists.pygists import Pygists
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'Timed out'
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_call():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait()
+        return object()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(flights.do, 'key', slow) for _ in range(8)]
+        wait_for(lambda: flights.stats.coalesced == 7)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flights.stats == CoalescingStats(calls=1, coalesced=7, cached=0)
+    # Without a window, the next call is made again
+    assert flights.do('key', object) is not results[0]
+
+
+def test_errors_are_shared_but_not_kept():
+    flights = SingleFlight(window=10)
+    release = threading.Event()
+
+    def failing():
+        release.wait()
+        raise ValueError('Failed')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(flights.do, 'key', failing) for _ in range(2)]
+        wait_for(lambda: flights.stats.coalesced == 1)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match='Failed'):
+                future.result()
+
+    assert flights.do('key', lambda: 'retried') == 'retried'
+
+
+def test_results_are_kept_for_the_window():
+    clock = FakeClock()
+    flights = SingleFlight(window=0.5, clock=clock)
+
+    assert flights.do('a', lambda: 1) == 1
+    clock.now = 0.4
+    assert flights.do('a', lambda: 2) == 1
+    clock.now = 0.9
+    assert flights.do('a', lambda: 3) == 3
+    flights.clear()
+    assert flights.do('a', lambda: 4) == 4
+
+    assert flights.stats == CoalescingStats(calls=3, coalesced=0, cached=1)
+
+
+def test_expired_results_are_pruned():
+    clock = FakeClock()
+    flights = SingleFlight(window=1.0, clock=clock)
+    for key in range(10):
+        flights.do(key, lambda: key)
+
+    clock.now = 2.0
+    flights.do('new', lambda: None)
+
+    assert list(flights._flights) == ['new']
+
+
+@pytest.mark.fake_github(latency=0.05)
+def test_concurrent_identical_reads_send_one_request(server):
+    gist_id = server.populate(1)[0]
+    pygists = Pygists('test_user', 'test_token', base_url=server.url, max_workers=16)
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        gists = list(executor.map(lambda _: pygists.get_gist(gist_id), range(16)))
+    listings = pygists.get_gists([gist_id] * 4)
+
+    gets = [r for r in server.requests if r[0] == 'GET' and r[1] == f'/gists/{gist_id}']
+    assert len(gets) == 1 + 1
+    assert all(gist is gists[0] for gist in gists)
+    assert all(result.gist is listings[0].gist for result in listings)
+    assert pygists.coalescing.calls == 2
+    assert pygists.coalescing.coalesced == 15 + 3
+
+
+def test_writes_drop_results_kept_for_the_window(server):
+    gist_id = server.populate(3)[0]
+    pygists = Pygists('test_user', 'test_token', base_url=server.url, coalesce_window=60)
+
+    first, second = pygists.list_user_gists(), pygists.list_user_gists()
+    assert first == second and first is not second
+    assert pygists.get_gist(gist_id) is pygists.get_gist(gist_id)
+
+    pygists.edit_gist(gist_id, new_description='Edited')
+
+    assert pygists.get_gist(gist_id).description == 'Edited'
+    assert len(pygists.list_user_gists()) == 3
+
+    listings = [r for r in server.requests if r[1] == '/users/test_user/gists']
+    assert len(listings) == 2
+    assert pygists.coalescing == CoalescingStats(calls=4, coalesced=0, cached=2)
+
+
+def test_coalescing_can_be_disabled(server):
+    gist_id = server.populate(1)[0]
+    pygists = Pygists('test_user', 'test_token', base_url=server.url, coalesce_window=None)
+
+    assert pygists.get_gist(gist_id) is not pygists.get_gist(gist_id)
+    assert pygists.coalescing is None
@@ -0,0 +1,133 @@
+import io
+import os
+import tempfile
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from pygists import daemon as daemon_module
+from pygists.daemon import Daemon, forward, is_listening
+from pygists.pygists import Pygists
+
+
+@pytest.fixture
+def daemon(server):
+    with tempfile.TemporaryDirectory() as tmp:
+        created = []
+
+        def client_factory(parsed):
+            client = Pygists(parsed.username, parsed.token, base_url=server.url)
+            created.append(client)
+            return client
+
+        daemon = Daemon(os.path.join(tmp, 'pygists.sock'), client_factory=client_factory)
+        daemon.created = created
+        thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+        thread.start()
+        assert daemon.wait_ready(5)
+        yield daemon
+        daemon.shutdown()
+        thread.join(5)
+
+
+def run_forwarded(argv, path, stdin=''):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with patch('sys.stdout', stdout), patch('sys.stderr', stderr), patch('sys.stdin', io.StringIO(stdin)):
+        code = forward(argv, path)
+    return code, stdout.getvalue(), stderr.getvalue()
+
+
+def test_forward_without_daemon_returns_none():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'pygists.sock')
+        assert forward(['ls', '-u', 'test_user', '-t', 'token'], path) is None
+
+        open(path, 'w').close()
+        assert not is_listening(path)
+        assert forward(['ls', '-u', 'test_user', '-t', 'token'], path) is None
+
+
+def test_daemon_reuses_client_across_invocations(server, daemon):
+    gist = server.add_gist(description='Served by the daemon', files={'a.py': 'print(1)'})
+    argv = ['get', gist['id'], '-u', 'test_user', '-t', 'token', '--no-cache']
+
+    first = run_forwarded(argv, daemon.path)
+    second = run_forwarded(argv, daemon.path)
+
+    assert first[0] == second[0] == 0
+    assert 'Served by the daemon' in first[1]
+    assert first[1] == second[1]
+    assert len(daemon.created) == 1
+
+
+def test_daemon_reads_ids_from_client_stdin(server, daemon):
+    gist = server.add_gist(description='From stdin', files={'a.py': 'print(1)'})
+
+    code, stdout, _ = run_forwarded(
+        ['delete', '--from-file', '-', '-u', 'test_user', '-t', 'token'], daemon.path, stdin=f'{gist["id"]}\n'
+    )
+
+    assert code == 0
+    assert stdout == f'Deleted gist: {gist["id"]}\n'
+    assert gist['id'] not in server.gists
+
+
+def test_daemon_resolves_paths_in_client_directory(server, daemon):
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'local.py'), 'w') as f:
+            f.write('print(2)')
+
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            code, stdout, _ = run_forwarded(
+                ['create', 'local.py', '-d', 'Relative', '-u', 'test_user', '-t', 'token'], daemon.path
+            )
+        finally:
+            os.chdir(cwd)
+
+    assert code == 0
+    assert 'local.py' in stdout
+    assert os.getcwd() == cwd
+
+
+def test_daemon_relays_errors_and_exit_codes(daemon):
+    code, stdout, stderr = run_forwarded(['get', '-u', 'test_user', '-t', 'token'], daemon.path)
+
+    assert code == 1
+    assert stdout == ''
+    assert 'No gist IDs given to get' in stderr
+
+    code, _, stderr = run_forwarded(['get', '--max-workers', 'many'], daemon.path)
+    assert code == 2
+    assert 'invalid int value' in stderr
+
+
+def test_daemon_uses_environment_of_client(server, daemon, monkeypatch):
+    server.populate(2)
+    monkeypatch.setenv('GITHUB_USER', 'test_user')
+    monkeypatch.setenv('GITHUB_TOKEN', 'token')
+
+    code, stdout, _ = run_forwarded(['ls', '--no-cache'], daemon.path)
+
+    assert code == 0
+    assert stdout.count('GitHub Gist:') == 2
+    # The environment of the daemon, here the one of the test, is not used
+    env = {'GITHUB_USER': 'other_user', 'GITHUB_TOKEN': 'other_token'}
+    daemon.handle({'argv': ['ls', '--no-cache'], 'cwd': os.getcwd(), 'env': env}, lambda message: None)
+    assert [client.username for client in daemon.created] == ['test_user', 'other_user']
+
+
+def test_daemon_relays_output_while_running(server, daemon, monkeypatch):
+    server.populate(5)
+    monkeypatch.setattr(daemon_module, 'CHUNK_SIZE', 100)
+    sent = []
+
+    code = daemon.handle(
+        {'argv': ['ls', '-u', 'test_user', '-t', 'token', '--no-cache'], 'cwd': os.getcwd()}, sent.append
+    )
+
+    assert code == 0
+    assert len(sent) > 1
+    assert ''.join(message['stdout'] for message in sent).count('GitHub Gist:') == 5
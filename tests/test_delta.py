@@ -0,0 +1,124 @@
+import hashlib
+import json
+import unittest.mock
+
+from pygists.delta import STATE_FILE, blob_sha, diff, raw_sha, scan_directory
+from pygists.models.gist import GistFile
+from pygists.payloads import StreamingPayload, UploadFile
+from pygists.pygists import Pygists
+
+
+def remote_file(filename, content):
+    sha = hashlib.sha1(f'blob {len(content)}\0'.encode() + content.encode()).hexdigest()
+    return GistFile(
+        filename, 'text/plain', None, f'https://gist.githubusercontent.com/u/1/raw/{sha}/{filename}',
+        len(content), False, None
+    )
+
+
+def write(directory, files):
+    for name, content in files.items():
+        directory.join(name).write(content)
+
+
+def test_blob_sha_matches_git(tmpdir):
+    path = tmpdir.join('hello.txt')
+    path.write('hello\n')
+
+    # git hash-object hello.txt
+    assert blob_sha(str(path)) == 'ce013625030ba8dba906f756967f9e9ca394464a'
+    assert raw_sha(remote_file('hello.txt', 'hello\n')) == 'ce013625030ba8dba906f756967f9e9ca394464a'
+
+
+def test_diff_sends_only_changes(tmpdir):
+    write(tmpdir, {'same.py': 'same', 'modified.py': 'new', 'resized.py': 'longer', 'added.py': 'added',
+                   'renamed.py': 'moved content'})
+    remote = [
+        remote_file('same.py', 'same'), remote_file('modified.py', 'old'), remote_file('resized.py', 'short'),
+        remote_file('deleted.py', 'deleted'), remote_file('original.py', 'moved content'),
+    ]
+    hashed = []
+
+    def remote_sha(file):
+        hashed.append(file.filename)
+        return raw_sha(file)
+
+    changes = diff(scan_directory(str(tmpdir)), remote, remote_sha)
+
+    assert changes == {
+        'modified.py': UploadFile(tmpdir.join('modified.py')),
+        'resized.py': UploadFile(tmpdir.join('resized.py')),
+        'deleted.py': None,
+        'original.py': UploadFile(None, 'renamed.py'),
+        'added.py': UploadFile(tmpdir.join('added.py')),
+    }
+    # Files of different sizes are never hashed
+    assert sorted(hashed) == ['modified.py', 'original.py', 'same.py']
+
+
+def test_rename_payload_carries_no_content():
+    payload = StreamingPayload({'old.py': UploadFile(None, 'new.py')})
+
+    assert json.loads(b''.join(payload)) == {'files': {'old.py': {'filename': 'new.py'}}}
+
+
+def test_scan_directory_reuses_cached_hashes(tmpdir):
+    write(tmpdir, {'a.py': 'a'})
+    first = scan_directory(str(tmpdir))
+    state = {'files': {'a.py': [first['a.py'].size, first['a.py'].mtime_ns, 'cached']}}
+
+    with unittest.mock.patch('pygists.delta.blob_sha') as mock_sha:
+        assert scan_directory(str(tmpdir), state)['a.py'].sha == 'cached'
+    mock_sha.assert_not_called()
+
+
+def test_sync_gist_from_dir(server, tmpdir):
+    write(tmpdir, {'keep.py': 'keep', 'change.py': 'changed'})
+    gist = server.add_gist(files={'keep.py': 'keep', 'change.py': 'before', 'drop.py': 'drop'})
+    pygists = Pygists(server.username, 'token', base_url=server.url)
+
+    synced = pygists.sync_gist_from_dir(gist['id'], str(tmpdir))
+
+    assert {file.filename: file.content for file in synced.files} == {
+        'keep.py': 'keep', 'change.py': 'changed'
+    }
+    assert tmpdir.join(STATE_FILE).check()
+
+    requests = len(server.requests)
+    pygists.sync_gist_from_dir(gist['id'], str(tmpdir))
+    assert [method for method, _, _ in server.requests[requests:]] == ['GET']
+
+    tmpdir.join('change.py').rename(tmpdir.join('renamed.py'))
+    synced = pygists.sync_gist_from_dir(gist['id'], str(tmpdir), description='Renamed')
+
+    assert synced.description == 'Renamed'
+    assert {file.filename: file.content for file in synced.files} == {
+        'keep.py': 'keep', 'renamed.py': 'changed'
+    }
+    assert not [r for r in server.requests if '/raw/' in r[1]]
+
+
+def test_sync_gist_from_dir_keeps_line_endings(server, tmpdir):
+    tmpdir.join('crlf.txt').write_binary('caf\u00e9\r\n'.encode() * 3)
+    gist = server.add_gist(files={'crlf.txt': 'before'})
+    pygists = Pygists(server.username, 'token', base_url=server.url)
+
+    synced = pygists.sync_gist_from_dir(gist['id'], str(tmpdir))
+    requests = len(server.requests)
+    pygists.sync_gist_from_dir(gist['id'], str(tmpdir))
+
+    assert synced.files[0].content == 'caf\u00e9\r\n' * 3
+    assert [method for method, _, _ in server.requests[requests:]] == ['GET']
+
+
+def test_sync_gist_from_dir_keeps_dotfiles(server, tmpdir):
+    write(tmpdir, {'.vimrc': 'set number', 'a.txt': 'a'})
+    gist = server.add_gist(files={'.vimrc': 'set number', 'a.txt': 'a'})
+    pygists = Pygists(server.username, 'token', base_url=server.url)
+
+    pygists.sync_gist_from_dir(gist['id'], str(tmpdir))
+    tmpdir.join('.bashrc').write('alias ll="ls -l"')
+    synced = pygists.sync_gist_from_dir(gist['id'], str(tmpdir))
+
+    assert sorted(file.filename for file in synced.files) == ['.bashrc', '.vimrc', 'a.txt']
+    assert [method for method, _, _ in server.requests] == ['GET', 'GET', 'PATCH']
@@ -0,0 +1,88 @@
+import datetime as dt
+
+import pytest
+
+from pygists.graphql import GraphQLError, gists_query
+from pygists.pygists import Pygists
+
+
+def graphql_requests(server):
+    return [r for r in server.requests if r[1] == '/graphql']
+
+
+def test_gists_query_aliases_every_lookup():
+    query = gists_query(2, content=False)
+
+    assert 'query($login: String!, $g0: String!, $g1: String!)' in query
+    assert 'g0: gist(name: $g0) { ...gist }' in query
+    assert 'text' not in query
+    assert 'text isTruncated' in gists_query(1, content=True)
+
+
+def test_get_gists_batches_lookups_into_few_queries(server):
+    ids = server.populate(120, files_per_gist=2)
+    ids.insert(60, 'missing')
+    rest = Pygists('test_user', 'test_token', base_url=server.url).get_gists(ids[:5])
+    pygists = Pygists('test_user', 'test_token', base_url=server.url, transport='graphql')
+    reported = []
+
+    results = pygists.get_gists(ids, progress=lambda done, total, _: reported.append((done, total)))
+
+    assert len(graphql_requests(server)) == 3
+    assert [result.id for result in results] == ids
+    assert [r.gist.to_dict(True) for r in results[:5]] == [r.gist.to_dict(True) for r in rest]
+    assert results[0].gist.files[0].content is not None
+    assert results[60].gist is None
+    assert isinstance(results[60].error, GraphQLError)
+    assert results[60].error.type == 'NOT_FOUND'
+    assert reported[-1] == (121, 121)
+
+
+def test_get_gists_without_content_only_fetches_metadata(server):
+    ids = server.populate(3)
+    pygists = Pygists('test_user', 'test_token', base_url=server.url, transport='graphql')
+
+    results = pygists.get_gists(ids, content=False)
+
+    files = [file for result in results for file in result.gist.files]
+    assert [(file.filename, file.size, file.content) for file in files] == [('file_0.py', 100, None)] * 3
+
+
+def test_truncated_files_are_read_from_the_raw_base_url(server):
+    gist_id = server.add_gist(files={'big.py': 'print(1)\n' * 100}, truncate=10)['id']
+    pygists = Pygists('test_user', 'test_token', base_url=server.url, transport='graphql')
+
+    file = pygists.get_gists([gist_id])[0].gist.files[0]
+
+    assert file.truncated is True
+    assert file.raw_url == f'{server.url.rstrip("/")}/test_user/{gist_id}/raw/big.py'
+    assert pygists.read_file(file) == 'print(1)\n' * 100
+    assert Pygists('test_user', 'test_token').raw_base_url == 'https://gist.githubusercontent.com/'
+
+
+def test_failed_queries_are_recorded_for_every_gist_of_the_batch(server):
+    ids = server.populate(2)
+    pygists = Pygists('someone_else', 'test_token', base_url=server.url, transport='graphql')
+
+    results = pygists.get_gists(ids)
+
+    assert [str(result.error) for result in results] == ['Could not resolve to a User'] * 2
+
+
+def test_list_gists_follows_cursors(server):
+    server.populate(25)
+    rest = Pygists('test_user', 'test_token', base_url=server.url).list_user_gists()
+    pygists = Pygists('test_user', 'test_token', base_url=server.url, transport='graphql')
+
+    listed = pygists.list_user_gists(per_page=10)
+    since = pygists.list_user_gists(since=dt.datetime(2019, 1, 1, 0, 0, 20), per_page=10)
+
+    assert [gist.to_dict() for gist in listed] == [gist.to_dict() for gist in rest]
+    assert len(since) == 5
+    # The listing since a date stops at the first older gist, here on its first page
+    assert len(graphql_requests(server)) == 3 + 1
+
+
+def test_unknown_transport():
+    with pytest.raises(ValueError, match='Unknown transport'):
+        Pygists('test_user', 'test_token', transport='soap')
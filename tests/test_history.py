@@ -0,0 +1,108 @@
+from pygists.cli import create_parser, run
+from pygists.models.gist import Gist, GistRevision
+from pygists.pygists import Pygists
+from pygists.revisions import RevisionStore
+from tests.utils import gist_data
+
+
+def edit(pygists, gist_id, files):
+    return pygists.edit_gist(gist_id, files={name: {'content': content} for name, content in files.items()})
+
+
+def test_gist_keeps_history():
+    resp = gist_data()
+    resp['history'] = [{
+        'user': resp['owner'], 'version': 'abc', 'committed_at': '2019-01-02T10:00:20Z',
+        'change_status': {'total': 3, 'additions': 2, 'deletions': 1},
+        'url': 'https://api.github.com/gists/1/abc',
+    }]
+
+    revision = Gist.from_response(resp).history[0]
+
+    assert isinstance(revision, GistRevision)
+    assert (revision.version, revision.additions, revision.deletions) == ('abc', 2, 1)
+    assert revision.user.login == 'test_user'
+    assert revision.to_text() == 'abc | 2019-01-02 10:00:20 | test_user | +2 -1'
+    assert Gist.from_response(gist_data()).history is None
+
+
+def test_iter_gist_history_pages_lazily(server):
+    gist = server.add_gist(files={'a.py': 'one'})
+    pygists = Pygists(server.username, 'token', base_url=server.url)
+    for content in ('two', 'three'):
+        edit(pygists, gist['id'], {'a.py': content})
+
+    requests = len(server.requests)
+    history = pygists.iter_gist_history(gist['id'], per_page=2)
+    assert len(server.requests) == requests
+
+    latest = next(history)
+    assert len(server.requests) == requests + 1
+    assert [latest] + list(history) == pygists.get_gist(gist['id']).history
+    assert len(server.requests) == requests + 3
+
+
+def test_get_gist_revision(server):
+    gist = server.add_gist(files={'a.py': 'first'})
+    pygists = Pygists(server.username, 'token', base_url=server.url)
+    edit(pygists, gist['id'], {'a.py': 'second'})
+
+    first = list(pygists.iter_gist_history(gist['id']))[-1]
+    revision = pygists.get_gist_revision(gist['id'], first.version)
+
+    assert revision.files[0].content == 'first'
+
+
+def test_revision_store_deduplicates_contents(server, tmpdir):
+    gist = server.add_gist(files={'big.txt': 'unchanged ' * 1000, 'a.py': 'v0'})
+    pygists = Pygists(server.username, 'token', base_url=server.url)
+    for i in range(1, 4):
+        edit(pygists, gist['id'], {'a.py': f'v{i}'})
+    store = RevisionStore(tmpdir)
+
+    results = store.archive(pygists, gist['id'])
+
+    assert len(results) == 4
+    assert all(result.error is None for result in results)
+    # One copy of big.txt and one of every version of a.py instead of 8 files
+    assert len(tmpdir.join('objects').listdir()) == 5
+    assert not [r for r in server.requests if '/raw/' in r[1]]
+
+    versions = store.versions(gist['id'])
+    assert versions == [revision.version for revision in pygists.iter_gist_history(gist['id'])]
+    assert store.read(gist['id'], versions[-1]) == {'big.txt': b'unchanged ' * 1000, 'a.py': b'v0'}
+
+    edit(pygists, gist['id'], {'a.py': 'v4'})
+    assert [result.id for result in store.archive(pygists, gist['id'])] == [
+        next(pygists.iter_gist_history(gist['id'])).version
+    ]
+
+
+def test_revision_store_keeps_exact_contents(server, tmpdir):
+    content = 'caf\u00e9\r\n' * 100
+    gist = server.add_gist(files={'crlf.txt': content}, truncate=10)
+    pygists = Pygists(server.username, 'token', base_url=server.url)
+    store = RevisionStore(tmpdir)
+
+    store.archive(pygists, gist['id'])
+
+    version = store.versions(gist['id'])[0]
+    assert store.read(gist['id'], version) == {'crlf.txt': content.encode()}
+    # Stored under the hash of its raw URL, so the next revision holding it is not downloaded again
+    sha = store.manifest(gist['id'], version)['files']['crlf.txt']
+    assert sha in gist['files']['crlf.txt']['raw_url']
+
+
+def test_history_subcommand(server, capsys):
+    gist = server.add_gist(files={'a.py': 'first'})
+    pygists = Pygists(server.username, 'token', base_url=server.url)
+    edit(pygists, gist['id'], {'a.py': 'first\nsecond'})
+
+    run(create_parser().parse_args(['history', gist['id'], '--limit', '1']), pygists)
+    out = capsys.readouterr().out
+    assert out.count(' | test_user | +1 -0') == 1
+
+    run(create_parser().parse_args(['history', gist['id'], '--show-content', '--ndjson']), pygists)
+    out = capsys.readouterr().out.splitlines()
+    assert len(out) == 2
+    assert '"content": "first"' in out[1]
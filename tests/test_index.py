@@ -0,0 +1,82 @@
+import unittest.mock
+
+import pytest
+
+from pygists import Pygists
+from pygists.index import GistIndex, fts_query
+
+
+@pytest.fixture
+def server(server):
+    server.add_gist(
+        description='Parse CSV files quickly', files={'parse.py': 'import csv'},
+        updated_at='2019-01-01T10:00:00Z'
+    )
+    server.add_gist(
+        description='Shell helpers', files={'helpers.sh': 'echo "csv"', 'notes.md': '# Notes'},
+        updated_at='2019-01-02T10:00:00Z'
+    )
+    return server
+
+
+@pytest.fixture
+def pygists(server, tmpdir):
+    return Pygists(
+        'test_user', 'test_token', base_url=server.url, index=GistIndex(tmpdir.join('index.sqlite3'))
+    )
+
+
+def test_search_by_description_filename_and_language(pygists):
+    assert [g.description for g in pygists.search('csv')] == ['Parse CSV files quickly']
+    assert [g.description for g in pygists.search('help', refresh=False)] == ['Shell helpers']
+    assert [g.description for g in pygists.search(language='python', refresh=False)] == [
+        'Parse CSV files quickly'
+    ]
+    assert [g.description for g in pygists.search(filename='.md', refresh=False)] == ['Shell helpers']
+    assert [g.description for g in pygists.search(refresh=False)] == [
+        'Shell helpers', 'Parse CSV files quickly'
+    ]
+    files = pygists.search('shell', refresh=False)[0].files
+    assert [(f.filename, f.language) for f in files] == [('helpers.sh', 'Shell'), ('notes.md', 'Markdown')]
+
+
+def test_refresh_is_incremental(pygists, server):
+    assert pygists.index.refresh(pygists) == 2
+    assert pygists.index.watermark.isoformat() == '2019-01-02T10:00:00'
+
+    server.add_gist(description='New gist', updated_at='2019-01-03T10:00:00Z')
+    server.requests.clear()
+
+    assert pygists.index.refresh(pygists) == 2
+    assert len(pygists.index) == 3
+    assert server.requests == [
+        ('GET', '/users/test_user/gists', {'per_page': '100', 'since': '2019-01-02T10:00:00'})
+    ]
+
+
+def test_full_refresh_drops_deleted_gists(pygists, server):
+    pygists.index.refresh(pygists)
+    del server.gists[next(iter(server.gists))]
+
+    pygists.index.refresh(pygists, full=True)
+
+    assert [g.description for g in pygists.search(refresh=False)] == ['Shell helpers']
+
+
+def test_search_indexed_content(pygists):
+    pygists.index.refresh(pygists, with_content=True)
+
+    assert [g.description for g in pygists.search('echo', refresh=False)] == ['Shell helpers']
+
+
+def test_search_without_fts(pygists, tmpdir):
+    with unittest.mock.patch('pygists.index.FTS_SCHEMA', 'CREATE VIRTUAL TABLE t USING missing_module(a)'):
+        index = GistIndex(tmpdir.join('nofts.sqlite3'))
+    assert index.fts is False
+
+    index.refresh(pygists)
+    assert [g.description for g in index.search('csv')] == ['Parse CSV files quickly']
+
+
+def test_fts_query_quotes_terms():
+    assert fts_query('csv "parse" OR') == '"csv"* """parse"""* "OR"*'
@@ -0,0 +1,100 @@
+import logging
+import unittest.mock
+
+import pytest
+import requests
+
+from pygists.cli import create_parser, run
+from pygists.metrics import LoggingSink, MemorySink, MultiSink, PrometheusSink
+from pygists.pygists import Pygists
+from pygists.ratelimit import RateLimiter
+from tests.utils import gist_data, make_response
+
+
+def test_memory_sink_aggregates_by_name_and_labels():
+    sink = MemorySink()
+    for value in (0.1, 0.2, 0.3, 0.4):
+        sink.observe('request_seconds', value, {'method': 'GET'})
+    sink.observe('request_seconds', 1.0, {'method': 'POST'})
+
+    histogram = sink.get('request_seconds', method='GET')
+    assert histogram.count == 4
+    assert histogram.mean == 0.25
+    assert histogram.quantile(0.5) == 0.3
+    assert histogram.max == 0.4
+    assert sink.total('request_seconds') == 2.0
+    assert 'request_seconds  method=POST' in sink.summary()
+
+
+def test_prometheus_sink_renders_histograms_and_gauges(tmpdir):
+    sink = PrometheusSink(tmpdir.join('pygists.prom'))
+    sink.observe('request_seconds', 0.02, {'method': 'GET', 'status': '200'})
+    sink.observe('request_seconds', 3, {'method': 'GET', 'status': '200'})
+    sink.observe('ratelimit_remaining', 4999)
+    sink.observe('ratelimit_remaining', 4998)
+    sink.flush()
+
+    text = tmpdir.join('pygists.prom').read()
+    assert '# TYPE pygists_request_seconds histogram' in text
+    assert 'pygists_request_seconds_bucket{method="GET",status="200",le="0.025"} 1' in text
+    assert 'pygists_request_seconds_bucket{method="GET",status="200",le="+Inf"} 2' in text
+    assert 'pygists_request_seconds_count{method="GET",status="200"} 2' in text
+    assert '# TYPE pygists_ratelimit_remaining gauge\npygists_ratelimit_remaining 4998' in text
+
+
+def test_logging_and_multi_sinks(caplog):
+    memory = MemorySink()
+    with caplog.at_level(logging.DEBUG, logger='pygists.metrics'):
+        MultiSink(memory, LoggingSink()).observe('retries', 1, {'reason': '503'})
+
+    assert memory.get('retries', reason='503').count == 1
+    assert 'retries reason=503 1' in caplog.text
+
+
+@pytest.mark.fake_github(rate_limit=100)
+def test_requests_and_parsing_are_instrumented(server):
+    sink = MemorySink()
+    ids = server.populate(3, file_size=1000)
+    pygists = Pygists(server.username, 'token', base_url=server.url, metrics=sink)
+
+    assert len(pygists.list_user_gists()) == 3
+    pygists.get_gist(ids[0])
+
+    assert sink.get('request_seconds', method='GET', status='200').count == 2
+    assert sink.get('download_seconds', method='GET').count == 2
+    assert sink.get('response_bytes', method='GET').sum > 1000
+    assert sink.get('decode_seconds').count == 2
+    assert sink.get('parse_seconds').count == 2
+    assert sink.get('ratelimit_remaining').last == 98
+
+
+@unittest.mock.patch('requests.Session.get')
+def test_retries_are_counted(mock_get):
+    def response(status_code, body=None):
+        r = make_response(body, status_code=status_code)
+        r.request = requests.Request('GET', 'https://api.github.com/gists/1').prepare()
+        return r
+
+    mock_get.side_effect = [response(503), response(200, gist_data())]
+    sink = MemorySink()
+    pygists = Pygists(
+        'test_user', 'test_token', metrics=sink, rate_limiter=RateLimiter(sleep=lambda _: None)
+    )
+
+    pygists.get_gist('1')
+
+    assert sink.get('retries', method='GET', reason='503').count == 1
+    assert sink.get('request_seconds', method='GET', status='503').count == 1
+
+
+def test_profile_prints_summary_and_writes_metrics_file(server, tmpdir, capsys):
+    path = tmpdir.join('pygists.prom')
+    parsed = create_parser().parse_args(['ls', '--profile', '--metrics-file', str(path)])
+    server.populate(2)
+    pygists = Pygists(server.username, 'token', base_url=server.url, metrics=PrometheusSink(str(path)))
+    assert run(parsed, pygists) == 0
+
+    err = capsys.readouterr().err
+    assert err.startswith('metric')
+    assert 'parse_seconds' in err
+    assert 'pygists_request_seconds_count{method="GET",status="200"} 1' in path.read()
@@ -0,0 +1,68 @@
+import json
+import unittest.mock
+
+from pygists import Pygists
+from pygists.mirror import Mirror
+
+
+def test_sync_mirrors_gists_incrementally(server, tmpdir):
+    first = server.add_gist(files={'a.py': 'a'}, updated_at='2019-01-01T10:00:00Z')['id']
+    second = server.add_gist(
+        files={'b.py': 'b' * 50}, updated_at='2019-01-02T10:00:00Z', truncate=10
+    )['id']
+    pygists = Pygists('test_user', 'test_token', base_url=server.url)
+
+    results = Mirror(pygists, tmpdir).sync()
+    assert sorted(r.id for r in results) == sorted([first, second])
+    assert tmpdir.join(first, 'a.py').read() == 'a'
+    assert tmpdir.join(second, 'b.py').read() == 'b' * 50
+
+    manifest = json.loads(tmpdir.join('manifest.json').read())
+    assert manifest['watermark'] == '2019-01-02T10:00:00Z'
+    assert manifest['gists'][second]['files'] == {'b.py': 50}
+
+    server.gists[first]['updated_at'] = '2019-01-03T10:00:00Z'
+    server.gists[first]['files'] = {'c.py': dict(server.gists[first]['files']['a.py'], filename='c.py')}
+    server.requests.clear()
+
+    results = Mirror(pygists, tmpdir).sync()
+    assert [r.id for r in results] == [first]
+    assert tmpdir.join(first).listdir() == [tmpdir.join(first, 'c.py')]
+    assert ('GET', '/users/test_user/gists', {'per_page': '100', 'since': '2019-01-02T10:00:00'}) \
+        in server.requests
+    assert not [r for r in server.requests if r[1] == f'/gists/{second}']
+
+
+def test_interrupted_sync_resumes_without_refetching(server, tmpdir):
+    ids = [server.add_gist(updated_at=f'2019-01-0{day}T10:00:00Z')['id'] for day in range(1, 4)]
+    pygists = Pygists('test_user', 'test_token', base_url=server.url, max_workers=1)
+
+    responses = [pygists.get_gist(ids[2]), OSError(), OSError()]
+    with unittest.mock.patch.object(pygists, 'get_gist', side_effect=responses):
+        results = Mirror(pygists, tmpdir).sync()
+    assert [r.error is None for r in results] == [True, False, False]
+    assert json.loads(tmpdir.join('manifest.json').read())['watermark'] is None
+
+    server.requests.clear()
+    results = Mirror(pygists, tmpdir).sync()
+
+    assert sorted(r.id for r in results) == sorted(ids[:2])
+    assert all(r.error is None for r in results)
+    assert not [r for r in server.requests if r[1] == f'/gists/{ids[2]}']
+
+
+def test_sync_keeps_exact_contents_and_prunes_hidden_files(server, tmpdir):
+    content = 'café\r\n' * 3
+    gist_id = server.add_gist(
+        files={'.env': content, '.hidden': 'x'}, updated_at='2019-01-01T10:00:00Z'
+    )['id']
+    pygists = Pygists('test_user', 'test_token', base_url=server.url)
+
+    Mirror(pygists, tmpdir).sync()
+    assert tmpdir.join(gist_id, '.env').read_binary() == content.encode()
+
+    server.gists[gist_id]['updated_at'] = '2019-01-02T10:00:00Z'
+    del server.gists[gist_id]['files']['.hidden']
+    Mirror(pygists, tmpdir).sync()
+
+    assert tmpdir.join(gist_id).listdir() == [tmpdir.join(gist_id, '.env')]
@@ -0,0 +1,63 @@
+import datetime as dt
+
+from pygists.models.gist import Gist, GistFile, GistOwner
+from tests.utils import gist_data
+
+
+def test_gist_from_response():
+    resp = gist_data(files={'test.py': 'print("Hello World!")', 'README.md': '# Test'})
+    gist = Gist.from_response(resp)
+
+    assert gist.id == '1a2b3c4d5e6f'
+    assert gist.created_at == dt.datetime(2019, 1, 1, 10, 0, 20)
+    assert gist.updated_at == dt.datetime(2019, 1, 2, 10, 0, 20)
+    assert gist.owner.login == 'test_user'
+    assert gist.script_url == 'https://gist.github.com/test_user/1a2b3c4d5e6f.js'
+    assert [f.filename for f in gist.files] == ['test.py', 'README.md']
+    assert gist.files[0] == GistFile(
+        'test.py', 'application/x-python', 'Python', resp['files']['test.py']['raw_url'], 21, False,
+        'print("Hello World!")'
+    )
+    assert resp == gist_data(files={'test.py': 'print("Hello World!")', 'README.md': '# Test'})
+
+
+def test_gist_from_response_tolerates_missing_and_unknown_fields():
+    resp = gist_data()
+    del resp['files']['test.py']['content']
+    resp['files']['test.py']['encoding'] = 'utf-8'
+    del resp['comments']
+    resp['history'] = []
+
+    gist = Gist.from_response(resp)
+
+    assert gist.files[0].content is None
+    assert gist.comments is None
+
+
+def test_owners_are_shared_across_gists():
+    first, second = Gist.from_response(gist_data('first')), Gist.from_response(gist_data('second'))
+    other = Gist.from_response(gist_data('third', login='other_user'))
+
+    assert first.owner is second.owner
+    assert other.owner.login == 'other_user'
+    assert isinstance(first.owner, GistOwner)
+
+
+def test_gist_init_applies_transformations():
+    resp = gist_data()
+    gist = Gist(
+        id=resp['id'], created_at=resp['created_at'], owner=resp['owner'],
+        files=list(resp['files'].values())
+    )
+
+    assert gist.created_at == dt.datetime(2019, 1, 1, 10, 0, 20)
+    assert gist.owner.login == 'test_user'
+    assert gist.files[0].filename == 'test.py'
+
+
+def test_model_records_have_no_instance_dict():
+    gist = Gist.from_response(gist_data())
+
+    assert not hasattr(gist, '__dict__')
+    assert not hasattr(gist.files[0], '__dict__')
+    assert not hasattr(gist.owner, '__dict__')
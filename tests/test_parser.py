@@ -38,11 +38,24 @@ def test_parse_get_command():
     assert args.subcommand == 'get'
     assert args.username == 'test_user'
     assert args.token == 'test_token'
-    assert args.id == '1a2b3c4d5e6f'
+    assert args.id == ['1a2b3c4d5e6f']
     assert args.json is True
     assert args.show_content is False
 
 
+def test_parse_get_many_command(tmpdir):
+    ids = tmpdir.join('ids.txt')
+    ids.write('abc\ndef\n')
+    parser = create_parser()
+    args = parser.parse_args([
+        'get', '1a2b3c4d5e6f', '1a2b3c4d5e6g', '--from-file', str(ids), '-w', '8',
+    ])
+
+    assert args.id == ['1a2b3c4d5e6f', '1a2b3c4d5e6g']
+    assert args.from_file.read() == 'abc\ndef\n'
+    assert args.max_workers == 8
+
+
 def test_parse_update_command():
     parser = create_parser()
     args = parser.parse_args([
@@ -70,4 +83,28 @@ def test_parse_delete_command():
     assert args.subcommand == 'delete'
     assert args.username == 'test_user'
     assert args.token == 'test_token'
-    assert args.id == '1a2b3c4d5e6f'
+    assert args.id == ['1a2b3c4d5e6f']
+
+
+def test_parse_create_batch_command():
+    parser = create_parser()
+    args = parser.parse_args([
+        'create', '--batch', 'manifest.json', '-u', 'test_user', '-t', 'test_token',
+    ])
+
+    assert args.subcommand == 'create'
+    assert args.file == []
+    assert args.batch == 'manifest.json'
+
+
+def test_parse_search_command():
+    parser = create_parser()
+    args = parser.parse_args([
+        'search', 'csv parser', '--language', 'Python', '--offline', '-u', 'test_user', '-t', 'test_token',
+    ])
+
+    assert args.subcommand == 'search'
+    assert args.query == 'csv parser'
+    assert args.language == 'Python'
+    assert args.offline is True
+    assert args.full_refresh is False
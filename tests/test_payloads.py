@@ -0,0 +1,71 @@
+import json
+import unittest.mock
+
+import pytest
+
+from pygists import Pygists
+from pygists import payloads
+from pygists.payloads import StreamingPayload, UploadFile, upload_edit_files, upload_files
+
+CONTENT = 'print("Hello World!")\n\ttabs, "quotes", \\backslashes\\ and ünïcødé 🐍\n' * 50
+
+
+@pytest.fixture
+def files(tmpdir):
+    first = tmpdir.join('first.py')
+    first.write_text(CONTENT, encoding='utf-8')
+    second = tmpdir.join('second.py')
+    second.write_text('', encoding='utf-8')
+    return str(first), str(second)
+
+
+def test_streaming_payload_is_valid_json(files):
+    payload = StreamingPayload(upload_files(*files), {'description': 'Testing', 'public': True}, chunk_size=7)
+    chunks = list(payload)
+
+    assert max(len(chunk) for chunk in chunks) <= 7 * 12
+    assert json.loads(b''.join(chunks)) == {
+        'files': {'first.py': {'content': CONTENT}, 'second.py': {'content': ''}},
+        'description': 'Testing',
+        'public': True,
+    }
+    assert b''.join(payload) == b''.join(chunks)
+
+
+def test_streaming_edit_payload(files):
+    uploads = upload_edit_files([files[0]], ['deleted.py'], {'old.py': files[1]})
+
+    assert uploads['old.py'] == UploadFile(uploads['old.py'].path, 'second.py')
+    assert json.loads(b''.join(StreamingPayload(uploads))) == {
+        'files': {
+            'first.py': {'content': CONTENT},
+            'deleted.py': None,
+            'old.py': {'content': '', 'filename': 'second.py'},
+        }
+    }
+
+
+def test_large_files_fail_before_sending(files):
+    with unittest.mock.patch.object(payloads, 'MAX_FILE_SIZE', 10):
+        with pytest.raises(ValueError, match='first.py'):
+            StreamingPayload(upload_files(*files))
+
+    with unittest.mock.patch.object(payloads, 'MAX_GIST_FILES', 1):
+        with pytest.raises(ValueError, match='at most 1 files'):
+            StreamingPayload(upload_files(*files))
+
+
+def test_create_and_edit_gist_from_files_stream_the_body(server, files, tmpdir):
+    renamed = tmpdir.join('renamed.py')
+    renamed.write('print("Renamed")')
+
+    pygists = Pygists('test_user', 'test_token', base_url=server.url)
+    created = pygists.create_gist_from_files(*files, description='Testing')
+    edited = pygists.edit_gist_from_files(
+        to_add=[], to_delete=['second.py'], to_modify={'first.py': str(renamed)},
+        gist_id=created.id, description='Edited'
+    )
+
+    assert {f.filename: f.content for f in created.files} == {'first.py': CONTENT, 'second.py': ''}
+    assert edited.description == 'Edited'
+    assert {f.filename: f.content for f in edited.files} == {'renamed.py': 'print("Renamed")'}
@@ -0,0 +1,72 @@
+import pytest
+
+from pygists.cli import create_parser
+from pygists.pool import Credential, CredentialPool
+from pygists.pygists import Pygists
+from pygists.ratelimit import RateLimiter
+from tests.utils import make_response
+
+
+def credential(username, remaining=None):
+    limiter = RateLimiter()
+    if remaining is not None:
+        limiter.update(make_response(headers={'X-RateLimit-Remaining': str(remaining)}))
+    return Credential(username, 'token', limiter)
+
+
+def test_reads_go_to_the_most_budget_and_writes_to_the_owner():
+    owner, rich, poor = credential('owner', 100), credential('rich', 4000), credential('poor', 10)
+    pool = CredentialPool(owner, [rich, poor])
+
+    assert pool.acquire(read=True) is rich
+    assert pool.acquire(read=False) is owner
+    assert (owner.in_flight, rich.in_flight) == (1, 1)
+
+    pool.release(rich)
+    assert rich.in_flight == 0
+
+
+def test_requests_in_flight_spread_reads_before_budgets_are_known():
+    pool = CredentialPool(credential('a'), [credential('b'), credential('c')])
+
+    picked = {pool.acquire(read=True).username for _ in range(3)}
+
+    assert picked == {'a', 'b', 'c'}
+
+
+@pytest.mark.fake_github(rate_limit=1000)
+def test_reads_are_spread_over_the_pool_with_independent_budgets(server):
+    ids = server.populate(30)
+    pygists = Pygists(
+        server.username, 'token', base_url=server.url, max_workers=6,
+        token_pool=[('reader_1', 'token_1'), ('reader_2', 'token_2')],
+    )
+
+    results = pygists.get_gists(ids)
+    pygists.edit_gist(ids[0], new_description='Edited by the owner')
+
+    assert all(result.error is None for result in results)
+    reads = {login: server.logins[login] for login in ('test_user', 'reader_1', 'reader_2')}
+    assert sum(reads.values()) == 31
+    assert min(reads.values()) >= 5
+    # Each token only spent its own budget
+    limits = pygists.rate_limits
+    assert sorted(limits) == ['reader_1', 'reader_2', 'test_user']
+    assert {login: 1000 - limits[login].remaining for login in limits} == reads
+
+
+def test_single_token_keeps_one_session():
+    pygists = Pygists('test_user', 'test_token')
+
+    assert len(pygists.credentials) == 1
+    assert pygists.session is pygists.session
+
+
+@pytest.mark.parametrize('value,expected', [
+    ('a:1,b:2', [('a', '1'), ('b', '2')]),
+    ('a:1:x, ', [('a', '1:x')]),
+])
+def test_token_pool_argument(value, expected):
+    parsed = create_parser().parse_args(['ls', '--token-pool', value])
+
+    assert parsed.token_pool == expected
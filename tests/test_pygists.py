@@ -1,9 +1,12 @@
 import datetime as dt
+import json
 import unittest.mock
 
 import pytest
 
 from pygists import Pygists
+from pygists.payloads import read_manifest
+from tests.utils import gist_data, make_response
 
 
 @pytest.fixture
@@ -15,9 +18,16 @@ def test_pygist_init(gist):
     assert gist.session.auth == ('test_user', 'test_token')
 
 
+def test_session_pool_scales_with_workers():
+    session = Pygists('test_user', 'test_token', max_workers=32).session
+
+    assert session.get_adapter('https://api.github.com/')._pool_maxsize == 32
+
+
 @unittest.mock.patch('requests.Session.post')
 def test_create_single_gist_request(mock_post, gist):
     """Single name and content gist request respects docs format"""
+    mock_post.return_value = make_response(gist_data(), status_code=201)
 
     gist.create_gist(['test.py'], ['print("Hello World!")'], 'Testing', True)
 
@@ -34,6 +44,7 @@ def test_create_single_gist_request(mock_post, gist):
 @unittest.mock.patch('requests.Session.post')
 def test_create_multiple_gist_request(mock_post, gist):
     """Multiple names and contents gist request respects docs format"""
+    mock_post.return_value = make_response(gist_data(), status_code=201)
 
     gist.create_gist(
         ['test.py', 'test2.py'],
@@ -58,23 +69,77 @@ def test_create_multiple_gist_request(mock_post, gist):
 @unittest.mock.patch('requests.Session.get')
 def test_list_gists_request(mock_get, gist):
     """Properly pass gist request"""
+    mock_get.return_value = make_response([])
 
     gist.list_user_gists()
     mock_get.assert_called_with(
         'https://api.github.com/users/test_user/gists',
-        params=None
+        params={'per_page': 100}
     )
 
-    gist.list_user_gists(since=dt.datetime(2019, 1, 1, 10, 0, 20))
+    gist.list_user_gists(since=dt.datetime(2019, 1, 1, 10, 0, 20), per_page=30)
     mock_get.assert_called_with(
         'https://api.github.com/users/test_user/gists',
-        params={'since': '2019-01-01T10:00:20'}
+        params={'per_page': 30, 'since': '2019-01-01T10:00:20'}
     )
 
 
+@unittest.mock.patch('requests.Session.get')
+def test_list_gists_follows_next_link(mock_get, gist):
+    """Follow Link: rel="next" headers until the last page"""
+    next_url = 'https://api.github.com/user/1/gists?per_page=1&page=2'
+    mock_get.side_effect = [
+        make_response([gist_data('first')], headers={'Link': f'<{next_url}>; rel="next"'}),
+        make_response([gist_data('second')]),
+    ]
+
+    gists = gist.list_user_gists(per_page=1)
+
+    assert [g.id for g in gists] == ['first', 'second']
+    mock_get.assert_called_with(next_url, params=None)
+
+
+@unittest.mock.patch('requests.Session.get')
+def test_iter_gists_is_lazy(mock_get, gist):
+    """Only request the next page once the current one is exhausted"""
+    next_url = 'https://api.github.com/user/1/gists?per_page=1&page=2'
+    mock_get.side_effect = [
+        make_response([gist_data('first')], headers={'Link': f'<{next_url}>; rel="next"'}),
+        make_response([gist_data('second')]),
+    ]
+
+    gists = gist.iter_user_gists(per_page=1)
+
+    assert next(gists).id == 'first'
+    assert mock_get.call_count == 1
+    assert next(gists).id == 'second'
+    assert mock_get.call_count == 2
+
+
+@unittest.mock.patch('requests.Session.get')
+def test_list_gists_prefetches_pages(mock_get):
+    """Fetch every page up to rel="last" concurrently and keep gists in page order"""
+    base = 'https://api.github.com/user/1/gists?per_page=1'
+    links = f'<{base}&page=2>; rel="next", <{base}&page=5>; rel="last"'
+
+    def get(url, params=None):
+        if params is not None:
+            return make_response([gist_data('page-1')], headers={'Link': links})
+        page = url.rsplit('=', 1)[1]
+        return make_response([gist_data(f'page-{page}')])
+
+    mock_get.side_effect = get
+    gists = Pygists('test_user', 'test_token', max_workers=3).list_user_gists(per_page=1)
+
+    assert [g.id for g in gists] == [f'page-{page}' for page in range(1, 6)]
+    assert mock_get.call_count == 5
+    assert {c[0][0] for c in mock_get.call_args_list[1:]} == {f'{base}&page={p}' for p in range(2, 6)}
+
+
 @unittest.mock.patch('requests.Session.patch')
 def test_edit_gist_request(mock_patch, gist):
     """Properly pass gist edit request"""
+    mock_patch.return_value = make_response(gist_data())
     files = {
         'test.py': {'content': 'print("Hello World!")'},
         'test2.py': {'content': 'print("New Hello World!")', 'filename': 'new_test.py'},
@@ -95,3 +160,73 @@ def test_edit_gist_request(mock_patch, gist):
             'description': 'New Testing'
         }
     )
+
+
+def test_get_gists_keeps_order_and_collects_errors(server):
+    ids = [server.add_gist()['id'] for _ in range(10)]
+    ids.insert(3, 'missing')
+
+    results = Pygists('test_user', 'test_token', max_workers=4, base_url=server.url).get_gists(ids)
+
+    assert [r.id for r in results] == ids
+    assert [r.gist.id for r in results if r.gist is not None] == [i for i in ids if i != 'missing']
+    assert results[3].gist is None
+    assert results[3].error.response.status_code == 404
+
+
+def test_truncated_files_are_fetched_from_raw_url(server, tmpdir):
+    content = 'print("Hello World!")\n' * 100
+    gist_id = server.add_gist(files={'big.py': content, 'small.py': 'pass'}, truncate=10)['id']
+    pygists = Pygists('test_user', 'test_token', base_url=server.url, raw_dir=tmpdir.join('raw'))
+    big, small = pygists.get_gist(gist_id).files
+
+    assert big.truncated is True
+    assert big.content == content[:10]
+    assert pygists.read_file(small) == 'pass'
+    assert pygists.read_file(big) == content
+    assert pygists.read_file(big) == content
+    assert pygists.map_file(big)[:] == content.encode()
+    assert pygists.download_file(big, tmpdir.join('big.py')).read_text() == content
+
+    raw_requests = [r for r in server.requests if '/raw/' in r[1]]
+    assert len(raw_requests) == 1
+
+
+def test_truncated_files_keep_line_endings_and_encoding(server, tmpdir):
+    content = 'caf\u00e9\r\n' * 100
+    gist_id = server.add_gist(files={'crlf.txt': content}, truncate=10)['id']
+    pygists = Pygists('test_user', 'test_token', base_url=server.url, raw_dir=tmpdir.join('raw'))
+
+    assert pygists.read_file(pygists.get_gist(gist_id).files[0]) == content
+
+
+def test_bulk_create_and_delete(server, tmpdir):
+    tmpdir.join('a.py').write('a')
+    tmpdir.join('b.py').write('b')
+    manifest = tmpdir.join('manifest.json')
+    manifest.write(json.dumps([
+        {'files': ['a.py'], 'description': 'First'},
+        {'files': ['a.py', 'b.py'], 'description': 'Second', 'public': False},
+        {'files': ['missing.py']},
+    ]))
+    reported = []
+
+    pygists = Pygists('test_user', 'test_token', base_url=server.url)
+    created = pygists.create_gists(
+        read_manifest(manifest), progress=lambda done, total, elapsed: reported.append((done, total))
+    )
+
+    assert [r.gist.description for r in created[:2]] == ['First', 'Second']
+    assert [r.id for r in created[:2]] == [r.gist.id for r in created[:2]]
+    assert created[1].gist.public is False
+    assert created[2].id is None
+    assert isinstance(created[2].error, FileNotFoundError)
+    assert reported == [(1, 3), (2, 3), (3, 3)]
+
+    ids = [r.id for r in created[:2]] + ['missing']
+    deleted = pygists.delete_gists(ids)
+
+    assert [r.id for r in deleted] == ids
+    assert [r.error is None for r in deleted] == [True, True, False]
+    assert deleted[2].error.response.status_code == 404
+    assert server.gists == {}
@@ -0,0 +1,135 @@
+import unittest.mock
+
+import pytest
+import requests
+
+from pygists import Pygists
+from pygists.ratelimit import RateLimiter, is_rate_limited
+from tests.utils import gist_data, make_response
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def gist(clock):
+    return Pygists('test_user', 'test_token', rate_limiter=RateLimiter(clock=clock, sleep=clock.sleep))
+
+
+def budget(remaining, limit=5000, reset=4600):
+    return {
+        'X-RateLimit-Limit': str(limit), 'X-RateLimit-Remaining': str(remaining),
+        'X-RateLimit-Reset': str(reset),
+    }
+
+
+def test_requests_are_not_delayed_with_budget_left(clock):
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    for _ in range(10):
+        limiter.wait()
+        limiter.update(make_response(headers=budget(4000)))
+
+    assert clock.sleeps == []
+    assert limiter.stats.remaining == 4000
+    assert limiter.stats.requests == 10
+
+
+def test_budget_reported_out_of_order_only_goes_down_within_a_window(clock):
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    limiter.update(make_response(headers=budget(4000)))
+    limiter.update(make_response(headers=budget(4001)))
+
+    assert limiter.stats.remaining == 4000
+
+    limiter.update(make_response(headers=budget(5000, reset=8200)))
+
+    assert limiter.stats.remaining == 5000
+
+
+def test_requests_are_spread_out_once_budget_drains(clock):
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    limiter.update(make_response(headers=budget(100, reset=clock.now + 200)))
+
+    limiter.wait()
+    limiter.wait()
+
+    assert clock.sleeps == [pytest.approx(2.0)]
+    assert limiter.stats.throttled == pytest.approx(2.0)
+
+
+def test_requests_wait_for_reset_when_budget_is_exhausted(clock):
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    limiter.update(make_response(headers=budget(0, reset=clock.now + 30)))
+
+    limiter.wait()
+
+    assert clock.sleeps == [pytest.approx(30)]
+
+
+def test_secondary_rate_limit_detection():
+    assert is_rate_limited(make_response({'message': 'secondary rate limit'}, status_code=403))
+    assert is_rate_limited(make_response(status_code=429))
+    assert not is_rate_limited(make_response({'message': 'Forbidden'}, status_code=403))
+
+
+@unittest.mock.patch('requests.Session.get')
+def test_idempotent_requests_are_retried_on_server_errors(mock_get, gist, clock):
+    mock_get.side_effect = [
+        make_response(status_code=502),
+        requests.ConnectionError(),
+        make_response(gist_data()),
+    ]
+
+    assert gist.get_gist('1a2b3c4d5e6f').id == '1a2b3c4d5e6f'
+    assert mock_get.call_count == 3
+    assert len(clock.sleeps) == 2
+    assert gist.rate_limit.retries == 2
+
+
+@unittest.mock.patch('requests.Session.post')
+def test_non_idempotent_requests_are_not_retried_on_server_errors(mock_post, gist):
+    mock_post.return_value = make_response(status_code=500)
+
+    with pytest.raises(requests.HTTPError):
+        gist.create_gist(['test.py'], ['print("Hello World!")'], 'Testing', True)
+    assert mock_post.call_count == 1
+
+
+@unittest.mock.patch('requests.Session.post')
+def test_rate_limited_requests_are_retried_after_delay(mock_post, gist, clock):
+    mock_post.side_effect = [
+        make_response({'message': 'secondary rate limit'}, status_code=403, headers={'Retry-After': '60'}),
+        make_response(gist_data(), status_code=201),
+    ]
+
+    gist.create_gist(['test.py'], ['print("Hello World!")'], 'Testing', True)
+
+    assert mock_post.call_count == 2
+    assert sum(clock.sleeps) == pytest.approx(60)
+
+
+@unittest.mock.patch('requests.Session.get')
+def test_retries_are_bounded(mock_get, clock):
+    gist = Pygists(
+        'test_user', 'test_token', max_retries=2, rate_limiter=RateLimiter(clock=clock, sleep=clock.sleep)
+    )
+    mock_get.return_value = make_response(status_code=503)
+
+    with pytest.raises(requests.HTTPError):
+        gist.get_gist('1a2b3c4d5e6f')
+    assert mock_get.call_count == 3
@@ -0,0 +1,84 @@
+import io
+import json
+
+import pytest
+
+from pygists.models.gist import Gist
+from pygists.render import GistWriter
+from tests.utils import gist_data
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, s):
+        self.writes += 1
+        return super().write(s)
+
+
+@pytest.fixture
+def gists():
+    return [Gist.from_response(gist_data(f'gist{i}', description=f'Gist {i}')) for i in range(3)]
+
+
+def test_text_output(gists):
+    stream = CountingStream()
+    with GistWriter(stream, show_content=True) as out:
+        out.write(gists[0])
+
+    assert stream.getvalue() == (
+        "test_user's GitHub Gist: gist0\n"
+        "'Gist 0'\n"
+        "Created: 2019-01-01 10:00:20\n"
+        "Updated: 2019-01-02 10:00:20\n"
+        "Embed: https://gist.github.com/test_user/gist0.js\n"
+        "File | Size (chars)\n"
+        "test.py | 21\n"
+        'print("Hello World!")\n'
+        "\n\n"
+    )
+    assert stream.writes == 1
+
+
+def test_json_output_is_a_single_array(gists):
+    stream = CountingStream()
+    with GistWriter(stream, fmt='json') as out:
+        assert out.write_all(iter(gists)) == 3
+
+    parsed = json.loads(stream.getvalue())
+    assert [g['gist_id'] for g in parsed] == ['gist0', 'gist1', 'gist2']
+    assert parsed[0]['files'] == {'test.py': {'filename': 'test.py', 'size': 21}}
+    assert stream.writes == 4
+
+
+def test_empty_json_output():
+    stream = io.StringIO()
+    GistWriter(stream, fmt='json').close()
+
+    assert json.loads(stream.getvalue()) == []
+
+
+def test_ndjson_output(gists):
+    stream = CountingStream()
+    with GistWriter(stream, fmt='ndjson', show_content=True) as out:
+        out.write_all(gists)
+
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line)['description'] for line in lines] == ['Gist 0', 'Gist 1', 'Gist 2']
+    assert json.loads(lines[0])['files']['test.py']['content'] == 'print("Hello World!")'
+    assert stream.writes == 3
+
+
+def test_describe_writes_once(gists):
+    stream = CountingStream()
+    gists[0].describe(as_json=True, stream=stream)
+
+    assert json.loads(stream.getvalue())['gist_id'] == 'gist0'
+    assert stream.writes == 1
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        GistWriter(io.StringIO(), fmt='xml')
@@ -0,0 +1,57 @@
+"""Guard the cold start time of the command line"""
+import os
+import subprocess
+import sys
+
+import pygists
+
+HEAVY_MODULES = ('requests', 'urllib3', 'sqlite3', 'pygists.pygists', 'pygists.models.gist')
+# Generous budget for the cumulative import time of pygists.cli, in microseconds
+IMPORT_BUDGET_US = 100000
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(pygists.__file__)))
+
+
+def import_times(*args):
+    """Run python with -X importtime, returning the cumulative import time of every module"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args], cwd=ROOT, capture_output=True, text=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return result, times
+
+
+def test_help_does_not_import_heavy_modules():
+    result, times = import_times('-m', 'pygists', '--help')
+
+    assert result.returncode == 0
+    assert 'usage' in result.stdout
+    assert not [module for module in HEAVY_MODULES if module in times]
+
+
+def test_argument_errors_do_not_import_heavy_modules():
+    result, times = import_times('-m', 'pygists', 'get', '--max-workers', 'many')
+
+    assert result.returncode == 2
+    assert not [module for module in HEAVY_MODULES if module in times]
+
+
+def test_cli_import_time_budget():
+    _, times = import_times('-c', 'import pygists.cli')
+
+    assert times['pygists.cli'] < IMPORT_BUDGET_US
+
+
+def test_client_is_imported_on_first_access():
+    result = subprocess.run(
+        [sys.executable, '-c', 'import sys, pygists; assert "requests" not in sys.modules; '
+                               'from pygists import Pygists; assert "requests" in sys.modules'],
+        cwd=ROOT
+    )
+
+    assert result.returncode == 0
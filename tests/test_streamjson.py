@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from pygists.pygists import Pygists
+from pygists.streamjson import iter_array
+from tests.utils import gist_data
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+ELEMENTS = [
+    gist_data('aaa', description='Brackets ] } [ { and "quotes" \\" in strings'),
+    gist_data('bbb', description='Non-ASCII: héllo wörld ✓', files={'a.py': 'print("\\\\")\n' * 20}),
+    {'nested': [[1, 2], {'a': [3]}], 'number': -12.5e3, 'empty': {}, 'null': None},
+]
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 64, 65536])
+def test_elements_split_across_chunks(size):
+    document = json.dumps(ELEMENTS, ensure_ascii=False, indent=2).encode()
+
+    assert list(iter_array(chunked(document, size))) == ELEMENTS
+
+
+def test_elements_are_yielded_as_soon_as_complete():
+    received = []
+
+    def chunks():
+        for chunk in (b'[{"a": 1}, {"b"', b': 2}, ', b'{"c": 3}]'):
+            received.append(chunk)
+            yield chunk
+
+    elements = iter_array(chunks())
+
+    assert next(elements) == {'a': 1}
+    assert len(received) == 1
+    assert next(elements) == {'b': 2}
+    assert len(received) == 2
+
+
+@pytest.mark.parametrize('document,expected', [
+    (b' [ ] ', []),
+    (b'[1, 2]', [1, 2]),
+    (b'["a", true, null]', ['a', True, None]),
+])
+def test_scalar_and_empty_arrays(document, expected):
+    assert list(iter_array(chunked(document, 1))) == expected
+
+
+def test_numbers_cut_at_a_chunk_boundary():
+    assert list(iter_array([b'[12', b'34, 5', b'6]'])) == [1234, 56]
+    assert list(iter_array([b'[1.', b'5]'])) == [1.5]
+    assert list(iter_array([b'[-1.5e', b'10]'])) == [-1.5e10]
+    assert list(iter_array(chunked(b'[1.5, -2.5E+3, 4e-2]', 1))) == [1.5, -2500.0, 0.04]
+
+
+@pytest.mark.parametrize('document,message', [
+    (b'', 'Incomplete JSON array'),
+    (b'[{"a": 1}', 'Incomplete JSON array'),
+    (b'[{"a": 1}, {"b": ', 'Expecting value'),
+    (b'{"a": 1}', 'Expected a JSON array'),
+    (b'[{"a": 1} {"b": 2}]', 'Expected , or ]'),
+    (b'[{"a": }]', 'Expecting value'),
+    (b'[1.]', 'Expected , or ]'),
+])
+def test_invalid_documents(document, message):
+    with pytest.raises(ValueError, match=message):
+        list(iter_array(chunked(document, 3)))
+
+
+def test_streamed_listing_matches_buffered_listing(server):
+    server.populate(25, files_per_gist=2, file_size=1000)
+    pygists = Pygists('test_user', 'test_token', base_url=server.url)
+
+    buffered = pygists.list_user_gists(per_page=10)
+    gzipped = server.gzipped
+    streamed = pygists.list_user_gists(per_page=10, stream=True)
+
+    assert len(streamed) == 25
+    assert [gist.to_dict(True) for gist in streamed] == [gist.to_dict(True) for gist in buffered]
+    # Every page was received gzip compressed
+    assert server.gzipped - gzipped == 3
@@ -0,0 +1,131 @@
+import datetime as dt
+import json
+
+import pytest
+import requests
+
+from pygists.cli import create_parser, run
+from pygists.models.gist import Gist
+from pygists.pygists import Pygists
+from pygists.watch import PollInterval, diff_listing
+from tests.utils import gist_data
+
+NOW = dt.datetime(2020, 1, 1)
+
+
+def gist(gist_id, updated_at='2019-01-02T10:00:20Z', **files):
+    data = gist_data(gist_id, files=files or {'a.py': 'a'})
+    data['updated_at'] = updated_at
+    return Gist.from_response(data)
+
+
+def events_of(events):
+    return [(event.event, event.gist_id, event.filename, event.change) for event in events]
+
+
+def test_diff_listing():
+    state, events = diff_listing({}, [gist('1'), gist('2')], NOW)
+    assert events_of(events) == [('created', '1', None, None), ('created', '2', None, None)]
+
+    changed = gist('1', '2019-01-03T10:00:20Z', **{'a.py': 'changed', 'b.py': 'b'})
+    _, events = diff_listing(state, [changed], NOW)
+
+    assert events_of(events) == [
+        ('updated', '1', None, None),
+        ('file_changed', '1', 'a.py', 'modified'),
+        ('file_changed', '1', 'b.py', 'added'),
+        ('deleted', '2', None, None),
+    ]
+    assert events[0].to_dict() == {
+        'event': 'updated', 'gist_id': '1', 'detected': '2020-01-01 00:00:00',
+        'updated': '2019-01-03 10:00:20', 'description': 'Testing',
+    }
+    assert events[3].gist is None
+
+
+def test_poll_interval_backs_off_and_tightens():
+    interval = PollInterval(1, 5, backoff=2)
+
+    assert [interval.update(active) for active in (False, False, False, True, False)] == [2, 4, 5, 1, 2]
+    with pytest.raises(ValueError):
+        PollInterval(5, 1)
+
+
+@pytest.mark.fake_github(rate_limit=1000)
+def test_watch_reports_changes_and_only_pays_for_them(server):
+    ids = server.populate(3)
+    editor = Pygists('editor', 'token', base_url=server.url)
+    changes = iter([
+        lambda: editor.create_gist(['new.py'], ['new'], 'New', True),
+        lambda: None,
+        lambda: editor.edit_gist(ids[0], {'file_0.py': {'content': 'edit'}, 'more.py': {'content': 'x'}}),
+        lambda: editor.delete_gist(ids[1]),
+    ])
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        next(changes)()
+
+    pygists = Pygists('test_user', 'token', base_url=server.url)
+    events = list(pygists.watch(min_interval=10, polls=5, sleep=sleep, clock=lambda: NOW))
+
+    assert events_of(events) == [
+        ('created', events[0].gist_id, None, None),
+        ('updated', ids[0], None, None),
+        ('file_changed', ids[0], 'file_0.py', 'modified'),
+        ('file_changed', ids[0], 'more.py', 'added'),
+        ('deleted', ids[1], None, None),
+    ]
+    assert sleeps == [10, 10, 20, 10]
+    # The poll without changes was answered with a free 304 Not Modified
+    assert server.not_modified == 1
+    assert 1000 - server.remaining('test_user') == 4
+
+
+def test_watch_keeps_polling_through_server_errors(monkeypatch):
+    pygists = Pygists('test_user', 'token')
+    listings = iter([[gist('1')], requests.ConnectionError('Down'), [gist('1'), gist('2')]])
+
+    def iter_user_gists():
+        listing = next(listings)
+        if isinstance(listing, Exception):
+            raise listing
+        return iter(listing)
+
+    monkeypatch.setattr(pygists, 'iter_user_gists', iter_user_gists)
+    sleeps = []
+    events = list(pygists.watch(min_interval=1, polls=3, sleep=sleeps.append, clock=lambda: NOW))
+
+    assert events_of(events) == [('created', '2', None, None)]
+    assert sleeps == [1, 2]
+
+
+def test_watch_subcommand_prints_ndjson(server, capsys, monkeypatch):
+    server.populate(2)
+    pygists = Pygists('test_user', 'token', base_url=server.url)
+    watch = pygists.watch
+    monkeypatch.setattr(pygists, 'watch', lambda **kwargs: watch(polls=1, **kwargs))
+    parsed = create_parser().parse_args(['watch', '--initial', '--interval', '5'])
+
+    assert run(parsed, pygists) == 0
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [line['event'] for line in lines] == ['created', 'created']
+
+
+def test_watch_subcommand_prints_text_on_request(server, capsys, monkeypatch):
+    ids = server.populate(1)
+    pygists = Pygists('test_user', 'token', base_url=server.url)
+    watch = pygists.watch
+    monkeypatch.setattr(pygists, 'watch', lambda **kwargs: watch(polls=1, clock=lambda: NOW, **kwargs))
+
+    assert run(create_parser().parse_args(['watch', '--initial', '--text']), pygists) == 0
+    assert capsys.readouterr().out == f'2020-01-01 00:00:00 | created | {ids[0]}\n\n'
+
+    for argv, message in (
+        (['watch', '--text', '--json'], 'cannot be combined'),
+        (['watch', '--show-content'], 'cannot show content'),
+    ):
+        with pytest.raises(SystemExit, match=message):
+            run(create_parser().parse_args(argv), pygists)
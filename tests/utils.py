@@ -0,0 +1,72 @@
+import json
+import os
+
+import requests
+
+LANGUAGES = {'.py': 'Python', '.sh': 'Shell', '.md': 'Markdown'}
+
+
+def gist_data(gist_id='1a2b3c4d5e6f', description='Testing', login='test_user', files=None):
+    """Build a gist as returned by the GitHub API"""
+    if files is None:
+        files = {'test.py': 'print("Hello World!")'}
+
+    return {
+        'url': f'https://api.github.com/gists/{gist_id}',
+        'forks_url': f'https://api.github.com/gists/{gist_id}/forks',
+        'commits_url': f'https://api.github.com/gists/{gist_id}/commits',
+        'id': gist_id,
+        'node_id': f'node_{gist_id}',
+        'git_pull_url': f'https://gist.github.com/{gist_id}.git',
+        'git_push_url': f'https://gist.github.com/{gist_id}.git',
+        'html_url': f'https://gist.github.com/{gist_id}',
+        'files': {
+            name: {
+                'filename': name,
+                'type': 'application/x-python',
+                'language': LANGUAGES.get(os.path.splitext(name)[1]),
+                'raw_url': f'https://gist.githubusercontent.com/{login}/{gist_id}/raw/abc/{name}',
+                'size': len(content.encode()),
+                'truncated': False,
+                'content': content,
+            } for name, content in files.items()
+        },
+        'public': True,
+        'created_at': '2019-01-01T10:00:20Z',
+        'updated_at': '2019-01-02T10:00:20Z',
+        'description': description,
+        'comments': 0,
+        'user': None,
+        'comments_url': f'https://api.github.com/gists/{gist_id}/comments',
+        'owner': {
+            'login': login,
+            'id': 1,
+            'node_id': 'MDQ6VXNlcjE=',
+            'avatar_url': 'https://github.com/images/error/octocat_happy.gif',
+            'gravatar_id': '',
+            'url': f'https://api.github.com/users/{login}',
+            'html_url': f'https://github.com/{login}',
+            'followers_url': f'https://api.github.com/users/{login}/followers',
+            'following_url': f'https://api.github.com/users/{login}/following{{/other_user}}',
+            'gists_url': f'https://api.github.com/users/{login}/gists{{/gist_id}}',
+            'starred_url': f'https://api.github.com/users/{login}/starred{{/owner}}{{/repo}}',
+            'subscriptions_url': f'https://api.github.com/users/{login}/subscriptions',
+            'organizations_url': f'https://api.github.com/users/{login}/orgs',
+            'repos_url': f'https://api.github.com/users/{login}/repos',
+            'events_url': f'https://api.github.com/users/{login}/events{{/privacy}}',
+            'received_events_url': f'https://api.github.com/users/{login}/received_events',
+            'type': 'User',
+            'site_admin': False,
+        },
+        'truncated': False,
+    }
+
+
+def make_response(body=None, status_code=200, headers=None, url=''):
+    """Build a requests.Response as returned by the GitHub API"""
+    r = requests.Response()
+    r.status_code = status_code
+    r.url = url
+    r.headers.update(headers or {})
+    r._content = json.dumps(body).encode() if body is not None else b''
+    return r